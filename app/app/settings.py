@@ -11,7 +11,9 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 from pathlib import Path
+import importlib.util
 import os
+import sys
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -30,29 +32,38 @@ ALLOWED_HOSTS = []
 
 # Application definition
 
+# API-only workers skip the admin and the OpenAPI docs/schema apps so a cold
+# start does not import them. Set API_ONLY=true for those processes.
+API_ONLY = os.environ.get('API_ONLY', 'false').lower() == 'true'
+
 INSTALLED_APPS = [
-    'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
-    'drf_spectacular',
     'core',
     'user',
     'recipe',
 ]
 
+if not API_ONLY:
+    INSTALLED_APPS.insert(0, 'django.contrib.admin')
+    INSTALLED_APPS.append('drf_spectacular')
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.query_budget.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'app.urls'
@@ -132,6 +143,43 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media/'
 STATIC_ROOT = '/vol/web/static/'
 
+# How recipe images reach clients after the permission check: 'django'
+# streams them from the app, 'x-accel' (nginx) and 'x-sendfile' (Apache,
+# lighttpd) hand the file to the front proxy. See core/media.py.
+MEDIA_SERVE_BACKEND = os.environ.get('MEDIA_SERVE_BACKEND', 'django')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+# Pre-generated OpenAPI schema, written by `manage.py build_schema`
+SCHEMA_ROOT = os.environ.get('SCHEMA_ROOT', '/vol/web/schema/')
+
+# Seconds a stored Idempotency-Key response is replayed for
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+# Delta sync: rows saved this many seconds before a cursor are resent, and
+# clients older than the tombstone retention get a full sync.
+SYNC_OVERLAP_SECONDS = int(os.environ.get('SYNC_OVERLAP_SECONDS', 30))
+SYNC_TOMBSTONE_RETENTION_DAYS = int(
+    os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', 30)
+)
+
+# Finished background jobs are kept this long for inspection.
+JOB_RETENTION_DAYS = int(os.environ.get('JOB_RETENTION_DAYS', 7))
+
+# Hide deleted tags and ingredients at once and purge their recipe links in
+# background batches of PURGE_BATCH_SIZE rows (needs run_worker).
+DEFERRED_DELETES = os.environ.get('DEFERRED_DELETES', 'false').lower() == 'true'
+PURGE_BATCH_SIZE = int(os.environ.get('PURGE_BATCH_SIZE', 1000))
+
+# Whether this process is running the test suite.
+TESTING = sys.argv[1:2] == ['test']
+
+# What happens when a view runs more queries than its `query_budgets`
+# entry: 'raise', 'log' (with a stack trace) or 'off'. Overruns raise in
+# development and tests, and are logged otherwise.
+QUERY_BUDGET_MODE = os.environ.get(
+    'QUERY_BUDGET_MODE', 'raise' if DEBUG or TESTING else 'log',
+)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -140,6 +188,80 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = "core.User"
 
-REST_FRAMEWORK = { 
-    "DEFAULT_SCHEMA_CLASS" : "drf_spectacular.openapi.AutoSchema",
-    }
\ No newline at end of file
+# Throttle counters must be shared by every worker in production; point
+# THROTTLE_CACHE_BACKEND at memcached (e.g. PyMemcacheCache) there.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'throttle': {
+        'BACKEND': os.environ.get(
+            'THROTTLE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('THROTTLE_CACHE_LOCATION', 'throttle'),
+    },
+    # Per-user recipe/tag/ingredient lists. Login warm-ups run in the
+    # worker, so they only help when this is shared with it (memcached).
+    'lists': {
+        'BACKEND': os.environ.get(
+            'LIST_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('LIST_CACHE_LOCATION', 'lists'),
+    },
+    # Compressed copies of cached responses; local to each process.
+    'compressed': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'compressed',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+
+# Responses smaller than this many bytes are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_LEVELS = {
+    'zstd': int(os.environ.get('COMPRESSION_LEVEL_ZSTD', 3)),
+    'br': int(os.environ.get('COMPRESSION_LEVEL_BR', 4)),
+    'gzip': int(os.environ.get('COMPRESSION_LEVEL_GZIP', 6)),
+}
+
+# Warm a user's cached lists in the background when a token is issued
+CACHE_WARMING = os.environ.get('CACHE_WARMING', 'false').lower() == 'true'
+CACHE_WARMING_MAX_PENDING = int(
+    os.environ.get('CACHE_WARMING_MAX_PENDING', 100)
+)
+
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    "DEFAULT_THROTTLE_CLASSES": [
+        "core.throttling.APIRateThrottle",
+    ],
+    "DEFAULT_THROTTLE_RATES": {
+        "ip": os.environ.get("THROTTLE_RATE_IP", "1200/min"),
+        "read": os.environ.get("THROTTLE_RATE_READ", "600/min"),
+        "write": os.environ.get("THROTTLE_RATE_WRITE", "120/min"),
+        "token": os.environ.get("THROTTLE_RATE_TOKEN", "10/min"),
+    },
+}
+
+# MessagePack is optional; clients opt in with Accept/Content-Type
+# application/msgpack.
+if importlib.util.find_spec('msgpack') is not None:
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].insert(
+        1, "core.renderers.MessagePackRenderer",
+    )
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"].append(
+        "core.parsers.MessagePackParser",
+    )
+
+if not API_ONLY:
+    REST_FRAMEWORK["DEFAULT_SCHEMA_CLASS"] = "drf_spectacular.openapi.AutoSchema"
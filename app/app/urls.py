@@ -13,28 +13,34 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView,
-)
-from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings 
 
+from core.batch import BatchView
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
-    path("api/schema/",SpectacularAPIView.as_view(), name="api-schema"),
-    path(
-        'api/docs/',
-        SpectacularSwaggerView.as_view(url_name='api-schema'),
-        name='api-docs',
-        ),
     path("api/user/",include('user.urls')),
     path('api/recipe/',include('recipe.urls')),
+    path('api/batch/', BatchView.as_view(), name='batch'),
 ]
 
+if not settings.API_ONLY:
+    from django.contrib import admin
+    from drf_spectacular.views import SpectacularSwaggerView
+
+    from core.schema import CachedSpectacularAPIView
+
+    urlpatterns += [
+        path('admin/', admin.site.urls),
+        path("api/schema/",CachedSpectacularAPIView.as_view(), name="api-schema"),
+        path(
+            'api/docs/',
+            SpectacularSwaggerView.as_view(url_name='api-schema'),
+            name='api-docs',
+            ),
+    ]
+
 if settings.DEBUG:
     urlpatterns += static (
         settings.MEDIA_URL,
@@ -4,11 +4,16 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
 from core import models
+from core.deletion import defer_delete
+from core.pagination import EstimatedCountPaginator
 
 class UserAdmin(BaseUserAdmin):
     """Define the admin pages for sure"""
     ordering = ['id']
     list_display = ['email', 'name']
+    search_fields = ['email__exact']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     fieldsets = (
         (None, {'fields':('email','password')}),
         (
@@ -24,6 +29,7 @@ class UserAdmin(BaseUserAdmin):
         (_('Important dates'), {'fields':('last_login',)}),
     )
     readonly_fields = ['last_login']
+    actions = ['delete_in_background']
     add_fieldsets = (
         (None, {
             'classes':('wide',),
@@ -38,9 +44,50 @@ class UserAdmin(BaseUserAdmin):
             )
         }),
     )
+
+    @admin.action(description=_('Delete selected users in the background'))
+    def delete_in_background(self, request, queryset):
+        """Deactivate users now and purge their data in batches."""
+        for user in queryset:
+            defer_delete(user)
+        self.message_user(
+            request, _('%d users queued for deletion.') % len(queryset),
+        )
     
 
+class LargeTableAdmin(admin.ModelAdmin):
+    """Admin for tables too large to count, scan or list in dropdowns."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_select_related = ['user']
+    raw_id_fields = ['user']
+    ordering = ['-id']
+
+
+class RecipeAdmin(LargeTableAdmin):
+    """Admin pages for recipes."""
+    list_display = ['id', 'title', 'user', 'time_minutes', 'price']
+    raw_id_fields = ['user', 'tags', 'ingredients']
+    # contains maps to LIKE, which the trigram index serves.
+    search_fields = ['title__contains', 'user__email__exact']
+
+
+class TagAdmin(LargeTableAdmin):
+    """Admin pages for tags."""
+    list_display = ['id', 'name', 'user', 'usage']
+    search_fields = ['name__contains', 'user__email__exact']
+
+
+class IngredientsAdmin(LargeTableAdmin):
+    """Admin pages for ingredients."""
+    list_display = ['id', 'name', 'user', 'catalog', 'usage']
+    list_select_related = ['user', 'catalog']
+    raw_id_fields = ['user', 'catalog']
+    # Names live on the catalog, whose trigram index serves contains.
+    search_fields = ['catalog__name__contains', 'user__email__exact']
+
+
 admin.site.register(models.User, UserAdmin)
-admin.site.register(models.Recipe)
-admin.site.register(models.Tag)
-admin.site.register(models.Ingredients)
\ No newline at end of file
+admin.site.register(models.Recipe, RecipeAdmin)
+admin.site.register(models.Tag, TagAdmin)
+admin.site.register(models.Ingredients, IngredientsAdmin)
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Batch endpoint running several API requests in one round trip.
+"""
+import io
+import logging
+from urllib.parse import urlsplit
+
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import generics, serializers, status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from core.renderers import ORJSONRenderer
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_REQUESTS = 20
+BATCH_PATH_PREFIXES = ('/api/user/', '/api/recipe/')
+FORWARDED_HEADERS = ('ETag', 'Location', 'Idempotent-Replayed')
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    """One sub-request of a batch."""
+    method = serializers.ChoiceField(
+        choices=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'], default='GET',
+    )
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False)
+    headers = serializers.DictField(
+        child=serializers.CharField(), required=False,
+    )
+
+    def validate_path(self, value):
+        if not urlsplit(value).path.startswith(BATCH_PATH_PREFIXES):
+            raise serializers.ValidationError(
+                'Only /api/user/ and /api/recipe/ routes can be batched.'
+            )
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    """Serializer for a list of sub-requests."""
+    requests = serializers.ListField(
+        child=BatchRequestSerializer(),
+        min_length=1,
+        max_length=MAX_BATCH_REQUESTS,
+    )
+
+
+def build_request(request, method, path, body=None, headers=None):
+    """Return a Django request for a sub-request of `request`.
+
+    The sub-request is forced to the batch's user and token, so it is not
+    authenticated again.
+    """
+    url = urlsplit(path)
+    content = b'' if body is None else ORJSONRenderer().render(body)
+
+    sub = HttpRequest()
+    sub.method = method
+    sub.path = sub.path_info = url.path
+    sub.META = {
+        key: value for key, value in request.META.items()
+        if not key.startswith(('CONTENT_', 'HTTP_IDEMPOTENCY', 'wsgi.'))
+    }
+    sub.META.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(content)),
+    })
+    for name, value in (headers or {}).items():
+        sub.META['HTTP_' + name.upper().replace('-', '_')] = value
+    sub.GET = QueryDict(url.query)
+    sub._stream = io.BytesIO(content)
+    sub._read_started = False
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+def run_request(sub):
+    """Dispatch a sub-request in-process and return its response entry."""
+    try:
+        match = resolve(sub.path_info)
+    except Resolver404:
+        return {'status': status.HTTP_404_NOT_FOUND, 'headers': {}, 'body': None}
+    sub.resolver_match = match
+    try:
+        response = match.func(sub, *match.args, **match.kwargs)
+    except Exception:
+        logger.exception('Batched request to %s failed', sub.path_info)
+        return {
+            'status': status.HTTP_500_INTERNAL_SERVER_ERROR,
+            'headers': {},
+            'body': None,
+        }
+    return {
+        'status': response.status_code,
+        'headers': {
+            name: response[name]
+            for name in FORWARDED_HEADERS if response.has_header(name)
+        },
+        'body': getattr(response, 'data', None),
+    }
+
+
+class BatchView(generics.GenericAPIView):
+    """Run up to MAX_BATCH_REQUESTS API requests in order, in one call.
+
+    The batch authenticates once and its sub-requests share the process's
+    database connection and caches. Each sub-request commits on its own;
+    later ones see the writes of earlier ones.
+    """
+    serializer_class = BatchSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        responses = [
+            run_request(build_request(request, **sub_request))
+            for sub_request in serializer.validated_data['requests']
+        ]
+        return Response({'responses': responses})
@@ -0,0 +1,120 @@
+"""
+Response compression negotiated from the Accept-Encoding header.
+"""
+import gzip
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSED_CACHE_ALIAS = 'compressed'
+COMPRESSED_CACHE_TTL = 10 * 60
+
+# Codecs in server preference order; ones whose library is missing are
+# simply never offered.
+CODECS = {}
+if zstandard is not None:
+    CODECS['zstd'] = lambda body, level: zstandard.ZstdCompressor(
+        level=level,
+    ).compress(body)
+if brotli is not None:
+    CODECS['br'] = lambda body, level: brotli.compress(body, quality=level)
+CODECS['gzip'] = lambda body, level: gzip.compress(
+    body, compresslevel=level, mtime=0,
+)
+
+
+def parse_accept_encoding(header):
+    """Return {coding: q} from an Accept-Encoding header."""
+    accepted = {}
+    for part in header.split(','):
+        coding, *params = part.strip().split(';')
+        q = 1.0
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def negotiate(header):
+    """Return the preferred coding both sides support, or None."""
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0
+    for coding in CODECS:
+        q = accepted.get(coding, accepted.get('*', 0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body, coding, cache=False):
+    """Compress a body, reusing earlier output for cached responses.
+
+    Cached bodies are keyed by a digest of the uncompressed bytes, which
+    is far cheaper to compute than the compression it saves.
+    """
+    level = settings.COMPRESSION_LEVELS[coding]
+    if not cache:
+        return CODECS[coding](body, level)
+    store = caches[COMPRESSED_CACHE_ALIAS]
+    key = f'{coding}:{level}:{hashlib.blake2b(body, digest_size=16).hexdigest()}'
+    compressed = store.get(key)
+    if compressed is None:
+        compressed = CODECS[coding](body, level)
+        store.set(key, compressed, COMPRESSED_CACHE_TTL)
+    return compressed
+
+
+def cache_compressed(response):
+    """Mark a response served from a cache so its compressed body is kept."""
+    response.cache_compressed = True
+    return response
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress responses with zstd, brotli or gzip as the client allows."""
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding is None:
+            return response
+
+        compressed = compress(
+            response.content,
+            coding,
+            cache=getattr(response, 'cache_compressed', False),
+        )
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = coding
+        return response
@@ -0,0 +1,110 @@
+"""
+Deferred deletes: hide rows at once, purge them in batches in a job.
+"""
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import (
+    IdempotencyKey,
+    Ingredients,
+    Job,
+    Purge,
+    Recipe,
+    Tag,
+    Tombstone,
+)
+
+logger = logging.getLogger(__name__)
+
+PURGE_TASK = 'core.tasks.purge'
+
+
+def delete_in_batches(queryset, batch_size):
+    """Delete a queryset's rows batch by batch, yielding each count."""
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return
+        yield queryset.model._base_manager.filter(pk__in=ids).delete()[0]
+
+
+def _purge_attr(model, through, column):
+    """Return a purge for a tag or ingredient and its recipe links."""
+    def purge(obj_id, batch_size):
+        yield from delete_in_batches(
+            through.objects.filter(**{column: obj_id}), batch_size,
+        )
+        yield from delete_in_batches(
+            model.all_objects.filter(id=obj_id), batch_size,
+        )
+    return purge
+
+
+def _purge_user(user_id, batch_size):
+    """Purge a user's rows table by table, links first."""
+    for through in (Recipe.tags.through, Recipe.ingredients.through):
+        yield from delete_in_batches(
+            through.objects.filter(recipe__user_id=user_id), batch_size,
+        )
+    yield from delete_in_batches(
+        Recipe.objects.filter(user_id=user_id), batch_size,
+    )
+    for manager in (
+        Tag.all_objects,
+        Ingredients.all_objects,
+        Tombstone.objects,
+        IdempotencyKey.objects,
+    ):
+        yield from delete_in_batches(
+            manager.filter(user_id=user_id), batch_size,
+        )
+    yield from delete_in_batches(
+        get_user_model().objects.filter(id=user_id), batch_size,
+    )
+
+
+PURGES = {
+    'core.user': _purge_user,
+    'core.tag': _purge_attr(Tag, Recipe.tags.through, 'tag_id'),
+    'core.ingredients': _purge_attr(
+        Ingredients, Recipe.ingredients.through, 'ingredients_id',
+    ),
+}
+
+
+def defer_delete(obj):
+    """Hide a user, tag or ingredient now and queue its purge."""
+    with transaction.atomic():
+        if isinstance(obj, get_user_model()):
+            obj.is_active = False
+            obj.save(update_fields=['is_active'])
+        else:
+            obj.deleted_at = timezone.now()
+            obj.save(update_fields=['deleted_at'])
+        purge = Purge.objects.create(
+            model=obj._meta.label_lower, object_id=obj.pk,
+        )
+        Job.objects.enqueue(PURGE_TASK, purge.id)
+    return purge
+
+
+def run_purge(purge, batch_size=None):
+    """Delete a purge's rows, recording progress after every batch.
+
+    Each batch commits on its own, so locks are held briefly and a retried
+    job resumes where the last one stopped.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    for deleted in PURGES[purge.model](purge.object_id, batch_size):
+        Purge.objects.filter(id=purge.id).update(
+            deleted_rows=F('deleted_rows') + deleted,
+        )
+        purge.deleted_rows += deleted
+        logger.info('Purge %s: %s rows deleted', purge, purge.deleted_rows)
+    purge.finished_at = timezone.now()
+    purge.save(update_fields=['finished_at'])
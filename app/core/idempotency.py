@@ -0,0 +1,99 @@
+"""
+Replay of write responses for requests carrying an Idempotency-Key header.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from core.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'Idempotency-Key was already used for another request.'
+    default_code = 'idempotency_key_reused'
+
+
+def request_fingerprint(request):
+    """Return a hash identifying the method, path and body of a request."""
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = sorted(data.lists())
+    payload = json.dumps(
+        [request.method, request.path, data],
+        sort_keys=True,
+        cls=DjangoJSONEncoder,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def idempotent(handler, key):
+    """Wrap a bound view handler so it runs at most once per key.
+
+    The key row is inserted in the same transaction as the write, so a
+    concurrent duplicate blocks on the unique constraint until the first
+    request commits and then replays its response. If the first request
+    fails, its row rolls back with it and the duplicate runs instead.
+    """
+    @functools.wraps(handler)
+    def wrapper(request, *args, **kwargs):
+        fingerprint = request_fingerprint(request)
+        expired = timezone.now() - timedelta(
+            seconds=settings.IDEMPOTENCY_KEY_TTL,
+        )
+        with transaction.atomic():
+            IdempotencyKey.objects.filter(
+                user=request.user, key=key, created_at__lt=expired,
+            ).delete()
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=request.user, key=key, fingerprint=fingerprint,
+                    )
+            except IntegrityError:
+                record = IdempotencyKey.objects.get(
+                    user=request.user, key=key,
+                )
+                if record.fingerprint != fingerprint:
+                    raise IdempotencyKeyReused()
+                return Response(
+                    record.response,
+                    status=record.status_code,
+                    headers={REPLAYED_HEADER: 'true'},
+                )
+
+            response = handler(request, *args, **kwargs)
+            record.status_code = response.status_code
+            record.response = response.data
+            record.save(update_fields=['status_code', 'response'])
+        return response
+
+    return wrapper
+
+
+class IdempotentMixin:
+    """Honour the Idempotency-Key header on a viewset's write methods."""
+    idempotent_methods = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        key = request.META.get(IDEMPOTENCY_HEADER)
+        if not key or request.method not in self.idempotent_methods:
+            return
+        if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+            raise ValidationError({'Idempotency-Key': 'Key is too long.'})
+        method = request.method.lower()
+        setattr(self, method, idempotent(getattr(self, method), key))
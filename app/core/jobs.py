@@ -0,0 +1,65 @@
+"""
+Registry and runner for background jobs stored in the Job table.
+"""
+import functools
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from core.models import Job
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE = 10
+BACKOFF_MAX = 60 * 60
+
+tasks = {}
+
+
+def task(func=None, *, name=None):
+    """Register a function as a job task under `name` or its dotted path."""
+    def register(func):
+        func.task_name = name or f'{func.__module__}.{func.__name__}'
+        func.enqueue = functools.partial(Job.objects.enqueue, func.task_name)
+        tasks[func.task_name] = func
+        return func
+
+    return register(func) if func is not None else register
+
+
+def discover():
+    """Import every installed app's `tasks` module."""
+    autodiscover_modules('tasks')
+
+
+def backoff(attempts):
+    """Return the delay before retry number `attempts`, with jitter."""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return timedelta(seconds=delay * random.uniform(0.5, 1))
+
+
+def run_job(job):
+    """Run a claimed job and record the outcome; return True on success."""
+    try:
+        tasks[job.task](*job.args)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + backoff(job.attempts)
+        else:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+            logger.error('Job %s (%s) failed', job.id, job.task)
+        job.save(update_fields=[
+            'status', 'run_at', 'last_error', 'finished_at',
+        ])
+        return False
+    job.status = Job.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'finished_at'])
+    return True
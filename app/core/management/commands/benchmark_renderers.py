@@ -0,0 +1,64 @@
+"""
+Django command to benchmark API renderers on a synthetic recipe list.
+"""
+import random
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import MessagePackRenderer, ORJSONRenderer, msgpack
+
+
+def recipe_list(count, rng):
+    """Return data shaped like RecipeSerializer(many=True).data."""
+    return [
+        OrderedDict([
+            ('id', recipe_id),
+            ('title', f'Recipe {recipe_id}'),
+            ('time_minutes', rng.randint(5, 120)),
+            ('price', str(Decimal(rng.randint(100, 9999)).scaleb(-2))),
+            ('link', f'https://example.com/recipes/{recipe_id}'),
+            ('tags', [
+                OrderedDict([('id', tag), ('name', f'Tag {tag}')])
+                for tag in rng.sample(range(1, 200), 3)
+            ]),
+            ('ingredients', [
+                OrderedDict([('id', ingredient), ('name', f'Item {ingredient}')])
+                for ingredient in rng.sample(range(1, 2000), 8)
+            ]),
+        ])
+        for recipe_id in range(1, count + 1)
+    ]
+
+
+class Command(BaseCommand):
+    """Django command to time rendering with each renderer"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        data = recipe_list(options['recipes'], random.Random(options['seed']))
+        renderers = [JSONRenderer(), ORJSONRenderer()]
+        if msgpack is not None:
+            renderers.append(MessagePackRenderer())
+
+        baseline = None
+        self.stdout.write(f"recipes: {len(data)}")
+        for renderer in renderers:
+            body = renderer.render(data)
+            start = time.perf_counter()
+            for _ in range(options['runs']):
+                renderer.render(data)
+            elapsed = (time.perf_counter() - start) / options['runs']
+            baseline = baseline or elapsed
+            self.stdout.write(
+                f"{type(renderer).__name__}: {elapsed * 1000:.2f} ms, "
+                f"{len(body)} bytes, {baseline / elapsed:.1f}x"
+            )
@@ -0,0 +1,54 @@
+"""
+Django command to benchmark the similar recipes index on synthetic data.
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipe.similarity import SimilarityIndex
+
+
+class Command(BaseCommand):
+    """Django command to time index build, update and top-k queries"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=50000)
+        parser.add_argument('--tags', type=int, default=200)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        rng = random.Random(options['seed'])
+        tags = range(1, options['tags'] + 1)
+        ingredients = range(1, options['ingredients'] + 1)
+        snapshots = {
+            recipe_id: {
+                'tags': rng.sample(tags, rng.randint(1, 5)),
+                'ingredients': rng.sample(ingredients, rng.randint(3, 15)),
+            }
+            for recipe_id in range(1, options['recipes'] + 1)
+        }
+        recipe_ids = list(snapshots)
+
+        start = time.perf_counter()
+        index = SimilarityIndex(snapshots)
+        build = time.perf_counter() - start
+
+        queries = [rng.choice(recipe_ids) for _ in range(options['queries'])]
+        start = time.perf_counter()
+        for recipe_id in queries:
+            index.similar(recipe_id, 10)
+        query = (time.perf_counter() - start) / len(queries)
+
+        start = time.perf_counter()
+        index.update(recipe_ids[0], snapshots[recipe_ids[-1]])
+        index.similar(recipe_ids[0], 10)
+        refresh = time.perf_counter() - start
+
+        self.stdout.write(f"recipes: {len(recipe_ids)}")
+        self.stdout.write(f"build: {build * 1000:.1f} ms")
+        self.stdout.write(f"top-10 query: {query * 1000:.2f} ms")
+        self.stdout.write(f"update + query: {refresh * 1000:.1f} ms")
@@ -0,0 +1,30 @@
+"""
+Django command to pre-generate the OpenAPI schema at build time.
+"""
+import os
+
+from django.core.management.base import BaseCommand
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+
+from core.schema import (
+    clear_schema_cache,
+    generate_schema,
+    schema_file_path,
+)
+
+
+class Command(BaseCommand):
+    """Django command to write the schema artifacts to SCHEMA_ROOT"""
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        schema = generate_schema()
+        for renderer in (OpenApiYamlRenderer(), OpenApiJsonRenderer()):
+            path = schema_file_path(renderer.format)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(renderer.render(schema, renderer_context={}))
+            self.stdout.write(f"Wrote {path}")
+
+        clear_schema_cache()
+        self.stdout.write(self.style.SUCCESS("Schema built!"))
@@ -0,0 +1,95 @@
+"""
+Django command to merge a user's ingredients that share a catalog entry.
+
+Names are matched case-insensitively through the catalog, so a user who
+had both "Salt" and "salt" now has two rows for one entry.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from core.models import Ingredients, Recipe, RecipeStats, Tombstone, User
+
+
+class Command(BaseCommand):
+    """Django command to merge duplicate ingredients in user batches"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Seconds to pause between batches to limit load.',
+        )
+
+    def merge(self, user, catalog_id, keep):
+        """Fold a user's other rows for a catalog entry into `keep`."""
+        through = Recipe.ingredients.through
+        with transaction.atomic():
+            duplicates = list(
+                Ingredients.objects.filter(user=user, catalog_id=catalog_id)
+                .exclude(id=keep)
+                .values_list('id', flat=True)
+            )
+            recipe_ids = set(
+                through.objects.filter(ingredients_id__in=duplicates)
+                .values_list('recipe_id', flat=True)
+            )
+            linked = set(
+                through.objects.filter(
+                    ingredients_id=keep, recipe_id__in=recipe_ids,
+                ).values_list('recipe_id', flat=True)
+            )
+            through.objects.bulk_create(
+                through(recipe_id=recipe_id, ingredients_id=keep)
+                for recipe_id in recipe_ids - linked
+            )
+            through.objects.filter(ingredients_id__in=duplicates).delete()
+            Ingredients.objects.filter(id__in=duplicates).delete()
+            Ingredients.objects.filter(id=keep).update(
+                usage=through.objects.filter(ingredients_id=keep).count(),
+            )
+            # Resend the changed recipes to delta sync clients.
+            Recipe.objects.filter(id__in=recipe_ids).update(
+                updated_at=timezone.now(),
+            )
+            Tombstone.objects.record(user, Tombstone.INGREDIENT, duplicates)
+        return len(duplicates)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        batch_size = options['batch_size']
+        last_id = 0
+        merged = 0
+        while True:
+            users = User.objects.in_bulk(list(
+                User.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            ))
+            if not users:
+                break
+            last_id = max(users)
+            groups = (
+                Ingredients.objects.filter(user_id__in=users)
+                .values('user_id', 'catalog_id')
+                .annotate(keep=Min('id'), rows=Count('id'))
+                .filter(rows__gt=1)
+                .order_by()
+            )
+            affected = set()
+            for group in groups:
+                user = users[group['user_id']]
+                merged += self.merge(user, group['catalog_id'], group['keep'])
+                affected.add(user)
+            for user in affected:
+                RecipeStats.objects.rebuild(user)
+            self.stdout.write(f"Merged {merged} ingredients (up to user {last_id})")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f"Merged {merged} ingredients"))
@@ -0,0 +1,117 @@
+"""
+Django command to report the per-module import cost of a cold start.
+"""
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+STARTUP_CODE = (
+    "import app.wsgi; "
+    "from django.urls import get_resolver; "
+    "get_resolver().url_patterns"
+)
+
+
+def parse_importtime(output):
+    """Return [(module, self_us, cumulative_us, depth)] from -X importtime."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def package_costs(rows):
+    """Sum the self time of every module under its top-level package."""
+    costs = defaultdict(int)
+    for name, self_us, cumulative_us, depth in rows:
+        costs[name.split('.')[0]] += self_us
+    return costs
+
+
+class Command(BaseCommand):
+    """Django command to profile worker startup imports"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15)
+        parser.add_argument(
+            '--api-only',
+            action='store_true',
+            help='Profile an API-only worker (API_ONLY=true).',
+        )
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Benchmark a full worker against an API-only worker.',
+        )
+        parser.add_argument('--runs', type=int, default=3)
+
+    def run_startup(self, api_only):
+        """Start a fresh interpreter and return (wall seconds, rows)."""
+        env = dict(os.environ)
+        env['API_ONLY'] = 'true' if api_only else 'false'
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_CODE],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return time.perf_counter() - start, parse_importtime(result.stderr)
+
+    def best_of(self, api_only, runs):
+        """Return the fastest of several startups to reduce noise."""
+        return min(
+            (self.run_startup(api_only) for _ in range(runs)),
+            key=lambda run: run[0],
+        )
+
+    def report(self, label, wall, rows, top):
+        """Write the per-package and per-module import cost."""
+        total = sum(row[1] for row in rows)
+        self.stdout.write(
+            f"{label}: {wall * 1000:.1f} ms wall, "
+            f"{total / 1000:.1f} ms importing {len(rows)} modules"
+        )
+        self.stdout.write("  top-level packages (self ms):")
+        costs = sorted(
+            package_costs(rows).items(), key=lambda item: -item[1]
+        )
+        for package, cost in costs[:top]:
+            self.stdout.write(f"    {cost / 1000:9.1f}  {package}")
+        self.stdout.write("  modules (cumulative ms):")
+        modules = sorted(rows, key=lambda row: -row[2])
+        for name, self_us, cumulative_us, depth in modules[:top]:
+            self.stdout.write(f"    {cumulative_us / 1000:9.1f}  {name}")
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        top, runs = options['top'], options['runs']
+        if options['compare']:
+            full_wall, full_rows = self.best_of(False, runs)
+            api_wall, api_rows = self.best_of(True, runs)
+            self.report("full worker", full_wall, full_rows, top)
+            self.report("API-only worker", api_wall, api_rows, top)
+            saved = (full_wall - api_wall) * 1000
+            self.stdout.write(self.style.SUCCESS(
+                f"API-only cold start saves {saved:.1f} ms "
+                f"({len(full_rows) - len(api_rows)} fewer modules)"
+            ))
+            return
+
+        api_only = options['api_only']
+        wall, rows = self.best_of(api_only, runs)
+        self.report(
+            "API-only worker" if api_only else "full worker", wall, rows, top
+        )
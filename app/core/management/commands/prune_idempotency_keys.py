@@ -0,0 +1,35 @@
+"""
+Django command to delete Idempotency-Key responses past their TTL.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    """Django command to prune expired idempotency keys"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        expired = timezone.now() - timedelta(
+            seconds=settings.IDEMPOTENCY_KEY_TTL,
+        )
+        deleted = 0
+        while True:
+            ids = list(
+                IdempotencyKey.objects.filter(created_at__lt=expired)
+                .values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} expired idempotency keys"
+        ))
@@ -0,0 +1,42 @@
+"""
+Django command to delete finished background jobs past their retention.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Job
+
+
+class Command(BaseCommand):
+    """Django command to prune done and failed jobs"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--stale-after', type=int, default=600,
+            help='Seconds after which a running job is assumed abandoned.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        abandoned = Job.objects.fail_abandoned(
+            timedelta(seconds=options['stale_after']),
+        )
+        expired = timezone.now() - timedelta(days=settings.JOB_RETENTION_DAYS)
+        deleted = 0
+        while True:
+            ids = list(
+                Job.objects.filter(
+                    status__in=[Job.DONE, Job.FAILED],
+                    finished_at__lt=expired,
+                ).values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            deleted += Job.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(
+            f"Failed {abandoned} abandoned jobs, deleted {deleted} finished jobs"
+        ))
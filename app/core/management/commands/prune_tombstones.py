@@ -0,0 +1,35 @@
+"""
+Django command to delete sync tombstones past their retention.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Tombstone
+
+
+class Command(BaseCommand):
+    """Django command to prune old deletion records"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        expired = timezone.now() - timedelta(
+            days=settings.SYNC_TOMBSTONE_RETENTION_DAYS,
+        )
+        deleted = 0
+        while True:
+            ids = list(
+                Tombstone.objects.filter(deleted_at__lt=expired)
+                .values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            deleted += Tombstone.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} expired tombstones"
+        ))
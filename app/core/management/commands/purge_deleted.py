@@ -0,0 +1,35 @@
+"""
+Django command to report on, or run, deferred deletes.
+"""
+from django.core.management.base import BaseCommand
+
+from core import deletion
+from core.models import Purge
+
+
+class Command(BaseCommand):
+    """Django command to show purge progress or run pending purges"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--run', action='store_true',
+            help='Run unfinished purges here instead of in the worker.',
+        )
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        pending = Purge.objects.filter(finished_at__isnull=True).order_by('id')
+        for purge in pending:
+            if options['run']:
+                deletion.run_purge(purge, options['batch_size'])
+                self.stdout.write(
+                    f"{purge}: done, {purge.deleted_rows} rows deleted"
+                )
+            else:
+                self.stdout.write(
+                    f"{purge}: {purge.deleted_rows} rows deleted so far, "
+                    f"queued {purge.created_at:%Y-%m-%d %H:%M:%S}"
+                )
+        if not pending:
+            self.stdout.write(self.style.SUCCESS('No pending purges'))
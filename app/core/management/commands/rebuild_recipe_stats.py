@@ -0,0 +1,32 @@
+"""
+Django command to rebuild per-user recipe stats from the recipe tables.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.models import RecipeStats
+
+
+class Command(BaseCommand):
+    """Django command to recompute RecipeStats"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            action='append',
+            help='Only rebuild stats for these users.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        users = get_user_model().objects.order_by('id')
+        if options['email']:
+            users = users.filter(email__in=options['email'])
+
+        rebuilt = 0
+        for user in users.iterator():
+            RecipeStats.objects.rebuild(user)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt recipe stats for {rebuilt} users"
+        ))
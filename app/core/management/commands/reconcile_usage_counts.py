@@ -0,0 +1,67 @@
+"""
+Django command to fix drift in Tag and Ingredients usage counters.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from core.models import Ingredients, Recipe, Tag
+
+
+def actual_usage(through, column):
+    """Return a subquery counting recipe links for the outer row."""
+    return Coalesce(
+        Subquery(
+            through.objects.filter(**{column: OuterRef('pk')})
+            .values(column)
+            .annotate(total=Count('*'))
+            .values('total')
+        ),
+        Value(0),
+    )
+
+
+class Command(BaseCommand):
+    """Django command to recount usage from the recipe M2M tables"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def reconcile(self, model, through, column, batch_size):
+        """Recount one model in primary key batches; return rows fixed."""
+        fixed = 0
+        last_id = 0
+        while True:
+            ids = list(
+                model.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return fixed
+            last_id = ids[-1]
+            with transaction.atomic():
+                drifted = (
+                    model.objects.filter(id__in=ids)
+                    .annotate(actual=actual_usage(through, column))
+                    .exclude(usage=F('actual'))
+                    .values_list('id', flat=True)
+                )
+                fixed += model.objects.filter(id__in=list(drifted)).update(
+                    usage=actual_usage(through, column),
+                )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        batch_size = options['batch_size']
+        tags = self.reconcile(
+            Tag, Recipe.tags.through, 'tag_id', batch_size,
+        )
+        ingredients = self.reconcile(
+            Ingredients, Recipe.ingredients.through, 'ingredients_id',
+            batch_size,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Fixed usage of {tags} tags and {ingredients} ingredients"
+        ))
@@ -0,0 +1,226 @@
+"""
+Django command to report query counts for every API route.
+"""
+import json
+import os
+from decimal import Decimal
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from core.models import Ingredients, Recipe, RecipeStats, Tag, User
+from core.query_budget import get_budget, view_action
+
+PASSWORD = 'report-query-budgets'
+
+# Request bodies for the write routes, keyed by (route name, method)
+PAYLOADS = {
+    ('user:create', 'POST'): {
+        'email': 'new-user@example.com', 'password': PASSWORD, 'name': 'New',
+    },
+    ('user:token', 'POST'): {
+        'email': 'budget@example.com', 'password': PASSWORD,
+    },
+    ('user:me', 'PUT'): {
+        'email': 'budget@example.com', 'password': PASSWORD, 'name': 'Put',
+    },
+    ('user:me', 'PATCH'): {'name': 'Renamed'},
+    ('recipe:recipe-list', 'POST'): {
+        'title': 'New recipe',
+        'time_minutes': 10,
+        'price': '4.50',
+        'tags': [{'name': 'Tag 0'}, {'name': 'New tag'}],
+        'ingredients': [{'name': 'Item 0'}, {'name': 'New item'}],
+    },
+    ('recipe:recipe-detail', 'PATCH'): {
+        'tags': [{'name': 'Tag 1'}], 'ingredients': [{'name': 'Item 1'}],
+    },
+    ('recipe:recipe-detail', 'PUT'): {
+        'title': 'Replaced', 'time_minutes': 5, 'price': '1.00',
+    },
+    ('recipe:recipe-detail', 'DELETE'): None,
+    ('recipe:recipe-shopping-list', 'POST'): lambda seeded: {
+        'recipes': seeded['recipe_ids'],
+    },
+    ('recipe:recipe-meal-plan', 'POST'): {
+        'days': 3, 'budget': '100.00', 'max_time_minutes': 120,
+    },
+    ('recipe:tag-detail', 'PUT'): {'name': 'Replaced tag'},
+    ('recipe:tag-detail', 'PATCH'): {'name': 'Renamed tag'},
+    ('recipe:tag-detail', 'DELETE'): None,
+    ('recipe:ingredients-detail', 'PUT'): {'name': 'Replaced item'},
+    ('recipe:ingredients-detail', 'PATCH'): {'name': 'Renamed item'},
+    ('recipe:ingredients-detail', 'DELETE'): None,
+}
+
+# Query parameters for read routes that do little work without them
+PARAMS = {
+    'recipe:tag-autocomplete': {'q': 'tag'},
+    'recipe:ingredients-autocomplete': {'q': 'item'},
+    'recipe:recipe-pantry': lambda seeded: {
+        'ingredients': ','.join(map(str, seeded['ingredient_ids'][:3])),
+    },
+}
+
+
+def api_routes(patterns, prefix=''):
+    """Yield (route name, view function, URL kwargs) for DRF views."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            namespace = pattern.namespace
+            yield from api_routes(
+                pattern.url_patterns,
+                f'{prefix}{namespace}:' if namespace else prefix,
+            )
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            view_class = getattr(pattern.callback, 'cls', None)
+            kwargs = set(pattern.pattern.regex.groupindex)
+            if (
+                view_class is not None
+                and issubclass(view_class, APIView)
+                and 'format' not in kwargs
+            ):
+                yield f'{prefix}{pattern.name}', pattern.callback, kwargs
+
+
+def route_methods(view_func):
+    """Return the HTTP methods a view function dispatches."""
+    actions = getattr(view_func, 'actions', None)
+    if actions is not None:
+        return [method.upper() for method in actions]
+    return [
+        method.upper() for method in view_func.cls.http_method_names
+        if method not in ('head', 'options', 'trace')
+        and hasattr(view_func.cls, method)
+    ]
+
+
+class Command(BaseCommand):
+    """Django command to list actual and budgeted queries per route"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=20)
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Fail if any route runs more queries than its budget.',
+        )
+
+    def seed(self, recipes):
+        """Create a user owning recipes with tags and ingredients."""
+        user = User.objects.create_user('budget@example.com', PASSWORD)
+        tags = Tag.objects.bulk_create(
+            Tag(user=user, name=f'Tag {i}') for i in range(5)
+        )
+        ingredients = [
+            Ingredients.objects.create(user=user, name=f'Item {i}')
+            for i in range(10)
+        ]
+        for i in range(recipes):
+            recipe = Recipe.objects.create(
+                user=user,
+                title=f'Recipe {i}',
+                time_minutes=5 + i % 60,
+                price=Decimal(100 + i).scaleb(-2),
+                image=f'uploads/recipe/{i}.jpg',
+            )
+            recipe.tags.set(tags[i % 5:i % 5 + 2])
+            recipe.ingredients.set(ingredients[i % 10:i % 10 + 4])
+        RecipeStats.objects.rebuild(user)
+        return user, {
+            Recipe: recipe,
+            Tag: tags[-1],
+            Ingredients: ingredients[-1],
+            'recipe_ids': list(
+                Recipe.objects.filter(user=user).values_list('id', flat=True)
+            ),
+            'ingredient_ids': [ingredient.id for ingredient in ingredients],
+        }
+
+    def url_for(self, name, view_func, kwarg_names, seeded):
+        """Return the URL of a route for the seeded objects."""
+        kwargs = {}
+        if 'pk' in kwarg_names:
+            obj = seeded[view_func.cls.queryset.model]
+            kwargs['pk'] = obj.pk
+            if 'filename' in kwarg_names:
+                kwargs['filename'] = os.path.basename(obj.image.name)
+        return reverse(name, kwargs=kwargs)
+
+    def measure(self, client, method, url, data):
+        """Run one request in a rolled back savepoint; return queries."""
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.generic(
+                    method, url,
+                    data='' if data is None else json.dumps(data),
+                    content_type='application/json',
+                )
+            transaction.set_rollback(True)
+        return response.status_code, len(ctx.captured_queries)
+
+    @override_settings(
+        QUERY_BUDGET_MODE='off',
+        ALLOWED_HOSTS=['testserver'],
+        MEDIA_SERVE_BACKEND='x-accel',
+        CACHE_WARMING=False,
+    )
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        over = []
+        rows = []
+        with transaction.atomic():
+            user, seeded = self.seed(options['recipes'])
+            token = Token.objects.create(user=user)
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+            routes = api_routes(get_resolver().url_patterns)
+            for name, view_func, kwarg_names in routes:
+                if not name.startswith(('user:', 'recipe:')):
+                    continue
+                url = self.url_for(name, view_func, kwarg_names, seeded)
+                for method in route_methods(view_func):
+                    view_class, action = view_action(view_func, method)
+                    budget = get_budget(view_class, action)
+                    if method == 'GET':
+                        data = None
+                        params = PARAMS.get(name, {})
+                    elif (name, method) in PAYLOADS:
+                        data = PAYLOADS[name, method]
+                        params = {}
+                    else:
+                        rows.append((url, method, action, '-', budget, 'skip'))
+                        continue
+                    if callable(data):
+                        data = data(seeded)
+                    if callable(params):
+                        params = params(seeded)
+                    path = f'{url}?{urlencode(params)}' if params else url
+                    status, queries = self.measure(client, method, path, data)
+                    flag = status
+                    if budget is not None and queries > budget:
+                        flag = f'{status} OVER'
+                        over.append(f'{method} {path}')
+                    rows.append((path, method, action, queries, budget, flag))
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{'route':<56} {'method':<7} {'action':<14} "
+            f"{'queries':>7} {'budget':>7}  status"
+        )
+        for url, method, action, queries, budget, flag in rows:
+            self.stdout.write(
+                f"{url:<56} {method:<7} {action:<14} {queries:>7} "
+                f"{'-' if budget is None else budget:>7}  {flag}"
+            )
+        if over:
+            message = f"Over budget: {', '.join(over)}"
+            if options['check']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
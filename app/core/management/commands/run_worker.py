@@ -0,0 +1,129 @@
+"""
+Django command to run background jobs from the Job table.
+"""
+import signal
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from core import jobs
+from core.models import Job
+
+
+class Stats:
+    """Thread-safe job counters for throughput reporting."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.done = 0
+        self.failed = 0
+        self.seconds = 0.0
+
+    def add(self, ok, seconds):
+        with self.lock:
+            if ok:
+                self.done += 1
+            else:
+                self.failed += 1
+            self.seconds += seconds
+
+    def snapshot(self):
+        with self.lock:
+            return self.done, self.failed, self.seconds
+
+
+class Command(BaseCommand):
+    """Django command to process queued jobs"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--batch-size', type=int, default=10,
+            help='Jobs claimed per poll by each thread.',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Seconds to sleep when the queue is empty.',
+        )
+        parser.add_argument(
+            '--stale-after', type=int, default=600,
+            help='Seconds after which a running job is assumed abandoned.',
+        )
+        parser.add_argument(
+            '--stats-interval', type=float, default=60.0,
+            help='Seconds between throughput reports.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once no jobs are due instead of polling.',
+        )
+
+    def work(self, options, stats, stop):
+        """Claim and run jobs until stopped, or until idle with --once."""
+        stale_after = timedelta(seconds=options['stale_after'])
+        try:
+            while not stop.is_set():
+                close_old_connections()
+                claimed = Job.objects.claim(
+                    options['batch_size'], stale_after=stale_after,
+                )
+                if not claimed:
+                    if options['once']:
+                        return
+                    stop.wait(options['poll_interval'])
+                    continue
+                for position, job in enumerate(claimed):
+                    # Later jobs in a batch wait on the earlier ones; renew
+                    # their lock so they are not reclaimed as stale, and
+                    # skip any another worker already reclaimed.
+                    if position and not Job.objects.renew(job):
+                        continue
+                    started = time.monotonic()
+                    ok = jobs.run_job(job)
+                    stats.add(ok, time.monotonic() - started)
+        finally:
+            connection.close()
+
+    def report(self, stats, started):
+        """Write totals, throughput and mean job duration."""
+        done, failed, seconds = stats.snapshot()
+        elapsed = time.monotonic() - started
+        total = done + failed
+        self.stdout.write(
+            f"{done} done, {failed} failed, "
+            f"{total / elapsed if elapsed else 0:.1f} jobs/s, "
+            f"{seconds / total * 1000 if total else 0:.1f} ms/job"
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        jobs.discover()
+        stats = Stats()
+        stop = threading.Event()
+        handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                handlers[sig] = signal.signal(sig, lambda *args: stop.set())
+
+        started = time.monotonic()
+        threads = [
+            threading.Thread(
+                target=self.work, args=(options, stats, stop), daemon=True,
+            )
+            for _ in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(options['stats_interval'])
+                if thread.is_alive():
+                    self.report(stats, started)
+                    break
+        for sig, handler in handlers.items():
+            signal.signal(sig, handler)
+        self.report(stats, started)
+        self.stdout.write(self.style.SUCCESS('Worker stopped'))
@@ -0,0 +1,152 @@
+"""
+Django command to run the API under gunicorn with a preloaded app.
+"""
+import gc
+import os
+import resource
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import warmup
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    BaseApplication = object
+
+
+def cpu_count():
+    """Return the CPUs this process may run on (container aware)."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def worker_counts(cpus):
+    """Return (workers, threads) for a CPU count.
+
+    Processes give parallelism for CPU work; threads overlap the time
+    requests spend waiting on the database.
+    """
+    return 2 * cpus + 1, 2
+
+
+def rss_bytes():
+    """Return the resident memory of this process."""
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def recycle_on_memory(limit):
+    """Return a post_request hook retiring workers above `limit` bytes.
+
+    The worker finishes its in-flight requests and the arbiter forks a
+    fresh copy of the preloaded app in its place.
+    """
+    def post_request(worker, req, environ, resp):
+        rss = rss_bytes()
+        if worker.alive and rss > limit:
+            worker.log.info(
+                'Worker %s using %d MB, recycling', worker.pid, rss >> 20,
+            )
+            worker.alive = False
+    return post_request
+
+
+class Application(BaseApplication):
+    """Gunicorn application loading the Django app once, in the master."""
+
+    def __init__(self, options, load):
+        self.options = options
+        self.loader = load
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.loader()
+
+
+class Command(BaseCommand):
+    """Django command to serve the API with tuned gunicorn workers"""
+
+    def add_arguments(self, parser):
+        workers, threads = worker_counts(cpu_count())
+        parser.add_argument('--bind', default='0.0.0.0:8000')
+        parser.add_argument('--workers', type=int, default=workers)
+        parser.add_argument('--threads', type=int, default=threads)
+        parser.add_argument('--timeout', type=int, default=30)
+        parser.add_argument(
+            '--max-memory', type=int, default=512,
+            help='Recycle a worker once its RSS passes this many MB (0: off).',
+        )
+        parser.add_argument(
+            '--max-requests', type=int, default=10000,
+            help='Recycle a worker after this many requests (0: off).',
+        )
+        parser.add_argument(
+            '--query-budget-mode',
+            choices=['raise', 'log', 'off'],
+            help=(
+                'How workers handle views going over their query budget '
+                '(default: the QUERY_BUDGET_MODE setting).'
+            ),
+        )
+
+    def load_application(self):
+        """Import and warm the app, then freeze it for the workers."""
+        from app.wsgi import application
+
+        warmed = warmup.warm()
+        connections.close_all()
+        # Keep the preloaded objects out of collections so the workers'
+        # garbage collector does not dirty their copy-on-write pages.
+        gc.collect()
+        gc.freeze()
+        self.stdout.write(
+            f"Warmed {warmed['urls']} URL patterns and "
+            f"{warmed['models']} models"
+        )
+        return application
+
+    def gunicorn_options(self, options):
+        """Return the gunicorn settings for the command options."""
+        config = {
+            'bind': options['bind'],
+            'workers': options['workers'],
+            'threads': options['threads'],
+            'worker_class': 'gthread',
+            'timeout': options['timeout'],
+            'preload_app': True,
+            'max_requests': options['max_requests'],
+            'max_requests_jitter': options['max_requests'] // 10,
+            'accesslog': '-',
+        }
+        if os.path.isdir('/dev/shm'):
+            config['worker_tmp_dir'] = '/dev/shm'
+        if options['max_memory']:
+            config['post_request'] = recycle_on_memory(
+                options['max_memory'] << 20,
+            )
+        return config
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        if BaseApplication is object:
+            raise CommandError('gunicorn is not installed.')
+        if options['query_budget_mode'] is not None:
+            settings.QUERY_BUDGET_MODE = options['query_budget_mode']
+        config = self.gunicorn_options(options)
+        self.stdout.write(
+            f"Serving on {config['bind']} with {config['workers']} workers "
+            f"x {config['threads']} threads"
+        )
+        Application(config, self.load_application).run()
@@ -0,0 +1,133 @@
+"""
+Serving of access-controlled media files.
+
+With MEDIA_SERVE_BACKEND = 'x-accel', the front proxy needs an internal
+location mapping MEDIA_ACCEL_PREFIX onto MEDIA_ROOT, e.g. for nginx:
+
+    location /protected-media/ {
+        internal;
+        alias /vol/web/media/;
+    }
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from rest_framework import status
+from rest_framework.renderers import BaseRenderer
+
+from core.renderers import ORJSONRenderer
+
+IMMUTABLE_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class PassthroughRenderer(BaseRenderer):
+    """Accept any media type for views returning file responses."""
+    media_type = '*/*'
+    format = ''
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return ORJSONRenderer().render(data)
+
+
+class RangeFile:
+    """File-like view of bytes [start, end] of an open file."""
+
+    def __init__(self, file, start, end):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = end - start + 1
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Return (start, end) for a single byte range, or None to ignore it."""
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        start, end = max(size - int(last), 0), size - 1
+        if not int(last):
+            raise RangeNotSatisfiable()
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def file_response(request, path):
+    """Stream a file from disk, honouring a single Range header.
+
+    Whole files go through FileResponse, which the WSGI server can hand to
+    sendfile(); ranges are read in blocks.
+    """
+    size = os.path.getsize(path)
+    try:
+        byte_range = parse_range(request.META.get('HTTP_RANGE', ''), size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(
+            status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+        )
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        return FileResponse(open(path, 'rb'))
+
+    start, end = byte_range
+    response = FileResponse(
+        RangeFile(open(path, 'rb'), start, end),
+        status=status.HTTP_206_PARTIAL_CONTENT,
+        content_type=mimetypes.guess_type(path)[0],
+    )
+    response['Content-Length'] = str(end - start + 1)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+def serve(request, field_file):
+    """Return a response delivering a stored file after access checks.
+
+    Callers must only reach this once permissions have been checked; the
+    URL should change whenever the file does, as responses are cached as
+    immutable.
+    """
+    backend = settings.MEDIA_SERVE_BACKEND
+    if backend == 'x-accel':
+        response = HttpResponse(
+            content_type=mimetypes.guess_type(field_file.name)[0],
+        )
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_PREFIX + quote(field_file.name)
+        )
+    elif backend == 'x-sendfile':
+        response = HttpResponse(
+            content_type=mimetypes.guess_type(field_file.name)[0],
+        )
+        response['X-Sendfile'] = field_file.path
+    else:
+        response = file_response(request, field_file.path)
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
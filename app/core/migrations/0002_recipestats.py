@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-19 07:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recipe_stats', serialize=False, to='core.user')),
+                ('recipe_count', models.IntegerField(default=0)),
+                ('time_minutes_total', models.BigIntegerField(default=0)),
+                ('time_minutes_counts', models.JSONField(default=dict)),
+                ('price_counts', models.JSONField(default=dict)),
+                ('tag_counts', models.JSONField(default=dict)),
+                ('ingredient_counts', models.JSONField(default=dict)),
+            ],
+        ),
+    ]
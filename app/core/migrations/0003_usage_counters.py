@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-19 07:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_recipestats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredients',
+            name='usage',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='usage',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='ingredients',
+            index=models.Index(fields=['user', '-usage'], name='core_ingred_user_id_b2b31a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', '-usage'], name='core_tag_user_id_d8b61c_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-19 07:49
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_usage_counters'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='ingredients',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='core_ingredients_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='core_tag_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-19 07:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_trigram_name_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngredientCatalog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ingredients',
+            name='catalog',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.ingredientcatalog'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 07:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_ingredient_catalog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipestats',
+            name='version',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
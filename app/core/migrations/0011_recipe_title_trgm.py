@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:12
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Built concurrently so the recipe table stays writable.
+    atomic = False
+
+    dependencies = [
+        ('core', '0010_deferred_deletes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='core_recipe_title_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
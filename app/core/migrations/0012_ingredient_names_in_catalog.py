@@ -0,0 +1,163 @@
+# Generated by Django 3.2.25 on 2026-10-19 08:46
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models, transaction
+import django.db.models.deletion
+from django.db.models.functions import Coalesce, NullIf
+
+BATCH_SIZE = 5000
+
+
+def catalog_key(name):
+    return name.strip().casefold()
+
+
+def move_names_to_catalog(apps, schema_editor):
+    """Key the catalog, merge entries differing only in case, link rows.
+
+    Each batch commits on its own, so rows are locked only briefly and a
+    rerun after a failure picks up where the last one stopped.
+    """
+    IngredientCatalog = apps.get_model('core', 'IngredientCatalog')
+    Ingredients = apps.get_model('core', 'Ingredients')
+
+    while True:
+        with transaction.atomic():
+            entries = list(
+                IngredientCatalog.objects.filter(key__isnull=True)
+                .order_by('id')[:BATCH_SIZE]
+            )
+            if not entries:
+                break
+            keys = dict(
+                IngredientCatalog.objects.filter(
+                    key__in={catalog_key(entry.name) for entry in entries},
+                ).values_list('key', 'id')
+            )
+            keyed = []
+            for entry in entries:
+                key = catalog_key(entry.name)
+                if key in keys:
+                    Ingredients.objects.filter(catalog_id=entry.id).update(
+                        catalog_id=keys[key],
+                    )
+                    entry.delete()
+                    continue
+                keys[key] = entry.id
+                entry.key = key
+                entry.name = entry.name.strip()
+                keyed.append(entry)
+            IngredientCatalog.objects.bulk_update(keyed, ['key', 'name'])
+
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Ingredients.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', 'name')[:BATCH_SIZE]
+            )
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            spellings = {}
+            for _, name in rows:
+                spellings.setdefault(catalog_key(name), name.strip())
+            entries = {
+                entry.key: entry
+                for entry in IngredientCatalog.objects.filter(
+                    key__in=spellings,
+                )
+            }
+            entries.update(
+                (entry.key, entry)
+                for entry in IngredientCatalog.objects.bulk_create(
+                    IngredientCatalog(key=key, name=name)
+                    for key, name in spellings.items()
+                    if key not in entries
+                )
+            )
+            updated = []
+            for row_id, name in rows:
+                entry = entries[catalog_key(name)]
+                name = name.strip()
+                updated.append(Ingredients(
+                    id=row_id,
+                    catalog_id=entry.id,
+                    display_name='' if name == entry.name else name,
+                ))
+            Ingredients.objects.bulk_update(
+                updated, ['catalog', 'display_name'],
+            )
+
+
+def restore_names(apps, schema_editor):
+    """Copy names back onto ingredients when migrating back."""
+    Ingredients = apps.get_model('core', 'Ingredients')
+    Ingredients.objects.update(
+        name=Coalesce(
+            NullIf('display_name', models.Value('')),
+            models.Subquery(
+                apps.get_model('core', 'IngredientCatalog').objects
+                .filter(id=models.OuterRef('catalog_id')).values('name')[:1]
+            ),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    # Large tables are rewritten in batches that commit one at a time.
+    atomic = False
+
+    dependencies = [
+        ('core', '0011_recipe_title_trgm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredientcatalog',
+            name='key',
+            field=models.TextField(null=True),
+        ),
+        migrations.AddField(
+            model_name='ingredients',
+            name='display_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+            preserve_default=False,
+        ),
+        migrations.RunPython(move_names_to_catalog, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='ingredientcatalog',
+            name='key',
+            field=models.TextField(unique=True),
+        ),
+        migrations.AlterField(
+            model_name='ingredientcatalog',
+            name='name',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='ingredients',
+            name='catalog',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.ingredientcatalog'),
+        ),
+        # Migrating back re-adds the column empty before filling it.
+        migrations.AlterField(
+            model_name='ingredients',
+            name='name',
+            field=models.CharField(max_length=255, null=True),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, restore_names),
+        migrations.RemoveIndex(
+            model_name='ingredients',
+            name='core_ingredients_name_trgm',
+        ),
+        migrations.RemoveField(
+            model_name='ingredients',
+            name='name',
+        ),
+        migrations.AddIndex(
+            model_name='ingredientcatalog',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='core_catalog_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
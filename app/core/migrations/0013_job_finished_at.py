@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-19 08:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_ingredient_names_in_catalog'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status__in', ['done', 'failed'])), fields=['finished_at'], name='core_job_finished_at'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-19 08:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_job_finished_at'),
+    ]
+
+    operations = [
+        # Keep the oldest of any pending duplicates queued before the
+        # constraint existed.
+        migrations.RunSQL(
+            "DELETE FROM core_job AS a USING core_job AS b "
+            "WHERE a.task = b.task AND a.args = b.args AND a.id > b.id "
+            "AND a.status IN ('queued', 'running') "
+            "AND b.status IN ('queued', 'running')",
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['queued', 'running'])), fields=('task', 'args'), name='core_job_pending_unique'),
+        ),
+    ]
@@ -3,10 +3,15 @@ Database Models.
 """
 import uuid
 import os
+from decimal import Decimal
 
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.db import connections, models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -70,10 +75,29 @@ class Recipe(models.Model):
     tags = models.ManyToManyField('Tag')
     ingredients = models.ManyToManyField('Ingredients')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'updated_at']),
+            GinIndex(
+                fields=['title'],
+                name='core_recipe_title_trgm',
+                opclasses=['gin_trgm_ops'],
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+class VisibleManager(models.Manager):
+    """Default manager hiding rows waiting for a deferred delete."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Tag(models.Model):
     """Tag for filtering recipes"""
     name = models.CharField(max_length=255)
@@ -81,19 +105,611 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    usage = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Set when hidden ahead of a batched purge; see core.deletion.
+    deleted_at = models.DateTimeField(null=True)
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-usage']),
+            models.Index(fields=['user', 'updated_at']),
+            GinIndex(
+                fields=['name'],
+                name='core_tag_name_trgm',
+                opclasses=['gin_trgm_ops'],
+            ),
+        ]
 
     def __str__(self):
         """Return String Representation of tag"""
         return (self.name)
 
+def catalog_key(name):
+    """Return the form ingredient names are matched on."""
+    return name.strip().casefold()
+
+
+class IngredientCatalogManager(models.Manager):
+    """Manager for the shared ingredient catalog."""
+
+    def intern(self, names):
+        """Return {key: catalog entry} for names, creating missing entries.
+
+        New entries keep the first spelling given for their key.
+        """
+        spellings = {}
+        for name in names:
+            spellings.setdefault(catalog_key(name), name.strip())
+        if not spellings:
+            return {}
+        self.bulk_create(
+            [self.model(key=key, name=name) for key, name in spellings.items()],
+            ignore_conflicts=True,
+        )
+        return {entry.key: entry for entry in self.filter(key__in=spellings)}
+
+    def intern_one(self, name):
+        """Return the catalog entry for one name in a single query."""
+        table = self.model._meta.db_table
+        key = catalog_key(name)
+        with connections[self.db].cursor() as cursor:
+            while True:
+                # The SELECT misses a row inserted by a concurrent
+                # transaction after this statement's snapshot; retry then.
+                cursor.execute(
+                    f'WITH inserted AS ('
+                    f'INSERT INTO {table} (key, name) VALUES (%s, %s) '
+                    f'ON CONFLICT (key) DO NOTHING RETURNING id, name) '
+                    f'SELECT id, name FROM inserted UNION ALL '
+                    f'SELECT id, name FROM {table} WHERE key = %s',
+                    [key, name.strip(), key],
+                )
+                row = cursor.fetchone()
+                if row is not None:
+                    return self.model(id=row[0], key=key, name=row[1])
+
+
+class IngredientCatalog(models.Model):
+    """Canonical ingredient name shared by every user."""
+    # Casefolding can lengthen a name ("ß" -> "ss"), so no length limit.
+    key = models.TextField(unique=True)
+    name = models.CharField(max_length=255)
+
+    objects = IngredientCatalogManager()
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=['name'],
+                name='core_catalog_name_trgm',
+                opclasses=['gin_trgm_ops'],
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+def _display_name(entry, spelling):
+    """Return the per-user spelling to store, blank when it is the catalog's."""
+    return '' if spelling == entry.name else spelling
+
+
+class IngredientManager(VisibleManager):
+    """Manager for ingredients, deduplicated through the catalog."""
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('catalog')
+
+    def for_names(self, user, names):
+        """Return (ingredients, created) for a user's ingredient names.
+
+        Names are matched through the catalog key, so "Salt" and " salt"
+        find the same row; new rows keep the user's first spelling. Runs a
+        fixed number of queries for any count.
+        """
+        entries = IngredientCatalog.objects.intern(names)
+        wanted = {}
+        for name in names:
+            entry = entries[catalog_key(name)]
+            wanted.setdefault(entry.id, (entry, name.strip()))
+        existing = {}
+        for ingredient in self.filter(
+            user=user, catalog_id__in=wanted,
+        ).order_by('id'):
+            existing.setdefault(ingredient.catalog_id, ingredient)
+        created = self.bulk_create([
+            self.model(
+                user=user,
+                catalog=entry,
+                display_name=_display_name(entry, spelling),
+            )
+            for catalog_id, (entry, spelling) in wanted.items()
+            if catalog_id not in existing
+        ])
+        existing.update(
+            (ingredient.catalog_id, ingredient) for ingredient in created
+        )
+        return [existing[catalog_id] for catalog_id in wanted], created
+
+
 class Ingredients(models.Model):
     """ Ingredients for the recipe"""
-    name = models.CharField(max_length=255)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    usage = models.IntegerField(default=0)
+    catalog = models.ForeignKey(
+        IngredientCatalog,
+        on_delete=models.PROTECT,
+        related_name='+',
+    )
+    # The user's spelling, only when it differs from the catalog's.
+    display_name = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True)
+
+    objects = IngredientManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-usage']),
+            models.Index(fields=['user', 'updated_at']),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def name(self):
+        """Return the user's spelling, or a name waiting to be saved."""
+        pending = self.__dict__.get('_name')
+        if pending is not None:
+            return pending
+        if self.display_name:
+            return self.display_name
+        return self.catalog.name if self.catalog_id else ''
+
+    @name.setter
+    def name(self, value):
+        self._name = value
+
+    def save(self, *args, **kwargs):
+        """Point the ingredient at the catalog entry for a new name."""
+        name = self.__dict__.get('_name')
+        if name is not None:
+            self.catalog = IngredientCatalog.objects.intern_one(name)
+            self.display_name = _display_name(self.catalog, name.strip())
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = (
+                    set(update_fields) - {'name'} | {'catalog', 'display_name'}
+                )
+        super().save(*args, **kwargs)
+        self.__dict__.pop('_name', None)
+
+
+PRICE_BUCKET_SIZE = Decimal('5')
+
+
+def recipe_snapshot(recipe):
+    """Return the recipe attributes tracked by RecipeStats."""
+    return {
+        'time_minutes': recipe.time_minutes,
+        'price': recipe.price,
+        'tags': list(recipe.tags.values_list('id', flat=True)),
+        'ingredients': list(
+            recipe.ingredients.values_list('id', flat=True)
+        ),
+    }
+
+
+def _bump(counts, key, delta):
+    """Add delta to a JSON counter, dropping keys that reach zero."""
+    key = str(key)
+    value = counts.get(key, 0) + delta
+    if value > 0:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+
+class RecipeStatsManager(models.Manager):
+    """Manager for incrementally maintained recipe stats."""
+
+    def _apply(self, stats, snapshot, sign):
+        """Add (sign=1) or remove (sign=-1) one recipe from stats."""
+        price = Decimal(snapshot['price'])
+        bucket = (price // PRICE_BUCKET_SIZE) * PRICE_BUCKET_SIZE
+        stats.recipe_count += sign
+        stats.time_minutes_total += sign * snapshot['time_minutes']
+        _bump(stats.time_minutes_counts, snapshot['time_minutes'], sign)
+        _bump(stats.price_counts, bucket, sign)
+        for tag_id in snapshot['tags']:
+            _bump(stats.tag_counts, tag_id, sign)
+        for ingredient_id in snapshot['ingredients']:
+            _bump(stats.ingredient_counts, ingredient_id, sign)
+
+    def record(self, user, old=None, new=None):
+        """Replace a recipe's old snapshot with its new one in user stats."""
+        with transaction.atomic():
+            stats, created = self.select_for_update().get_or_create(
+                user=user,
+            )
+            if created:
+                # Callers record a change after writing it, so a full count
+                # of the user's recipes already includes it.
+                return self.rebuild(user)
+            if old is not None:
+                self._apply(stats, old, -1)
+            if new is not None:
+                self._apply(stats, new, 1)
+            stats.version += 1
+            stats.save()
+        return stats
+
+    def discard(self, user, field, obj_id):
+        """Forget a deleted tag or ingredient from user stats."""
+        with transaction.atomic():
+            stats = self.select_for_update().filter(user=user).first()
+            if stats is None:
+                return
+            getattr(stats, field).pop(str(obj_id), None)
+            stats.version += 1
+            stats.save(update_fields=[field, 'version'])
+
+    def touch(self, user_id):
+        """Bump a user's version after a change outside recipe writes."""
+        self.filter(user_id=user_id).update(version=F('version') + 1)
+
+    def version(self, user_id):
+        """Return the write version of a user's recipes."""
+        return self.filter(user_id=user_id).values_list(
+            'version', flat=True,
+        ).first() or 0
+
+    def rebuild(self, user):
+        """Recompute user stats from scratch and return them.
+
+        Recipes and each link table are read once, so the query count does
+        not grow with the number of recipes.
+        """
+        with transaction.atomic():
+            version = self.version(user.id)
+            self.filter(user=user).delete()
+            stats = self.model(user=user, version=version + 1)
+            recipes = Recipe.objects.filter(user=user).values_list(
+                'time_minutes', 'price',
+            )
+            for time_minutes, price in recipes.iterator(chunk_size=2000):
+                self._apply(stats, {
+                    'time_minutes': time_minutes,
+                    'price': price,
+                    'tags': [],
+                    'ingredients': [],
+                }, 1)
+            for counts, through, related in (
+                (stats.tag_counts, Recipe.tags.through, 'tag'),
+                (
+                    stats.ingredient_counts,
+                    Recipe.ingredients.through,
+                    'ingredients',
+                ),
+            ):
+                links = through.objects.filter(
+                    recipe__user=user,
+                    **{f'{related}__deleted_at__isnull': True},
+                ).values_list(f'{related}_id', flat=True)
+                for obj_id in links.iterator(chunk_size=10000):
+                    _bump(counts, obj_id, 1)
+            stats.save(force_insert=True)
+        return stats
+
+
+class RecipeStats(models.Model):
+    """Per-user recipe summary kept up to date on every recipe write."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='recipe_stats',
+    )
+    recipe_count = models.IntegerField(default=0)
+    time_minutes_total = models.BigIntegerField(default=0)
+    time_minutes_counts = models.JSONField(default=dict)
+    price_counts = models.JSONField(default=dict)
+    tag_counts = models.JSONField(default=dict)
+    ingredient_counts = models.JSONField(default=dict)
+    # Bumped on every write so in-process recipe indexes can detect staleness.
+    version = models.BigIntegerField(default=0)
+
+    objects = RecipeStatsManager()
+
+    def __str__(self):
+        return f'Recipe stats for {self.user_id}'
+
+    def time_minutes_percentiles(self, *percentiles):
+        """Return time_minutes percentiles from the value counts."""
+        values = sorted(
+            (int(minutes), count)
+            for minutes, count in self.time_minutes_counts.items()
+        )
+        results = []
+        for percentile in percentiles:
+            rank = percentile / 100 * self.recipe_count
+            seen = 0
+            result = None
+            for minutes, count in values:
+                seen += count
+                if seen >= rank:
+                    result = minutes
+                    break
+            results.append(result)
+        return results
+
+
+def _adjust_usage(model, old_ids, new_ids):
+    """Move usage counters by the difference between two id sets."""
+    old_ids, new_ids = set(old_ids), set(new_ids)
+    added, removed = new_ids - old_ids, old_ids - new_ids
+    if added:
+        model.objects.filter(id__in=added).update(usage=F('usage') + 1)
+    if removed:
+        model.objects.filter(id__in=removed).update(usage=F('usage') - 1)
+
+
+def record_recipe_change(user, old=None, new=None):
+    """Update everything derived from a recipe's snapshot in one transaction.
+
+    The RecipeStats row lock is taken first, so concurrent writes for the
+    same user serialize there before touching their Tag/Ingredients rows.
+    Returns the user's new write version.
+    """
+    with transaction.atomic():
+        stats = RecipeStats.objects.record(user, old=old, new=new)
+        for model, key in ((Tag, 'tags'), (Ingredients, 'ingredients')):
+            _adjust_usage(
+                model,
+                old[key] if old else [],
+                new[key] if new else [],
+            )
+    return stats.version
+
+
+class IdempotencyKey(models.Model):
+    """Stored response of a write request sent with an Idempotency-Key."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'key'], name='unique_idempotency_key',
+            ),
+        ]
+
+    def __str__(self):
+        return self.key
+
+
+class JobManager(models.Manager):
+    """Manager for the background job queue."""
+
+    def enqueue(self, task, *args, run_at=None, max_attempts=5):
+        """Queue a registered task; runs when the enclosing commit lands.
+
+        A task already queued or running with the same args is not queued
+        again, and None is returned. The unique index settles races, so
+        this is a single INSERT ... ON CONFLICT DO NOTHING.
+        """
+        job = self.model(
+            task=task,
+            args=list(args),
+            run_at=run_at or timezone.now(),
+            max_attempts=max_attempts,
+        )
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        fields = [
+            field for field in self.model._meta.concrete_fields
+            if not field.primary_key
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {quote(self.model._meta.db_table)} '
+                f'({", ".join(quote(field.column) for field in fields)}) '
+                f'VALUES ({", ".join(["%s"] * len(fields))}) '
+                f'ON CONFLICT DO NOTHING RETURNING id',
+                [
+                    field.get_db_prep_save(field.pre_save(job, True), connection)
+                    for field in fields
+                ],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        job.id = row[0]
+        job._state.adding = False
+        job._state.db = self.db
+        return job
+
+    def claim(self, limit=1, stale_after=None):
+        """Lock up to `limit` due jobs and mark them running.
+
+        SKIP LOCKED lets any number of workers poll the same table without
+        waiting on each other. Jobs left running longer than `stale_after`
+        by a crashed worker are picked up again while attempts remain.
+        """
+        now = timezone.now()
+        due = Q(status=self.model.QUEUED, run_at__lte=now)
+        if stale_after is not None:
+            due |= Q(
+                status=self.model.RUNNING,
+                locked_at__lt=now - stale_after,
+                attempts__lt=F('max_attempts'),
+            )
+        with transaction.atomic():
+            jobs = list(
+                self.select_for_update(skip_locked=True)
+                .filter(due)
+                .order_by('run_at')[:limit]
+            )
+            if jobs:
+                self.filter(id__in=[job.id for job in jobs]).update(
+                    status=self.model.RUNNING,
+                    locked_at=now,
+                    attempts=F('attempts') + 1,
+                )
+        for job in jobs:
+            job.status = self.model.RUNNING
+            job.locked_at = now
+            job.attempts += 1
+        return jobs
+
+    def renew(self, job):
+        """Refresh a claimed job's lock; False if another worker took it."""
+        now = timezone.now()
+        renewed = self.filter(
+            id=job.id, status=self.model.RUNNING, locked_at=job.locked_at,
+        ).update(locked_at=now)
+        if renewed:
+            job.locked_at = now
+        return bool(renewed)
+
+    def fail_abandoned(self, stale_after):
+        """Fail stale running jobs that have no attempts left."""
+        now = timezone.now()
+        return self.filter(
+            status=self.model.RUNNING,
+            locked_at__lt=now - stale_after,
+            attempts__gte=F('max_attempts'),
+        ).update(
+            status=self.model.FAILED,
+            finished_at=now,
+            last_error='Abandoned by its worker on the last attempt.',
+        )
+
+
+class Job(models.Model):
+    """Background task queued for the `run_worker` command."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=255)
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=QUEUED,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True)
+
+    objects = JobManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['run_at'],
+                name='core_job_queued_run_at',
+                condition=Q(status='queued'),
+            ),
+            models.Index(
+                fields=['locked_at'],
+                name='core_job_running_locked_at',
+                condition=Q(status='running'),
+            ),
+            models.Index(
+                fields=['finished_at'],
+                name='core_job_finished_at',
+                condition=Q(status__in=['done', 'failed']),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['task', 'args'],
+                name='core_job_pending_unique',
+                condition=Q(status__in=['queued', 'running']),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.task} ({self.status})'
+
+
+class TombstoneManager(models.Manager):
+    """Manager for deletion records."""
+
+    def record(self, user, kind, ids):
+        """Record that objects of a kind were deleted for a user."""
+        self.bulk_create(
+            [self.model(user=user, kind=kind, object_id=obj_id) for obj_id in ids]
+        )
+
+
+class Tombstone(models.Model):
+    """Deleted recipe, tag or ingredient, kept for delta sync."""
+    RECIPE = 'recipe'
+    TAG = 'tag'
+    INGREDIENT = 'ingredient'
+    KIND_CHOICES = [
+        (RECIPE, 'Recipe'),
+        (TAG, 'Tag'),
+        (INGREDIENT, 'Ingredient'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TombstoneManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
+
+
+class Purge(models.Model):
+    """Deferred, batched delete of a user, tag or ingredient."""
+    model = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    deleted_rows = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f'{self.model} {self.object_id}'
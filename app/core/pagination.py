@@ -0,0 +1,140 @@
+"""
+Pagination that avoids COUNT(*) scans on large tables.
+"""
+import functools
+import json
+from collections import OrderedDict
+
+from django.core.paginator import (
+    EmptyPage,
+    Page,
+    PageNotAnInteger,
+    Paginator,
+)
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def estimate_count(queryset):
+    """Return the planner's row estimate for a queryset.
+
+    EXPLAIN only plans the query, so the cost is independent of table size.
+    """
+    sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedPage(Page):
+    """Page that knows whether another page follows without a count."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator counting exactly only when the estimate is small.
+
+    A `known_count` kept elsewhere (e.g. a maintained counter) replaces
+    the EXPLAIN estimate and is treated like one, since it can drift from
+    the rows. With an estimated count, page bounds come from fetching one
+    extra row rather than from the count, so no page is cut off by a low
+    guess.
+    """
+    exact_count_threshold = EXACT_COUNT_THRESHOLD
+
+    def __init__(self, *args, known_count=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.known_count = known_count
+        self.count_estimated = False
+
+    @cached_property
+    def count(self):
+        if self.known_count is not None:
+            estimate = self.known_count
+        elif hasattr(self.object_list, 'query'):
+            estimate = estimate_count(self.object_list)
+        else:
+            return super().count
+        if estimate < self.exact_count_threshold:
+            return super().count
+        self.count_estimated = True
+        return estimate
+
+    def validate_number(self, number):
+        self.count  # Sets count_estimated.
+        if not self.count_estimated:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.count_estimated:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+        return EstimatedPage(
+            rows[:self.per_page], number, self, len(rows) > self.per_page,
+        )
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """Page number pagination that flags estimated counts.
+
+    Lists are paginated only when `page` or `page_size` is passed, so the
+    plain list stays a JSON array for existing clients. Views may define
+    get_list_count() to supply a maintained count of the list.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if (
+            self.page_query_param not in params
+            and self.page_size_query_param not in params
+        ):
+            return None
+        get_list_count = getattr(view, 'get_list_count', None)
+        self.django_paginator_class = functools.partial(
+            EstimatedCountPaginator,
+            known_count=get_list_count() if get_list_count else None,
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_estimated', self.page.paginator.count_estimated),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_estimated'] = {
+            'type': 'boolean',
+        }
+        return response_schema
@@ -0,0 +1,102 @@
+"""
+Per-view limits on the number of database queries a request may run.
+
+Views declare budgets by action (or lower-case method for plain API
+views):
+
+    class RecipeViewSet(viewsets.ModelViewSet):
+        query_budgets = {'list': 3, 'retrieve': 3}
+
+A view taking a known costlier path (say, building a missing row) can
+call allow_queries(request, n) to extend its budget for that request.
+
+QueryBudgetMiddleware counts the queries run from the view onwards. With
+QUERY_BUDGET_MODE = 'raise' the query that goes over budget raises
+QueryBudgetExceeded; with 'log' it is logged with its stack and the request
+carries on. `manage.py report_query_budgets` lists the actual counts.
+"""
+import logging
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def view_action(view_func, method):
+    """Return the view class and action handling `method`, if any."""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return None, None
+    actions = getattr(view_func, 'actions', None)
+    if actions is not None:
+        return view_class, actions.get(method.lower())
+    return view_class, method.lower()
+
+
+def get_budget(view_class, action):
+    """Return the query budget declared for an action, or None."""
+    return getattr(view_class, 'query_budgets', {}).get(action)
+
+
+class QueryCounter:
+    """Execute wrapper counting queries against an optional budget."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.count = 0
+        self.budget = None
+        self.label = None
+
+    def start(self, label, budget):
+        self.count = 0
+        self.label = label
+        self.budget = budget
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        if self.budget is not None and self.count == self.budget + 1:
+            message = (
+                f'{self.label} ran more than its budget of '
+                f'{self.budget} queries; query {self.count}: {sql}'
+            )
+            if self.mode == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message, stack_info=True)
+        return execute(sql, params, many, context)
+
+
+def allow_queries(request, count):
+    """Let the current view run `count` more queries on a costlier path."""
+    counter = getattr(request, 'query_counter', None)
+    if counter is not None and counter.budget is not None:
+        counter.budget += count
+
+
+class QueryBudgetMiddleware:
+    """Enforce the query budgets declared on API views."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = settings.QUERY_BUDGET_MODE
+        if mode == 'off':
+            return self.get_response(request)
+        request.query_counter = QueryCounter(mode)
+        with connection.execute_wrapper(request.query_counter):
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        counter = getattr(request, 'query_counter', None)
+        if counter is None:
+            return None
+        view_class, action = view_action(view_func, request.method)
+        budget = get_budget(view_class, action)
+        if budget is not None:
+            counter.start(f'{view_class.__name__}.{action}', budget)
+        return None
@@ -0,0 +1,81 @@
+"""
+Cached OpenAPI schema serving.
+"""
+import hashlib
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+from core.compression import cache_compressed
+
+SCHEMA_FILES = {
+    'yaml': 'schema.yml',
+    'json': 'schema.json',
+}
+
+_schema_cache = {}
+
+
+def schema_file_path(format):
+    """Return the path of the pre-generated schema for a format."""
+    return os.path.join(settings.SCHEMA_ROOT, SCHEMA_FILES[format])
+
+
+def generate_schema():
+    """Introspect the API and return the public schema."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=True)
+
+
+def clear_schema_cache():
+    """Drop the in-process schema copies."""
+    _schema_cache.clear()
+
+
+def get_schema_body(renderer):
+    """Return (body, etag) for a renderer, building it at most once."""
+    cached = _schema_cache.get(renderer.format)
+    if cached is not None:
+        return cached
+
+    path = schema_file_path(renderer.format)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            body = f.read()
+    else:
+        body = renderer.render(generate_schema(), renderer_context={})
+
+    etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+    _schema_cache[renderer.format] = (body, etag)
+    return body, etag
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """Serve the schema from disk or a per-process copy with ETags."""
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        """Return the cached schema for the negotiated format."""
+        if request.GET.get('lang'):
+            return super().get(request, *args, **kwargs)
+
+        renderer = request.accepted_renderer
+        body, etag = get_schema_body(renderer)
+
+        if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+            response = HttpResponseNotModified()
+        else:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type += f'; charset={renderer.charset}'
+            response = cache_compressed(
+                HttpResponse(body, content_type=content_type)
+            )
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age=0, must-revalidate'
+        return response
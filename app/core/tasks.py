@@ -0,0 +1,49 @@
+"""
+Background tasks for the core app.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from core import deletion
+from core.jobs import task
+from core.models import Purge, RecipeStats
+
+
+@task
+def reconcile_usage_counts():
+    """Recount Tag and Ingredients usage."""
+    call_command('reconcile_usage_counts')
+
+
+@task
+def rebuild_recipe_stats(user_id):
+    """Rebuild one user's RecipeStats."""
+    user = get_user_model().objects.filter(id=user_id).first()
+    if user is not None:
+        RecipeStats.objects.rebuild(user)
+
+
+@task
+def prune_idempotency_keys():
+    """Delete expired Idempotency-Key responses."""
+    call_command('prune_idempotency_keys')
+
+
+@task
+def prune_tombstones():
+    """Delete sync tombstones past their retention."""
+    call_command('prune_tombstones')
+
+
+@task
+def prune_jobs():
+    """Delete finished jobs past their retention."""
+    call_command('prune_jobs')
+
+
+@task
+def purge(purge_id):
+    """Run a deferred delete in batches."""
+    purge = Purge.objects.filter(id=purge_id, finished_at__isnull=True).first()
+    if purge is not None:
+        deletion.run_purge(purge)
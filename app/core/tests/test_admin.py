@@ -1,9 +1,14 @@
 """ Test for the django admin modifications"""
+from decimal import Decimal
+from unittest.mock import patch
 
 from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
+from core import models
+from core.pagination import EstimatedCountPaginator
+
 
 class AdminSiteTests(TestCase):
     """ Tests for Django Admin"""
@@ -42,4 +47,54 @@ class AdminSiteTests(TestCase):
         url = reverse("admin:core_user_add")
         res = self.client.get(url)
 
-        self.assertEquals(res.status_code, 200)
\ No newline at end of file
+        self.assertEquals(res.status_code, 200)
+
+    def test_recipe_changelist_search(self):
+        """Test the recipe changelist loads and searches titles."""
+        for title in ('Pumpkin Soup', 'Apple Pie'):
+            models.Recipe.objects.create(
+                user=self.user, title=title, time_minutes=5,
+                price=Decimal('1.00'),
+            )
+        url = reverse("admin:core_recipe_changelist")
+
+        res = self.client.get(url, {'q': 'Soup'})
+
+        self.assertContains(res, 'Pumpkin Soup')
+        self.assertNotContains(res, 'Apple Pie')
+
+    def test_tag_and_ingredient_changelists(self):
+        """Test the tag and ingredient changelists load."""
+        models.Tag.objects.create(user=self.user, name='Vegan')
+        models.Ingredients.objects.create(user=self.user, name='Kale')
+
+        res = self.client.get(reverse("admin:core_tag_changelist"))
+        self.assertContains(res, 'Vegan')
+        res = self.client.get(reverse("admin:core_ingredients_changelist"))
+        self.assertContains(res, 'Kale')
+
+    def test_recipe_change_page_uses_raw_ids(self):
+        """Test the change page does not render a user dropdown."""
+        recipe = models.Recipe.objects.create(
+            user=self.user, title='Stew', time_minutes=5,
+            price=Decimal('1.00'),
+        )
+
+        res = self.client.get(
+            reverse("admin:core_recipe_change", args=[recipe.id]),
+        )
+
+        self.assertContains(res, 'vForeignKeyRawIdAdminField')
+        self.assertNotContains(res, self.user.email + '</option>')
+
+    def test_paginator_uses_estimate_for_large_tables(self):
+        """Test the paginator skips COUNT(*) above the threshold."""
+        queryset = get_user_model().objects.order_by('id')
+        paginator = EstimatedCountPaginator(queryset, 100)
+        paginator.exact_count_threshold = 0
+
+        with patch('core.pagination.estimate_count', return_value=12345):
+            with self.assertNumQueries(0):
+                self.assertEqual(paginator.count, 12345)
+
+        self.assertEqual(EstimatedCountPaginator(queryset, 100).count, 2)
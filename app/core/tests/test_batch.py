@@ -0,0 +1,105 @@
+"""
+Tests for the batch API.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+BATCH_URL = reverse('batch')
+
+
+class BatchApiTests(TestCase):
+    """Test running sub-requests in one call."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'batch@example.com', 'testpass123', name='Batch',
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def batch(self, *requests):
+        return self.client.post(
+            BATCH_URL, {'requests': list(requests)}, format='json',
+        )
+
+    def test_auth_required(self):
+        """Test anonymous batches are rejected."""
+        res = APIClient().post(
+            BATCH_URL, {'requests': [{'path': '/api/user/me/'}]},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_home_screen_batch_authenticates_once(self):
+        """Test the home screen calls run with a single authentication."""
+        paths = [
+            '/api/user/me/',
+            '/api/recipe/recipes/',
+            '/api/recipe/tags/',
+            '/api/recipe/ingredients/',
+            '/api/recipe/stats/',
+        ]
+        with patch.object(
+            TokenAuthentication, 'authenticate_credentials',
+            wraps=TokenAuthentication().authenticate_credentials,
+        ) as authenticate:
+            res = self.batch(*[{'path': path} for path in paths])
+
+        self.assertEqual(authenticate.call_count, 1)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        responses = res.data['responses']
+        self.assertEqual([r['status'] for r in responses], [200] * 5)
+        self.assertEqual(responses[0]['body']['email'], self.user.email)
+        self.assertEqual(responses[1]['body'], [])
+        self.assertEqual(responses[4]['body']['recipe_count'], 0)
+
+    def test_writes_visible_to_later_requests(self):
+        """Test sub-requests run in order with bodies and query strings."""
+        res = self.batch(
+            {
+                'method': 'POST',
+                'path': '/api/recipe/recipes/',
+                'body': {'title': 'Soup', 'time_minutes': 5, 'price': '2.00'},
+                'headers': {'Idempotency-Key': 'soup-1'},
+            },
+            {'path': '/api/recipe/recipes/?page=1'},
+        )
+
+        created, listed = res.data['responses']
+        self.assertEqual(created['status'], status.HTTP_201_CREATED)
+        self.assertEqual(listed['body']['count'], 1)
+        self.assertEqual(listed['body']['results'][0]['title'], 'Soup')
+
+    def test_errors_reported_per_request(self):
+        """Test failing sub-requests do not fail the batch."""
+        res = self.batch(
+            {'path': '/api/recipe/nowhere/'},
+            {'method': 'POST', 'path': '/api/recipe/recipes/', 'body': {}},
+        )
+
+        missing, invalid = res.data['responses']
+        self.assertEqual(missing['status'], status.HTTP_404_NOT_FOUND)
+        self.assertEqual(invalid['status'], status.HTTP_400_BAD_REQUEST)
+        self.assertIn('price', invalid['body'])
+
+    def test_only_api_routes_allowed(self):
+        """Test routes outside the user and recipe APIs are refused."""
+        res = self.batch({'path': '/admin/'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_size_limited(self):
+        """Test oversized batches are refused."""
+        res = self.batch(*[{'path': '/api/user/me/'}] * 21)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
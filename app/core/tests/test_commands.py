@@ -10,6 +10,12 @@ from django.core.management import call_command
 from django.db.utils import OperationalError
 from django.test import SimpleTestCase
 
+from core.management.commands.profile_startup import (
+    Command as ProfileStartupCommand,
+    package_costs,
+    parse_importtime,
+)
+
 
 @patch('core.management.commands.wait_for_db.Command.check')
 class CommandTests(SimpleTestCase):
@@ -31,4 +37,41 @@ class CommandTests(SimpleTestCase):
         call_command("wait_for_db")
 
         self.assertEqual(patched_check.call_count, 6)
-        patched_check.assert_called_with(databases=['default'])
\ No newline at end of file
+        patched_check.assert_called_with(databases=['default'])
+
+
+IMPORTTIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     django.utils
+import time:       300 |        420 |   django.conf
+import time:        80 |        500 | django
+import time:        50 |         50 | rest_framework
+"""
+
+
+class ProfileStartupTests(SimpleTestCase):
+    """Test parsing -X importtime output"""
+
+    def test_parse_importtime(self):
+        """Test rows are parsed with their nesting depth."""
+        rows = parse_importtime(IMPORTTIME_OUTPUT)
+
+        self.assertEqual(rows[0], ('django.utils', 120, 120, 2))
+        self.assertEqual(rows[2], ('django', 80, 500, 0))
+        self.assertEqual(len(rows), 4)
+
+    def test_package_costs(self):
+        """Test self time is summed per top-level package."""
+        costs = package_costs(parse_importtime(IMPORTTIME_OUTPUT))
+
+        self.assertEqual(costs['django'], 500)
+        self.assertEqual(costs['rest_framework'], 50)
+
+    def test_api_worker_skips_optional_stacks(self):
+        """Test NumPy, SciPy and the schema stack are not imported."""
+        wall, rows = ProfileStartupCommand().run_startup(api_only=True)
+        packages = package_costs(rows)
+
+        self.assertIn('rest_framework', packages)
+        self.assertNotIn('numpy', packages)
+        self.assertNotIn('scipy', packages)
+        self.assertNotIn('drf_spectacular', packages)
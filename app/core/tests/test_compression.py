@@ -0,0 +1,110 @@
+"""
+Tests for negotiated response compression.
+"""
+import gzip
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import compression
+
+BODY = b'{"title": "Pancakes", "tags": []}' * 100
+
+
+def respond(body=BODY, cached=False):
+    response = HttpResponse(body, content_type='application/json')
+    if cached:
+        compression.cache_compressed(response)
+    return response
+
+
+class CompressionTests(SimpleTestCase):
+    """Test Accept-Encoding negotiation and the middleware."""
+
+    def setUp(self):
+        caches['compressed'].clear()
+        self.factory = RequestFactory()
+
+    def process(self, accept, response):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept)
+        middleware = compression.CompressionMiddleware(lambda r: response)
+        return middleware(request)
+
+    def test_parse_accept_encoding(self):
+        """Test q-values are read, defaulting to 1."""
+        self.assertEqual(
+            compression.parse_accept_encoding('gzip, br;q=0.5, zstd;q=0'),
+            {'gzip': 1.0, 'br': 0.5, 'zstd': 0.0},
+        )
+
+    def test_negotiate_honours_q_values(self):
+        """Test the client's weights win over server preference."""
+        self.assertEqual(compression.negotiate('gzip, br;q=0.5'), 'gzip')
+        self.assertEqual(compression.negotiate('gzip;q=0, *;q=0'), None)
+        self.assertIsNone(compression.negotiate('identity'))
+
+    def test_gzip_response(self):
+        """Test a large response is gzipped with Vary and weak ETag."""
+        response = respond()
+        response['ETag'] = '"abc"'
+
+        response = self.process('gzip', response)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['ETag'], 'W/"abc"')
+
+    def test_small_response_untouched(self):
+        """Test responses under the threshold are sent as is."""
+        response = self.process('gzip', respond(b'{}'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @override_settings(COMPRESSION_MIN_SIZE=10)
+    def test_threshold_configurable(self):
+        """Test the size threshold comes from settings."""
+        response = self.process('gzip', respond(b'a' * 50))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_cached_response_compressed_once(self):
+        """Test cached responses reuse their compressed bodies."""
+        calls = []
+        codec = compression.CODECS['gzip']
+
+        def counting(body, level):
+            calls.append(level)
+            return codec(body, level)
+
+        with patch.dict(compression.CODECS, gzip=counting):
+            first = self.process('gzip', respond(cached=True))
+            second = self.process('gzip', respond(cached=True))
+            self.process('gzip', respond())
+
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(len(calls), 2)
+
+    @skipUnless(compression.brotli, 'brotli is not installed')
+    def test_brotli_response(self):
+        """Test brotli is used when preferred by the client."""
+        response = self.process('gzip;q=0.8, br', respond())
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(response.content), BODY)
+
+    @skipUnless(compression.zstandard, 'zstandard is not installed')
+    def test_zstd_preferred_on_ties(self):
+        """Test zstd wins when the client weighs codings equally."""
+        response = self.process('gzip, br, zstd', respond())
+
+        self.assertEqual(response['Content-Encoding'], 'zstd')
+        self.assertEqual(
+            compression.zstandard.ZstdDecompressor().decompress(
+                response.content,
+            ),
+            BODY,
+        )
@@ -0,0 +1,104 @@
+"""
+Tests for deferred, batched deletes.
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import deletion, jobs
+from core.models import Job, Purge, Recipe, RecipeStats, Tag
+
+
+def create_recipes(user, count, tag):
+    """Create recipes all linked to one tag."""
+    for i in range(count):
+        recipe = Recipe.objects.create(
+            user=user, title=f'Recipe {i}', time_minutes=5,
+            price=Decimal('1.00'),
+        )
+        recipe.tags.add(tag)
+
+
+class DeferredDeleteTests(TestCase):
+    """Test hiding rows and purging them in batches."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'purge@example.com', 'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Popular')
+        create_recipes(self.user, 5, self.tag)
+
+    @override_settings(DEFERRED_DELETES=True)
+    def test_tag_hidden_then_purged(self):
+        """Test a deleted tag disappears at once and is purged by a job."""
+        res = self.client.delete(
+            reverse('recipe:tag-detail', args=[self.tag.id]),
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Tag.objects.filter(id=self.tag.id).exists())
+        self.assertEqual(self.client.get(reverse('recipe:tag-list')).data, [])
+        recipe = Recipe.objects.first()
+        res = self.client.get(reverse('recipe:recipe-detail', args=[recipe.id]))
+        self.assertEqual(res.data['tags'], [])
+        self.assertEqual(Recipe.tags.through.objects.count(), 5)
+
+        jobs.discover()
+        jobs.run_job(Job.objects.claim()[0])
+
+        purge = Purge.objects.get()
+        self.assertEqual(Recipe.tags.through.objects.count(), 0)
+        self.assertFalse(Tag.all_objects.filter(id=self.tag.id).exists())
+        self.assertEqual(purge.deleted_rows, 6)
+        self.assertIsNotNone(purge.finished_at)
+
+    def test_tag_deleted_immediately_by_default(self):
+        """Test deletes stay synchronous unless deferred mode is on."""
+        self.client.delete(reverse('recipe:tag-detail', args=[self.tag.id]))
+
+        self.assertFalse(Tag.all_objects.filter(id=self.tag.id).exists())
+        self.assertFalse(Purge.objects.exists())
+
+    def test_user_purged_in_batches(self):
+        """Test a user's rows are removed batch by batch."""
+        Token.objects.create(user=self.user)
+        RecipeStats.objects.rebuild(self.user)
+        other = get_user_model().objects.create_user('keep@example.com', 'x')
+        create_recipes(other, 1, Tag.objects.create(user=other, name='Keep'))
+
+        purge = deletion.defer_delete(self.user)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+        batches = list(deletion.PURGES[purge.model](purge.object_id, 2))
+
+        self.assertEqual(batches, [2, 2, 1, 2, 2, 1, 1, 3])
+        self.assertFalse(
+            get_user_model().objects.filter(id=self.user.id).exists()
+        )
+        self.assertEqual(Recipe.objects.count(), 1)
+        self.assertEqual(Recipe.tags.through.objects.count(), 1)
+
+    def test_purge_deleted_command(self):
+        """Test the command reports progress and runs pending purges."""
+        deletion.defer_delete(self.tag)
+        out = StringIO()
+
+        call_command('purge_deleted', stdout=out)
+        self.assertIn('core.tag', out.getvalue())
+        self.assertIn('0 rows deleted so far', out.getvalue())
+
+        call_command('purge_deleted', run=True, batch_size=2, stdout=out)
+        self.assertIn('done, 6 rows deleted', out.getvalue())
+        self.assertEqual(Recipe.tags.through.objects.count(), 0)
@@ -0,0 +1,158 @@
+"""
+Tests for the background job queue.
+"""
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+
+calls = []
+
+
+@jobs.task(name='test.record')
+def record(value):
+    calls.append(value)
+
+
+@jobs.task(name='test.explode')
+def explode():
+    raise RuntimeError('boom')
+
+
+class JobQueueTests(TestCase):
+    """Test claiming and running jobs."""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_run(self):
+        """Test a claimed job runs and is marked done."""
+        record.enqueue(7)
+
+        job, = Job.objects.claim()
+        self.assertTrue(jobs.run_job(job))
+
+        job.refresh_from_db()
+        self.assertEqual(calls, [7])
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+
+    def test_pending_duplicate_not_queued(self):
+        """Test a task pending with the same args is queued only once."""
+        job = record.enqueue(1)
+
+        self.assertIsNone(record.enqueue(1))
+        self.assertIsNotNone(record.enqueue(2))
+        jobs.run_job(Job.objects.claim()[0])
+        self.assertIsNotNone(record.enqueue(1))
+        self.assertEqual(Job.objects.filter(args=[1]).count(), 2)
+        self.assertEqual(Job.objects.get(id=job.id).status, Job.DONE)
+
+    def test_claimed_jobs_not_reclaimed(self):
+        """Test running and future jobs are skipped by claim."""
+        record.enqueue(1)
+        record.enqueue(2, run_at=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(len(Job.objects.claim(10)), 1)
+        self.assertEqual(Job.objects.claim(10), [])
+
+    def test_stale_running_job_reclaimed(self):
+        """Test jobs abandoned by a crashed worker are claimed again."""
+        record.enqueue(1)
+        Job.objects.claim()
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+
+        job, = Job.objects.claim(stale_after=timedelta(minutes=10))
+
+        self.assertEqual(job.attempts, 2)
+
+    def test_stale_job_without_attempts_left_not_reclaimed(self):
+        """Test an abandoned last attempt is failed instead of rerun."""
+        record.enqueue(1, max_attempts=1)
+        Job.objects.claim()
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(
+            Job.objects.claim(stale_after=timedelta(minutes=10)), [],
+        )
+
+        call_command('prune_jobs', stdout=StringIO())
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('Abandoned', job.last_error)
+
+    def test_renew_after_reclaim(self):
+        """Test a job reclaimed by another worker cannot be renewed."""
+        record.enqueue(1)
+        job, = Job.objects.claim()
+        self.assertTrue(Job.objects.renew(job))
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        Job.objects.claim(stale_after=timedelta(minutes=10))
+
+        self.assertFalse(Job.objects.renew(job))
+
+    def test_prune_jobs(self):
+        """Test finished jobs past the retention are deleted."""
+        record.enqueue(1)
+        record.enqueue(2)
+        record.enqueue(3)
+        for job in Job.objects.claim(2):
+            jobs.run_job(job)
+        Job.objects.filter(args=[1]).update(
+            finished_at=timezone.now() - timedelta(days=30),
+        )
+
+        call_command('prune_jobs', stdout=StringIO())
+
+        self.assertEqual(
+            sorted(job.args for job in Job.objects.all()), [[2], [3]],
+        )
+
+    def test_failure_retried_with_backoff(self):
+        """Test a failing job is requeued later until attempts run out."""
+        explode.enqueue(max_attempts=2)
+
+        job, = Job.objects.claim()
+        self.assertFalse(jobs.run_job(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('boom', job.last_error)
+
+        Job.objects.update(run_at=timezone.now())
+        job, = Job.objects.claim()
+        jobs.run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    def test_backoff_grows(self):
+        """Test retry delays grow exponentially up to the cap."""
+        with patch('core.jobs.random.uniform', return_value=1):
+            self.assertEqual(jobs.backoff(1), timedelta(seconds=10))
+            self.assertEqual(jobs.backoff(3), timedelta(seconds=40))
+            self.assertEqual(
+                jobs.backoff(20), timedelta(seconds=jobs.BACKOFF_MAX),
+            )
+
+
+class RunWorkerCommandTests(TransactionTestCase):
+    """Test the run_worker command."""
+
+    def test_worker_drains_queue(self):
+        """Test concurrent workers run every job exactly once."""
+        calls.clear()
+        for value in range(20):
+            record.enqueue(value)
+        out = StringIO()
+
+        call_command('run_worker', concurrency=3, once=True, stdout=out)
+
+        self.assertEqual(sorted(calls), list(range(20)))
+        self.assertFalse(Job.objects.exclude(status=Job.DONE).exists())
+        self.assertIn('20 done, 0 failed', out.getvalue())
@@ -4,6 +4,7 @@ Tests for Models
 from unittest.mock import patch
 from decimal import Decimal
 
+from django.core.management import call_command
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -102,4 +103,66 @@ class ModelTest(TestCase):
         file_path = models.recipe_image_file_path(None, 'example.jpg')
 
         self.assertEqual(file_path, f'uploads/recipe/{uuid}.jpg')
-        
\ No newline at end of file
+
+    def test_ingredients_share_catalog_entry(self):
+        """Test ingredients with the same name share one catalog row."""
+        user1 = create_user()
+        user2 = create_user(email='user2@example.com')
+        salt1 = models.Ingredients.objects.create(user=user1, name='Salt')
+        salt2 = models.Ingredients.objects.create(user=user2, name=' salt ')
+
+        self.assertEqual(salt1.catalog_id, salt2.catalog_id)
+        self.assertEqual(models.IngredientCatalog.objects.count(), 1)
+        self.assertEqual(salt1.name, 'Salt')
+        self.assertEqual(salt2.name, 'salt')
+
+        salt2.name = 'Sea Salt'
+        salt2.save()
+        salt2 = models.Ingredients.objects.get(id=salt2.id)
+
+        self.assertEqual(salt2.name, 'Sea Salt')
+        self.assertNotEqual(salt1.catalog_id, salt2.catalog_id)
+
+    def test_ingredients_for_names(self):
+        """Test names resolve to existing rows in a fixed query count."""
+        user = create_user()
+        salt = models.Ingredients.objects.create(user=user, name='Salt')
+
+        with self.assertNumQueries(4):
+            ingredients, created = models.Ingredients.objects.for_names(
+                user, ['SALT', 'Pepper', 'Cumin', 'pepper'],
+            )
+
+        self.assertEqual(ingredients[0], salt)
+        self.assertEqual(
+            [ingredient.name for ingredient in ingredients],
+            ['Salt', 'Pepper', 'Cumin'],
+        )
+        self.assertEqual(len(created), 2)
+
+    def test_dedupe_ingredients_command(self):
+        """Test a user's rows sharing a catalog entry are merged."""
+        user = create_user()
+        other = create_user(email='user2@example.com')
+        keep = models.Ingredients.objects.create(user=user, name='Salt')
+        duplicate = models.Ingredients.objects.create(user=user, name='salt')
+        models.Ingredients.objects.create(user=other, name='Salt')
+        recipe = models.Recipe.objects.create(
+            user=user, title='Soup', time_minutes=5, price=Decimal('1'),
+        )
+        recipe.ingredients.add(duplicate)
+
+        call_command('dedupe_ingredients', batch_size=1)
+
+        self.assertFalse(
+            models.Ingredients.objects.filter(id=duplicate.id).exists()
+        )
+        self.assertEqual(list(recipe.ingredients.all()), [keep])
+        keep.refresh_from_db()
+        self.assertEqual(keep.usage, 1)
+        self.assertTrue(models.Tombstone.objects.filter(
+            user=user, object_id=duplicate.id,
+        ).exists())
+        self.assertEqual(models.Ingredients.objects.count(), 2)
+        stats = models.RecipeStats.objects.get(user=user)
+        self.assertEqual(stats.ingredient_counts, {str(keep.id): 1})
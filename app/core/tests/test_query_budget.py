@@ -0,0 +1,109 @@
+"""
+Tests for per-view query budgets.
+"""
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, RecipeStats
+from core.query_budget import QueryBudgetExceeded
+from recipe.views import RecipeViewSet
+
+
+class QueryBudgetMiddlewareTests(TestCase):
+    """Test budgets declared on views are enforced."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'budget@example.com', 'testpass123',
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price=Decimal('1'),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('recipe:recipe-detail', args=[self.recipe.id])
+
+    @override_settings(QUERY_BUDGET_MODE='raise')
+    def test_over_budget_raises(self):
+        """Test the query going over budget raises in strict mode."""
+        with mock.patch.object(RecipeViewSet, 'query_budgets', {'retrieve': 1}):
+            with self.assertRaisesMessage(
+                QueryBudgetExceeded, 'RecipeViewSet.retrieve',
+            ):
+                self.client.get(self.url)
+
+    @override_settings(QUERY_BUDGET_MODE='log')
+    def test_over_budget_logged_with_stack(self):
+        """Test production mode logs the overrun and serves the request."""
+        with mock.patch.object(RecipeViewSet, 'query_budgets', {'retrieve': 1}):
+            with self.assertLogs('core.query_budget', 'WARNING') as logs:
+                res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('budget of 1 queries', logs.output[0])
+        self.assertIsNotNone(logs.records[0].stack_info)
+
+    @override_settings(QUERY_BUDGET_MODE='raise')
+    def test_within_budget(self):
+        """Test requests within budget are untouched."""
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(QUERY_BUDGET_MODE='raise')
+    def test_stats_rebuild_allowed(self):
+        """Test building missing stats stays within its allowance."""
+        for title in ('Stew', 'Curry'):
+            recipe = Recipe.objects.create(
+                user=self.user, title=title, time_minutes=5,
+                price=Decimal('1'),
+            )
+            recipe.tags.create(user=self.user, name=title)
+        RecipeStats.objects.filter(user=self.user).delete()
+
+        res = self.client.get(reverse('recipe:stats'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipe_count'], 3)
+
+    @override_settings(QUERY_BUDGET_MODE='off')
+    def test_disabled(self):
+        """Test budgets are ignored when switched off."""
+        with mock.patch.object(RecipeViewSet, 'query_budgets', {'retrieve': 1}):
+            res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class ReportQueryBudgetsTests(TestCase):
+    """Test the query budget report command."""
+
+    def test_report_lists_routes(self):
+        """Test every route is measured against its budget."""
+        out = StringIO()
+
+        call_command('report_query_budgets', '--check', recipes=5, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('/api/recipe/recipes/', output)
+        self.assertIn('shopping_list', output)
+        self.assertNotIn('OVER', output)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_check_fails_over_budget(self):
+        """Test --check fails when a route goes over budget."""
+        with mock.patch.object(RecipeViewSet, 'query_budgets', {'list': 1}):
+            with self.assertRaisesMessage(CommandError, 'Over budget'):
+                call_command(
+                    'report_query_budgets', '--check', recipes=5,
+                    stdout=StringIO(),
+                )
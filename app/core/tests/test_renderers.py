@@ -0,0 +1,96 @@
+"""
+Tests for the orjson and MessagePack renderers and parsers.
+"""
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+import msgpack
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APIClient
+
+from core.parsers import ORJSONParser
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class RendererTests(SimpleTestCase):
+    """Test rendering and parsing."""
+
+    def test_decimal_rendered_exactly(self):
+        """Test Decimals are written as exact strings."""
+        data = {'price': Decimal('0.10000000000000000001')}
+
+        self.assertEqual(
+            ORJSONRenderer().render(data),
+            b'{"price":"0.10000000000000000001"}',
+        )
+        self.assertEqual(
+            msgpack.unpackb(MessagePackRenderer().render(data)),
+            {'price': '0.10000000000000000001'},
+        )
+
+    def test_indent_from_accept_header(self):
+        """Test indent in the media type pretty prints."""
+        body = ORJSONRenderer().render(
+            {'a': 1}, 'application/json; indent=4',
+        )
+
+        self.assertEqual(body, b'{\n  "a": 1\n}')
+
+    def test_line_separators_escaped(self):
+        """Test output stays a strict JavaScript subset."""
+        body = ORJSONRenderer().render({'a': '\u2028'})
+
+        self.assertEqual(body, b'{"a":"\\u2028"}')
+
+    def test_invalid_json_raises_parse_error(self):
+        """Test malformed bodies raise ParseError."""
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"a":'))
+
+    def test_benchmark_command(self):
+        """Test the renderer benchmark reports each renderer."""
+        out = StringIO()
+
+        call_command('benchmark_renderers', recipes=10, runs=1, stdout=out)
+
+        self.assertIn('ORJSONRenderer', out.getvalue())
+
+
+class MessagePackApiTests(TestCase):
+    """Test MessagePack is negotiated by the API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            'pack@example.com', 'testpass123',
+        ))
+
+    def test_create_and_list_with_msgpack(self):
+        """Test MessagePack request and response bodies."""
+        body = msgpack.packb({
+            'title': 'Dumplings', 'time_minutes': 40, 'price': '7.25',
+        })
+
+        res = self.client.post(
+            RECIPES_URL, body, content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(res.content)['price'], '7.25')
+
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(
+            [recipe['title'] for recipe in msgpack.unpackb(res.content)],
+            ['Dumplings'],
+        )
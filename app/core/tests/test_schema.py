@@ -0,0 +1,78 @@
+"""
+Tests for the cached OpenAPI schema.
+"""
+import os
+import tempfile
+
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import schema
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class SchemaViewTests(SimpleTestCase):
+    """Test serving the cached schema."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(SCHEMA_ROOT=self.tmp.name)
+        self.settings_override.enable()
+        schema.clear_schema_cache()
+
+    def tearDown(self):
+        schema.clear_schema_cache()
+        self.settings_override.disable()
+        self.tmp.cleanup()
+
+    def test_schema_generated_once(self):
+        """Test the schema is only introspected once per process."""
+        with patch(
+            'core.schema.generate_schema',
+            wraps=schema.generate_schema,
+        ) as patched_generate:
+            res1 = self.client.get(SCHEMA_URL)
+            res2 = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res1.status_code, status.HTTP_200_OK)
+        self.assertEqual(res1.content, res2.content)
+        self.assertEqual(patched_generate.call_count, 1)
+        self.assertIn('ETag', res1)
+
+    def test_schema_not_modified(self):
+        """Test a matching If-None-Match returns 304."""
+        etag = self.client.get(SCHEMA_URL)['ETag']
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_schema_json_negotiation(self):
+        """Test the JSON schema is served when requested."""
+        res = self.client.get(SCHEMA_URL, HTTP_ACCEPT='application/json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('application/json'))
+        self.assertIn('openapi', res.json())
+
+    def test_build_schema_served_from_disk(self):
+        """Test the view serves the artifact written by build_schema."""
+        call_command('build_schema')
+
+        self.assertTrue(os.path.exists(schema.schema_file_path('yaml')))
+        self.assertTrue(os.path.exists(schema.schema_file_path('json')))
+        with patch('core.schema.generate_schema') as patched_generate:
+            res = self.client.get(SCHEMA_URL)
+
+        patched_generate.assert_not_called()
+        with open(schema.schema_file_path('yaml'), 'rb') as f:
+            self.assertEqual(res.content, f.read())
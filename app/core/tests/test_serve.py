@@ -0,0 +1,81 @@
+"""
+Tests for the serve command and cache warm-up.
+"""
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core import warmup
+from core.management.commands import serve
+
+
+class WarmupTests(SimpleTestCase):
+    """Test caches are warmed before serving."""
+
+    def test_warm(self):
+        """Test URL patterns and model metadata are warmed."""
+        warmed = warmup.warm()
+
+        self.assertGreater(warmed['urls'], 0)
+        self.assertGreater(warmed['models'], 0)
+
+
+class ServeCommandTests(SimpleTestCase):
+    """Test the gunicorn configuration."""
+
+    def test_worker_counts_follow_cpus(self):
+        """Test workers scale with the CPU count."""
+        self.assertEqual(serve.worker_counts(1), (3, 2))
+        self.assertEqual(serve.worker_counts(4), (9, 2))
+
+    def test_gunicorn_options(self):
+        """Test the app is preloaded and workers are recycled."""
+        config = serve.Command().gunicorn_options({
+            'bind': '0.0.0.0:8000',
+            'workers': 3,
+            'threads': 2,
+            'timeout': 30,
+            'max_memory': 256,
+            'max_requests': 1000,
+        })
+
+        self.assertTrue(config['preload_app'])
+        self.assertEqual(config['worker_class'], 'gthread')
+        self.assertEqual(config['max_requests_jitter'], 100)
+        self.assertTrue(callable(config['post_request']))
+
+    @override_settings(QUERY_BUDGET_MODE='raise')
+    def test_query_budget_mode_from_settings(self):
+        """Test serving keeps the configured budget mode by default."""
+        with mock.patch.object(serve, 'Application') as application:
+            call_command('serve', stdout=StringIO())
+
+        application.return_value.run.assert_called_once()
+        self.assertEqual(settings.QUERY_BUDGET_MODE, 'raise')
+
+    @override_settings(QUERY_BUDGET_MODE='raise')
+    def test_query_budget_mode_option(self):
+        """Test the command option overrides the budget mode."""
+        with mock.patch.object(serve, 'Application'):
+            call_command(
+                'serve', query_budget_mode='log', stdout=StringIO(),
+            )
+
+        self.assertEqual(settings.QUERY_BUDGET_MODE, 'log')
+
+    def test_recycle_on_memory(self):
+        """Test a worker over the memory limit is retired."""
+        hook = serve.recycle_on_memory(100 << 20)
+        worker = SimpleNamespace(alive=True, pid=1, log=mock.Mock())
+
+        with mock.patch.object(serve, 'rss_bytes', return_value=50 << 20):
+            hook(worker, None, None, None)
+        self.assertTrue(worker.alive)
+
+        with mock.patch.object(serve, 'rss_bytes', return_value=150 << 20):
+            hook(worker, None, None, None)
+        self.assertFalse(worker.alive)
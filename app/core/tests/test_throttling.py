@@ -0,0 +1,168 @@
+"""
+Tests for the sliding-window throttles.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core import throttling
+
+TOKEN_URL = reverse('user:token')
+
+
+class LimitedThrottle(throttling.SlidingWindowThrottle):
+    scopes = ('ip',)
+    THROTTLE_RATES = {'ip': '10/min'}
+
+    def get_idents(self, request, view):
+        return {'ip': self.get_ident(request)}
+
+
+class LimitedAPIThrottle(throttling.APIRateThrottle):
+    THROTTLE_RATES = {'ip': '10/min', 'read': '3/min', 'write': '3/min'}
+
+
+class SlidingWindowTests(SimpleTestCase):
+    """Test the window estimate."""
+
+    def setUp(self):
+        caches['throttle'].clear()
+        throttling.SlidingWindowThrottle._previous_counts.clear()
+        self.request = APIRequestFactory().get('/')
+
+    def hit(self, now, times=1):
+        allowed = []
+        for _ in range(times):
+            throttle = LimitedThrottle()
+            with patch.object(throttle, 'timer', return_value=now):
+                allowed.append(throttle.allow_request(self.request, None))
+        return allowed, throttle
+
+    def test_limit_within_window(self):
+        """Test requests past the rate are refused."""
+        allowed, throttle = self.hit(60, times=11)
+
+        self.assertEqual(allowed, [True] * 10 + [False])
+        self.assertAlmostEqual(throttle.wait(), 60)
+
+    def test_previous_window_weighted(self):
+        """Test the previous window counts in proportion to overlap."""
+        self.hit(60, times=10)
+
+        allowed, throttle = self.hit(150, times=6)
+
+        self.assertEqual(allowed, [True] * 5 + [False])
+        self.assertAlmostEqual(throttle.wait(), 6)
+
+    def test_previous_window_read_once(self):
+        """Test a steady-state check only increments the current window."""
+        self.hit(60, times=2)
+        self.hit(130)
+        cache = caches['throttle']
+
+        with patch.object(cache, 'get_many', wraps=cache.get_many) as get, \
+                patch.object(cache, 'incr', wraps=cache.incr) as incr:
+            self.hit(131, times=3)
+
+        get.assert_not_called()
+        self.assertEqual(incr.call_count, 3)
+        for args, kwargs in incr.call_args_list:
+            self.assertEqual(args[0], 'throttle_ip_127.0.0.1_2')
+
+    def test_refused_requests_not_counted(self):
+        """Test a refused request leaves the counter unchanged."""
+        self.hit(60, times=15)
+
+        self.assertEqual(caches['throttle'].get('throttle_ip_127.0.0.1_1'), 10)
+
+    def test_interleaved_requests_limited(self):
+        """Test a request arriving mid-check cannot push past the limit."""
+        self.hit(60, times=9)
+        cache = caches['throttle']
+        interleaved = []
+
+        def interleave(method):
+            # Run a whole second request right after the first cache call.
+            def call(*args, **kwargs):
+                result = method(*args, **kwargs)
+                if not interleaved:
+                    interleaved.append(None)
+                    interleaved.extend(self.hit(60)[0])
+                return result
+            return call
+
+        with patch.object(cache, 'get_many', interleave(cache.get_many)), \
+                patch.object(cache, 'incr', interleave(cache.incr)):
+            allowed, _ = self.hit(60)
+
+        self.assertEqual((interleaved[1:] + allowed).count(True), 1)
+        self.assertEqual(caches['throttle'].get('throttle_ip_127.0.0.1_1'), 10)
+
+
+class APIRateThrottleTests(SimpleTestCase):
+    """Test the IP and read/write budgets are checked together."""
+
+    def setUp(self):
+        caches['throttle'].clear()
+        throttling.SlidingWindowThrottle._previous_counts.clear()
+        self.factory = APIRequestFactory()
+
+    def hit(self, request, now=60):
+        request.user = AnonymousUser()
+        throttle = LimitedAPIThrottle()
+        with patch.object(throttle, 'timer', return_value=now):
+            return throttle.allow_request(request, None)
+
+    def test_one_incr_per_counter(self):
+        """Test a request takes one incr for each counter it counts in."""
+        self.hit(self.factory.get('/'))
+        cache = caches['throttle']
+
+        with patch.object(cache, 'get_many', wraps=cache.get_many) as get, \
+                patch.object(cache, 'incr', wraps=cache.incr) as incr:
+            self.hit(self.factory.get('/'))
+
+        get.assert_not_called()
+        self.assertCountEqual([args[0] for args, _ in incr.call_args_list], [
+            'throttle_ip_127.0.0.1_1', 'throttle_read_ip127.0.0.1_1',
+        ])
+
+    def test_scopes_limited_separately(self):
+        """Test reads and writes have separate budgets under the IP one."""
+        reads = [self.hit(self.factory.get('/')) for _ in range(4)]
+        writes = [self.hit(self.factory.post('/')) for _ in range(4)]
+
+        self.assertEqual(reads, [True] * 3 + [False])
+        self.assertEqual(writes, [True] * 3 + [False])
+        self.assertEqual(caches['throttle'].get('throttle_ip_127.0.0.1_1'), 6)
+
+
+class TokenThrottleTests(TestCase):
+    """Test login attempts are throttled."""
+
+    def setUp(self):
+        caches['throttle'].clear()
+        self.client = APIClient()
+        get_user_model().objects.create_user('t@example.com', 'pass1234')
+
+    def test_token_requests_throttled(self):
+        """Test repeated token requests from one IP get a 429."""
+        payload = {'email': 't@example.com', 'password': 'wrong'}
+        with patch.object(
+            throttling.TokenRateThrottle, 'THROTTLE_RATES',
+            {'ip': '100/min', 'token': '2/min'},
+        ):
+            codes = [
+                self.client.post(TOKEN_URL, payload).status_code
+                for _ in range(3)
+            ]
+
+        self.assertEqual(codes[-1], status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertNotIn(status.HTTP_429_TOO_MANY_REQUESTS, codes[:2])
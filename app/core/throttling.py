@@ -0,0 +1,155 @@
+"""
+Sliding-window request throttles backed by a shared cache.
+"""
+import threading
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle
+
+THROTTLE_CACHE_ALIAS = 'throttle'
+PREVIOUS_WINDOW_MEMO_SIZE = 10000
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """Approximate sliding windows for several scopes, checked together.
+
+    Each scope's window is estimated from two fixed-window counters. The
+    current window is incremented first and checked against the value the
+    cache returns, so concurrent requests cannot all pass on the same read;
+    a refused request gives its increments back. A finished window no
+    longer changes, so each process reads it once and memoizes it.
+    """
+    scopes = ()
+    _previous_counts = OrderedDict()
+    _previous_lock = threading.Lock()
+
+    def __init__(self):
+        self.rates = {}
+        for scope in self.scopes:
+            if scope not in self.THROTTLE_RATES:
+                raise ImproperlyConfigured(
+                    f"No default throttle rate set for '{scope}' scope"
+                )
+            self.rates[scope] = self.parse_rate(self.THROTTLE_RATES[scope])
+
+    @property
+    def cache(self):
+        return caches[THROTTLE_CACHE_ALIAS]
+
+    def get_idents(self, request, view):
+        """Return {scope: identity} of the counters a request counts in."""
+        raise NotImplementedError('.get_idents() must be overridden')
+
+    def _incr(self, key, timeout):
+        """Atomically increment a window counter, creating it on first use."""
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            pass
+        if self.cache.add(key, 1, timeout):
+            return 1
+        return self.cache.incr(key)
+
+    def _decr(self, key):
+        """Give back an increment for a refused request."""
+        try:
+            self.cache.decr(key)
+        except ValueError:
+            pass
+
+    def _read_previous(self, keys):
+        """Return counts of finished windows, reading each one only once."""
+        with self._previous_lock:
+            counts = {
+                key: self._previous_counts[key]
+                for key in keys if key in self._previous_counts
+            }
+        missing = [key for key in keys if key not in counts]
+        if not missing:
+            return counts
+        found = self.cache.get_many(missing)
+        with self._previous_lock:
+            for key in missing:
+                self._previous_counts[key] = counts[key] = found.get(key, 0)
+            while len(self._previous_counts) > PREVIOUS_WINDOW_MEMO_SIZE:
+                self._previous_counts.popitem(last=False)
+        return counts
+
+    def allow_request(self, request, view):
+        self.now = self.timer()
+        windows = {}
+        for scope, ident in self.get_idents(request, view).items():
+            num_requests, duration = self.rates[scope]
+            if ident is None or num_requests is None:
+                continue
+            window, offset = divmod(int(self.now), duration)
+            key = self.cache_format % {'scope': scope, 'ident': ident}
+            windows[f'{key}_{window}'] = (
+                num_requests, duration, 1 - offset / duration,
+                f'{key}_{window - 1}',
+            )
+        if not windows:
+            return True
+
+        previous_counts = self._read_previous(
+            [window[3] for window in windows.values()],
+        )
+        self.exceeded = []
+        for key, (num_requests, duration, weight, previous_key) in (
+            windows.items()
+        ):
+            current = self._incr(key, duration * 2)
+            previous = previous_counts[previous_key]
+            if previous * weight + current > num_requests:
+                self.exceeded.append(
+                    (num_requests, duration, weight, current, previous)
+                )
+        if not self.exceeded:
+            return True
+
+        for key in windows:
+            self._decr(key)
+        return False
+
+    def wait(self):
+        """Return seconds until every estimate drops back under its limit."""
+        waits = []
+        for num_requests, duration, weight, current, previous in (
+            self.exceeded
+        ):
+            if current > num_requests or not previous:
+                waits.append(duration * weight)
+                continue
+            allowed_weight = (num_requests - current) / previous
+            waits.append(max(weight - allowed_weight, 0) * duration)
+        return max(waits, default=None)
+
+
+class APIRateThrottle(SlidingWindowThrottle):
+    """Overall budget per client IP, plus a read or write budget.
+
+    The read and write budgets count by user when authenticated and by
+    client IP otherwise.
+    """
+    scopes = ('ip', 'read', 'write')
+
+    def get_idents(self, request, view):
+        ip = self.get_ident(request)
+        if request.user and request.user.is_authenticated:
+            ident = f'user{request.user.pk}'
+        else:
+            ident = f'ip{ip}'
+        scope = 'read' if request.method in SAFE_METHODS else 'write'
+        return {'ip': ip, scope: ident}
+
+
+class TokenRateThrottle(SlidingWindowThrottle):
+    """Overall and login attempt budgets per client IP."""
+    scopes = ('ip', 'token')
+
+    def get_idents(self, request, view):
+        ip = self.get_ident(request)
+        return {'ip': ip, 'token': ip}
@@ -0,0 +1,53 @@
+"""
+Warm process-wide caches before a server starts taking requests.
+
+Run in the master before workers fork, so every worker inherits the
+populated caches instead of building them on its first requests.
+"""
+from django.apps import apps
+from django.conf import settings
+from django.urls import URLResolver, get_resolver
+from django.utils import translation
+
+
+def warm_urls(resolver=None):
+    """Compile every URL pattern and build the reverse lookup tables.
+
+    Return the number of patterns seen.
+    """
+    resolver = resolver or get_resolver()
+    resolver.reverse_dict
+    resolver.namespace_dict
+    count = 0
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+        if isinstance(pattern, URLResolver):
+            count += warm_urls(pattern)
+        else:
+            count += 1
+    return count
+
+
+def warm_models():
+    """Fill every model's _meta field caches; return the model count.
+
+    Serializer fields are not warmed: DRF caches them per serializer
+    instance, so nothing built here would outlive the call.
+    """
+    models = apps.get_models()
+    for model in models:
+        model._meta.get_fields()
+        model._meta.fields_map
+    return len(models)
+
+
+def warm():
+    """Warm the URL resolver, model metadata and translation caches."""
+    translation.activate(settings.LANGUAGE_CODE)
+    try:
+        return {
+            'urls': warm_urls(),
+            'models': warm_models(),
+        }
+    finally:
+        translation.deactivate()
@@ -0,0 +1,124 @@
+"""
+Autocomplete search for tags and ingredients.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import (
+    Case,
+    CharField,
+    IntegerField,
+    Lookup,
+    Q,
+    Value,
+    When,
+)
+
+AUTOCOMPLETE_LIMIT = 10
+CACHE_MAX_PREFIX_LENGTH = 3
+CACHE_MAX_ENTRIES = 2048
+CACHE_TTL = 30
+
+
+class PrefixCache:
+    """Small thread-safe LRU of short per-user prefixes with a TTL."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return a cached value, or None when missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, label, user_id):
+        """Drop every prefix cached for one model and user."""
+        with self._lock:
+            for key in [k for k in self._entries if k[:2] == (label, user_id)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+prefix_cache = PrefixCache()
+
+
+@CharField.register_lookup
+class IPrefix(Lookup):
+    """Case-insensitive prefix match compiled to ILIKE.
+
+    Unlike istartswith, which compiles to UPPER(name) LIKE, ILIKE can be
+    answered by the gin_trgm_ops index on the plain column.
+    """
+    lookup_name = 'iprefix'
+
+    def get_db_prep_lookup(self, value, connection):
+        return '%s', [connection.ops.prep_for_like_query(value) + '%']
+
+    def as_sql(self, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs_sql} ILIKE {rhs_sql}', lhs_params + rhs_params
+
+
+def invalidate(model, user_id):
+    """Forget cached suggestions after a user's names change."""
+    prefix_cache.invalidate(model._meta.label, user_id)
+
+
+def search(queryset, q, limit=AUTOCOMPLETE_LIMIT, field='name'):
+    """Return prefix matches first, then fuzzy trigram matches."""
+    return (
+        queryset
+        .filter(
+            Q(**{f'{field}__iprefix': q}) | Q(**{f'{field}__trigram_similar': q})
+        )
+        .annotate(
+            is_prefix=Case(
+                When(**{f'{field}__iprefix': q}, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+            similarity=TrigramSimilarity(field, q),
+        )
+        .order_by('-is_prefix', '-usage', '-similarity', field)[:limit]
+    )
+
+
+def suggest(queryset, user_id, q, serialize, field='name'):
+    """Return serialized suggestions, caching the hottest short prefixes."""
+    q = q.strip().lower()
+    if not q:
+        return []
+    if len(q) > CACHE_MAX_PREFIX_LENGTH:
+        return serialize(search(queryset, q, field=field))
+
+    key = (queryset.model._meta.label, user_id, q)
+    data = prefix_cache.get(key)
+    if data is None:
+        data = serialize(search(queryset, q, field=field))
+        prefix_cache.set(key, data)
+    return data
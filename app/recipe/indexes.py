@@ -0,0 +1,90 @@
+"""
+Per-process caches of in-memory indexes over a user's recipes.
+"""
+import threading
+from collections import OrderedDict
+
+from django.db import transaction
+
+from core.models import Recipe, RecipeStats
+
+_caches = []
+
+
+def load_recipe_snapshots(user_id):
+    """Return {recipe_id: {'tags': [...], 'ingredients': [...]}}."""
+    snapshots = {
+        recipe_id: {'tags': [], 'ingredients': []}
+        for recipe_id in Recipe.objects.filter(
+            user_id=user_id,
+        ).values_list('id', flat=True)
+    }
+    for key, through, related in (
+        ('tags', Recipe.tags.through, 'tag'),
+        ('ingredients', Recipe.ingredients.through, 'ingredients'),
+    ):
+        # Links stay until a deferred delete is purged; skip hidden rows.
+        links = through.objects.filter(
+            recipe__user_id=user_id,
+            **{f'{related}__deleted_at__isnull': True},
+        ).values_list('recipe_id', f'{related}_id')
+        for recipe_id, obj_id in links.iterator(chunk_size=10000):
+            snapshots[recipe_id][key].append(obj_id)
+    return snapshots
+
+
+class UserIndexCache:
+    """LRU of per-user indexes, validated against RecipeStats.version.
+
+    index_class(snapshots) builds an index; index.update(recipe_id,
+    snapshot) applies one write, with snapshot=None for a delete.
+    """
+
+    def __init__(self, index_class, max_users=256):
+        self.index_class = index_class
+        self.max_users = max_users
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        _caches.append(self)
+
+    def get(self, user_id):
+        """Return a current index for the user, loading it if stale."""
+        version = RecipeStats.objects.version(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+
+        index = self.index_class(load_recipe_snapshots(user_id))
+        with self._lock:
+            self._entries[user_id] = (version, index)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return index
+
+    def apply(self, user_id, version, recipe_id, snapshot):
+        """Apply a committed write, or drop the index if it missed one."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            if entry[0] != version - 1:
+                del self._entries[user_id]
+                return
+            entry[1].update(recipe_id, snapshot)
+            self._entries[user_id] = (version, entry[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def recipe_changed(user_id, version, recipe_id, snapshot):
+    """Update every cached index once the current transaction commits."""
+    def apply():
+        for cache in _caches:
+            cache.apply(user_id, version, recipe_id, snapshot)
+
+    transaction.on_commit(apply)
@@ -0,0 +1,88 @@
+"""
+Shared cache of each user's default recipe, tag and ingredient lists.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+from core.models import Ingredients, Job, Recipe, RecipeStats, Tag
+
+from recipe import serializers
+
+LIST_CACHE_ALIAS = 'lists'
+LIST_CACHE_TTL = 5 * 60
+WARM_TASK = 'recipe.tasks.warm_lists'
+
+
+def _recipes(user_id):
+    return serializers.RecipeSerializer(
+        Recipe.objects.filter(user_id=user_id)
+        .prefetch_related('tags', 'ingredients')
+        .order_by('-id'),
+        many=True,
+    ).data
+
+
+def _tags(user_id):
+    return serializers.TagSerializer(
+        Tag.objects.filter(user_id=user_id).order_by('-name'), many=True,
+    ).data
+
+
+def _ingredients(user_id):
+    return serializers.IngredientSerializer(
+        Ingredients.objects.filter(user_id=user_id)
+        .order_by('-catalog__name'),
+        many=True,
+    ).data
+
+
+LISTS = {
+    'recipes': _recipes,
+    'tags': _tags,
+    'ingredients': _ingredients,
+}
+
+
+def get(label, user_id):
+    """Return a user's serialized list, from cache when current.
+
+    Keys carry RecipeStats.version, so every recipe, tag or ingredient
+    write moves readers to a fresh key in every process. Users without a
+    stats row (version 0) cannot be invalidated that way and bypass the
+    cache.
+    """
+    version = RecipeStats.objects.version(user_id)
+    if not version:
+        return LISTS[label](user_id)
+    cache = caches[LIST_CACHE_ALIAS]
+    key = f'list:{label}:{user_id}:{version}'
+    data = cache.get(key)
+    if data is None:
+        data = list(LISTS[label](user_id))
+        cache.set(key, data, LIST_CACHE_TTL)
+    return data
+
+
+def warm(user_id):
+    """Fill the cache with every list for a user."""
+    for label in LISTS:
+        get(label, user_id)
+
+
+def schedule_warmup(user_id):
+    """Queue a warm-up job unless disabled, pending or over the cap.
+
+    Warm-ups are best effort: during a login storm they are dropped once
+    CACHE_WARMING_MAX_PENDING are waiting, and the run_worker concurrency
+    bounds how many query the database at once. A user's pending warm-up
+    is deduplicated by the job table's unique index.
+    """
+    if not settings.CACHE_WARMING:
+        return None
+    pending = Job.objects.filter(
+        task=WARM_TASK,
+        status__in=[Job.QUEUED, Job.RUNNING],
+    ).values('id')[:settings.CACHE_WARMING_MAX_PENDING]
+    if pending.count() >= settings.CACHE_WARMING_MAX_PENDING:
+        return None
+    return Job.objects.enqueue(WARM_TASK, user_id, max_attempts=1)
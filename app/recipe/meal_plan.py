@@ -0,0 +1,162 @@
+"""
+Meal plan generation over NumPy arrays of a user's recipe attributes.
+"""
+from itertools import chain
+
+import numpy as np
+from django.contrib.postgres.fields import ArrayField
+from django.db.models import BigIntegerField, F, OuterRef, Subquery
+from django.db.models.functions import Cast
+from scipy import sparse
+
+from core.models import Recipe
+
+
+class NoPlanError(Exception):
+    """Raised when no plan satisfies the constraints."""
+
+
+class _ArraySubquery(Subquery):
+    """ARRAY(subquery) expression; Django 3.2 has no ArraySubquery yet."""
+    template = 'ARRAY(%(subquery)s)'
+    output_field = ArrayField(BigIntegerField())
+
+
+def load_recipes(user_id, max_time=None):
+    """Return (ids, price cents, time_minutes, recipe x tag matrix).
+
+    Recipes over max_time can never be planned, so they are not loaded.
+    """
+    tag_ids = _ArraySubquery(
+        Recipe.tags.through.objects
+        .filter(recipe_id=OuterRef('pk'), tag__deleted_at__isnull=True)
+        .values('tag_id')
+    )
+    recipes = Recipe.objects.filter(user_id=user_id)
+    if max_time is not None:
+        recipes = recipes.filter(time_minutes__lte=max_time)
+    rows = list(
+        recipes.order_by('id')
+        .annotate(
+            cents=Cast(F('price') * 100, BigIntegerField()),
+            tag_ids=tag_ids,
+        )
+        .values_list('id', 'cents', 'time_minutes', 'tag_ids')
+    )
+    ids, prices, times = (
+        np.array([row[i] for row in rows], dtype=np.int64) for i in range(3)
+    )
+
+    counts = np.fromiter(
+        (len(row[3]) for row in rows), dtype=np.int64, count=len(rows),
+    )
+    links = np.fromiter(
+        chain.from_iterable(row[3] for row in rows),
+        dtype=np.int64,
+        count=int(counts.sum()),
+    )
+    tag_keys, tag_columns = np.unique(links, return_inverse=True)
+    tags = sparse.csr_matrix(
+        (
+            np.ones(len(links), dtype=np.int32),
+            (np.repeat(np.arange(len(rows)), counts), tag_columns),
+        ),
+        shape=(len(rows), max(len(tag_keys), 1)),
+    )
+    return ids, prices, times, tags
+
+
+def _reserves(prices, candidates, order, blocks, later):
+    """Return the cheapest cost of `later` more days after each candidate.
+
+    order lists the rows still open, cheapest first; blocks(candidates,
+    rows) marks the rows each candidate rules out, itself included. Rows
+    the later days rule out for each other are not considered, so this
+    is a lower bound. It is inf where too few rows remain.
+    """
+    reserves = np.full(len(candidates), np.inf)
+    if not later:
+        reserves[:] = 0
+        return reserves
+    todo = np.arange(len(candidates))
+    width = 2 * later + 1
+    while len(todo):
+        rows = order[:width]
+        allowed = ~blocks(candidates[todo], rows)
+        counts = np.cumsum(allowed, axis=1)
+        totals = np.cumsum(allowed * prices[rows], axis=1)
+        done = counts[:, -1] >= later
+        last = np.argmax(counts[done] >= later, axis=1)
+        reserves[todo[done]] = totals[done, last]
+        todo = todo[~done]
+        if width >= len(order):
+            break
+        width *= 2
+    return reserves
+
+
+def plan_meals(prices, times, tags, days, budget, max_time, max_per_tag=None,
+               rng=None):
+    """Pick one recipe per day under the budget and time limits.
+
+    Greedy search: each step takes the affordable recipe that covers the
+    most new tags, keeping enough budget for the cheapest completion that
+    the tag limit still allows and never using a tag more than
+    max_per_tag times. rng, a NumPy Generator, breaks ties randomly;
+    without it ties go to the lowest row. Returns the chosen row numbers
+    in order.
+    """
+    available = times <= max_time
+    if available.sum() < days:
+        raise NoPlanError('Not enough recipes within the time limit.')
+
+    tag_uses = np.zeros(tags.shape[1], dtype=np.int64)
+    if rng is None:
+        jitter = np.zeros(len(prices))
+    else:
+        jitter = rng.random(len(prices))
+    remaining = budget
+    chosen = []
+    for slot in range(days):
+        pool = np.flatnonzero(available)
+        later = days - slot - 1
+        if len(pool) <= later:
+            raise NoPlanError('No plan satisfies the constraints.')
+
+        if max_per_tag is None:
+            closing = np.empty(0, dtype=np.int64)
+        else:
+            full = (tag_uses >= max_per_tag).astype(np.int32)
+            pool = pool[(tags[pool] @ full) == 0]
+            # Tags one use short of the cap: a recipe using one of them
+            # rules out every other recipe that does.
+            closing = np.flatnonzero(tag_uses + 1 >= max_per_tag)
+
+        def blocks(candidates, rows):
+            blocked = candidates[:, None] == rows[None, :]
+            if len(closing):
+                shared = (
+                    tags[candidates][:, closing] @ tags[rows][:, closing].T
+                )
+                blocked |= shared.toarray() > 0
+            return blocked
+
+        order = pool[np.argsort(prices[pool], kind='stable')]
+        reserve = _reserves(prices, pool, order, blocks, later)
+        candidates = pool[prices[pool] + reserve <= remaining]
+        if not len(candidates):
+            raise NoPlanError('No plan satisfies the constraints.')
+
+        unused = (tag_uses == 0).astype(np.int32)
+        new_tags = tags[candidates] @ unused
+        # Most new tags first, then cheapest, then random.
+        best = np.lexsort(
+            (jitter[candidates], prices[candidates], -new_tags)
+        )[0]
+        pick = candidates[best]
+
+        chosen.append(pick)
+        available[pick] = False
+        remaining -= prices[pick]
+        tag_uses += tags[pick].toarray().ravel()
+    return chosen
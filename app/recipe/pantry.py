@@ -0,0 +1,127 @@
+"""
+"What can I cook" matching over per-recipe ingredient bitsets.
+"""
+import threading
+
+import numpy as np
+
+from recipe.indexes import UserIndexCache
+
+POPCOUNT = np.array(
+    [bin(byte).count('1') for byte in range(256)], dtype=np.uint8,
+)
+
+
+def popcount(bits):
+    """Return the number of set bits in each row of a uint8 matrix."""
+    return POPCOUNT[bits].sum(axis=1, dtype=np.int64)
+
+
+class PantryIndex:
+    """Packed ingredient bitsets, one row per recipe, for one user."""
+
+    def __init__(self, snapshots):
+        self._rows = {
+            recipe_id: set(snapshot['ingredients'])
+            for recipe_id, snapshot in snapshots.items()
+        }
+        self._lock = threading.Lock()
+        self._build()
+
+    def _build(self):
+        """Pack every recipe's ingredients into a bitset matrix."""
+        self._columns = {}
+        for ingredients in self._rows.values():
+            for ingredient_id in ingredients:
+                self._columns.setdefault(ingredient_id, len(self._columns))
+        self._ingredient_ids = np.fromiter(self._columns, dtype=np.int64)
+        self._ids = np.fromiter(self._rows, dtype=np.int64)
+        self._positions = dict(zip(self._rows, range(len(self._rows))))
+        self._bits = np.zeros(
+            (len(self._rows), (len(self._columns) + 7) // 8), dtype=np.uint8,
+        )
+        positions = [
+            position
+            for position, ingredients in enumerate(self._rows.values())
+            for _ in ingredients
+        ]
+        columns = np.array(
+            [
+                self._columns[ingredient_id]
+                for ingredients in self._rows.values()
+                for ingredient_id in ingredients
+            ],
+            dtype=np.int64,
+        )
+        # packbits order: column c is bit (7 - c % 8) of byte c // 8.
+        np.bitwise_or.at(
+            self._bits,
+            (positions, columns >> 3),
+            (0x80 >> (columns & 7)).astype(np.uint8),
+        )
+        # Column-major, so the few bytes a pantry touches are contiguous.
+        self._bits = np.asfortranarray(self._bits)
+        self._sizes = popcount(self._bits)
+        self._stale = False
+
+    def _pack(self, ingredient_ids):
+        """Return the bitset row for a set of known ingredient ids."""
+        flags = np.zeros(self._bits.shape[1] * 8, dtype=bool)
+        flags[[self._columns[i] for i in ingredient_ids]] = True
+        return np.packbits(flags)
+
+    def update(self, recipe_id, snapshot):
+        """Rewrite a recipe's row in place when possible."""
+        with self._lock:
+            if snapshot is None:
+                self._rows.pop(recipe_id, None)
+                self._stale = True
+                return
+
+            ingredients = set(snapshot['ingredients'])
+            self._rows[recipe_id] = ingredients
+            position = self._positions.get(recipe_id)
+            if position is None or not ingredients <= self._columns.keys():
+                self._stale = True
+            elif not self._stale:
+                self._bits[position] = self._pack(ingredients)
+                self._sizes[position] = len(ingredients)
+
+    def match(self, pantry, limit=20, max_missing=None):
+        """Return [(recipe_id, missing ids, needed)] by fewest missing."""
+        with self._lock:
+            if self._stale:
+                self._build()
+            known = [i for i in set(pantry) if i in self._columns]
+            have_bits = self._pack(known)
+            # Only bytes holding pantry bits can contribute to the overlap.
+            words = np.flatnonzero(have_bits)
+            have = popcount(self._bits[:, words] & have_bits[words])
+            missing = self._sizes - have
+            rows = np.flatnonzero(self._sizes)
+            if max_missing is not None:
+                rows = rows[missing[rows] <= max_missing]
+
+            coverage = have[rows] / self._sizes[rows]
+            if limit < len(rows):
+                # Fewest missing first, then highest coverage (< 1 apart).
+                rank = missing[rows] - coverage * 0.5
+                top = np.argpartition(rank, limit - 1)[:limit]
+                rows, coverage = rows[top], coverage[top]
+            order = np.lexsort((self._ids[rows], -coverage, missing[rows]))
+            rows = rows[order]
+
+            lacking = np.unpackbits(
+                self._bits[rows] & ~have_bits, axis=1,
+            )[:, :len(self._columns)].astype(bool)
+            return [
+                (
+                    int(self._ids[row]),
+                    self._ingredient_ids[flags].tolist(),
+                    int(self._sizes[row]),
+                )
+                for row, flags in zip(rows, lacking)
+            ]
+
+
+pantry_indexes = UserIndexCache(PantryIndex)
@@ -1,10 +1,27 @@
 """Serializer for Recipe APIs"""
 
+import os
+from decimal import Decimal
+
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from rest_framework import serializers
-from core.models import Recipe, Tag, Ingredients
+from recipe import autocomplete, indexes
+from core.models import (
+    Recipe,
+    RecipeStats,
+    Tag,
+    Ingredients,
+    recipe_snapshot,
+    record_recipe_change,
+    PRICE_BUCKET_SIZE,
+)
 
 class IngredientSerializer(serializers.ModelSerializer):
     """Serializer for ingredients"""
+    # Resolved through the shared catalog; see Ingredients.name.
+    name = serializers.CharField(max_length=255)
 
     class Meta:
         model = Ingredients
@@ -30,33 +47,50 @@ class RecipeSerializer(serializers.ModelSerializer):
         fields = ['id','title','time_minutes','price','link','tags','ingredients']
         read_only_fields = ['id']
     
-    def _get_or_create_tags(self, tags, recipe):
+    def _get_or_create_tags(self, tags):
         """Handle getting or creating tags as needed."""
         auth_user = self.context['request'].user
+        tag_objs = []
         for tag in tags:
             tag_obj, created = Tag.objects.get_or_create(
                 user = auth_user,
                 **tag,
             )
-            recipe.tags.add(tag_obj)
+            tag_objs.append(tag_obj)
+            if created:
+                autocomplete.invalidate(Tag, auth_user.id)
+        return tag_objs
     
-    def _get_or_create_ingredients(self, ingredients, recipe):
+    def _get_or_create_ingredients(self, ingredients):
         """ Handle getting and creating Ingredients as need."""
         auth_user = self.context['request'].user
-        for ingredient in ingredients:
-            ingredient_obj, created = Ingredients.objects.get_or_create(
-                user = auth_user,
-                **ingredient,
-            )
-            recipe.ingredients.add(ingredient_obj)
+        ingredient_objs, created = Ingredients.objects.for_names(
+            auth_user, [ingredient['name'] for ingredient in ingredients],
+        )
+        if created:
+            autocomplete.invalidate(Ingredients, auth_user.id)
+        return ingredient_objs
 
     def create(self, validated_data):
         """ Create a recipe."""
         tags = validated_data.pop('tags', [])
         ingredients = validated_data.pop('ingredients', [])
-        recipe = Recipe.objects.create(**validated_data)
-        self._get_or_create_tags(tags, recipe)
-        self._get_or_create_ingredients(ingredients, recipe)
+        with transaction.atomic():
+            recipe = Recipe.objects.create(**validated_data)
+            tag_objs = self._get_or_create_tags(tags)
+            ingredient_objs = self._get_or_create_ingredients(ingredients)
+            recipe.tags.add(*tag_objs)
+            recipe.ingredients.add(*ingredient_objs)
+            snapshot = {
+                'time_minutes': recipe.time_minutes,
+                'price': recipe.price,
+                'tags': list({tag.id for tag in tag_objs}),
+                'ingredients': list({obj.id for obj in ingredient_objs}),
+            }
+            version = record_recipe_change(recipe.user, new=snapshot)
+            indexes.recipe_changed(
+                recipe.user_id, version, recipe.id, snapshot,
+            )
         
         return recipe
     
@@ -65,23 +99,144 @@ class RecipeSerializer(serializers.ModelSerializer):
         tags = validated_data.pop('tags', None)
         ingredients = validated_data.pop('ingredients', None)
 
-        if tags is not None:
-            recipe.tags.clear()
-            self._get_or_create_tags(tags, recipe)
-        
-        if ingredients is not None:
-            recipe.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, recipe)
-        
-        for attr, value in validated_data.items():
-            setattr(recipe, attr, value)
+        with transaction.atomic():
+            # Lock the recipe before reading it, so a concurrent update or
+            # delete finishes first and the diff starts from its result.
+            old = recipe_snapshot(get_object_or_404(
+                Recipe.objects.select_for_update(), pk=recipe.pk,
+            ))
+            new = dict(old)
+
+            # set() diffs against the existing links, so only added rows are
+            # inserted and only removed rows are deleted, each in one statement.
+            if tags is not None:
+                tag_objs = self._get_or_create_tags(tags)
+                recipe.tags.set(tag_objs)
+                new['tags'] = list({tag.id for tag in tag_objs})
+            
+            if ingredients is not None:
+                ingredient_objs = self._get_or_create_ingredients(ingredients)
+                recipe.ingredients.set(ingredient_objs)
+                new['ingredients'] = list({obj.id for obj in ingredient_objs})
+            
+            for attr, value in validated_data.items():
+                setattr(recipe, attr, value)
+
+            recipe.save()
+            new['time_minutes'] = recipe.time_minutes
+            new['price'] = recipe.price
+            version = record_recipe_change(recipe.user, old=old, new=new)
+            indexes.recipe_changed(recipe.user_id, version, recipe.id, new)
 
-        recipe.save()
         return recipe
 
 class RecipeDetailSerializer(RecipeSerializer):
     """Serializer for recipe detail. """
+    image_url = serializers.SerializerMethodField()
 
     class Meta(RecipeSerializer.Meta):
-        fields = RecipeSerializer.Meta.fields + ['description']
+        fields = RecipeSerializer.Meta.fields + ['description', 'image_url']
+
+    def get_image_url(self, recipe) -> str:
+        """Return the authenticated image URL, which changes with the file."""
+        if not recipe.image:
+            return None
+        return reverse('recipe:recipe-image', kwargs={
+            'pk': recipe.pk,
+            'filename': os.path.basename(recipe.image.name),
+        })
+
+
+class RecipeStatsSerializer(serializers.ModelSerializer):
+    """Serializer for per-user recipe stats."""
+    time_minutes = serializers.SerializerMethodField()
+    price_histogram = serializers.SerializerMethodField()
+    top_tags = serializers.SerializerMethodField()
+    top_ingredients = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RecipeStats
+        fields = [
+            'recipe_count',
+            'time_minutes',
+            'price_histogram',
+            'top_tags',
+            'top_ingredients',
+        ]
+        read_only_fields = fields
+
+    def get_time_minutes(self, stats) -> dict:
+        """Return the average and percentiles of time_minutes."""
+        p50, p90, p99 = stats.time_minutes_percentiles(50, 90, 99)
+        average = None
+        if stats.recipe_count:
+            average = stats.time_minutes_total / stats.recipe_count
+        return {'average': average, 'p50': p50, 'p90': p90, 'p99': p99}
+
+    def get_price_histogram(self, stats) -> list:
+        """Return price buckets in ascending order."""
+        return [
+            {
+                'min': str(bucket),
+                'max': str(bucket + PRICE_BUCKET_SIZE),
+                'count': count,
+            }
+            for bucket, count in sorted(
+                (Decimal(key), count)
+                for key, count in stats.price_counts.items()
+            )
+        ]
+
+    def _top(self, model, counts):
+        """Return the most used objects of a model with their counts."""
+        top = sorted(counts.items(), key=lambda item: -item[1])
+        top = top[:self.context.get('top', 5)]
+        ids = [key for key, count in top]
+        names = {obj.id: obj.name for obj in model.objects.filter(id__in=ids)}
+        return [
+            {'id': int(key), 'name': names[int(key)], 'count': count}
+            for key, count in top if int(key) in names
+        ]
+
+    def get_top_tags(self, stats) -> list:
+        return self._top(Tag, stats.tag_counts)
+
+    def get_top_ingredients(self, stats) -> list:
+        return self._top(Ingredients, stats.ingredient_counts)
+
+
+class SyncDeletedSerializer(serializers.Serializer):
+    """Ids deleted since a sync cursor."""
+    recipes = serializers.ListField(child=serializers.IntegerField())
+    tags = serializers.ListField(child=serializers.IntegerField())
+    ingredients = serializers.ListField(child=serializers.IntegerField())
+
+
+class SyncSerializer(serializers.Serializer):
+    """Serializer for changes since a sync cursor."""
+    cursor = serializers.CharField()
+    full = serializers.BooleanField()
+    recipes = RecipeDetailSerializer(many=True)
+    tags = TagSerializer(many=True)
+    ingredients = IngredientSerializer(many=True)
+    deleted = SyncDeletedSerializer()
+
+
+class ShoppingListSerializer(serializers.Serializer):
+    """Serializer for the recipes to build a shopping list from."""
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=1000,
+    )
+
 
+class MealPlanSerializer(serializers.Serializer):
+    """Serializer for meal plan constraints."""
+    days = serializers.IntegerField(min_value=1, max_value=31, default=7)
+    budget = serializers.DecimalField(
+        max_digits=9, decimal_places=2, min_value=Decimal('0'),
+    )
+    max_time_minutes = serializers.IntegerField(min_value=1)
+    max_per_tag = serializers.IntegerField(min_value=1, required=False)
+    seed = serializers.IntegerField(min_value=0, required=False)
@@ -0,0 +1,145 @@
+"""
+Similar recipe ranking over a sparse tag/ingredient incidence matrix.
+"""
+import threading
+
+import numpy as np
+from scipy import sparse
+
+from recipe.indexes import UserIndexCache
+
+METRICS = ('jaccard', 'cosine')
+
+# Rows changed since the last build are scored from a small side matrix;
+# past this many the main matrix is rebuilt instead.
+MAX_PENDING_ROWS = 512
+
+
+def recipe_features(snapshot):
+    """Encode tags as even and ingredients as odd feature keys."""
+    return (
+        [tag_id * 2 for tag_id in set(snapshot['tags'])]
+        + [
+            ingredient_id * 2 + 1
+            for ingredient_id in set(snapshot['ingredients'])
+        ]
+    )
+
+
+def _csr(rows, columns):
+    """Build a binary CSR matrix from a list of column arrays."""
+    sizes = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=indptr[1:])
+    indices = np.concatenate(rows) if rows else np.empty(0, dtype=np.int32)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.float32), indices, indptr),
+        shape=(len(rows), max(columns, 1)),
+    )
+    return matrix, sizes
+
+
+class SimilarityIndex:
+    """Binary recipe x feature CSR matrix for one user."""
+
+    def __init__(self, snapshots):
+        features = [recipe_features(s) for s in snapshots.values()]
+        lengths = np.fromiter(map(len, features), dtype=np.int64)
+        flat = np.fromiter(
+            (key for row in features for key in row),
+            dtype=np.int64,
+            count=int(lengths.sum()),
+        )
+        keys, inverse = np.unique(flat, return_inverse=True)
+        self._columns = dict(zip(keys.tolist(), range(len(keys))))
+        self._rows = dict(zip(
+            snapshots,
+            np.split(inverse.astype(np.int32), np.cumsum(lengths)[:-1]),
+        ))
+        self._lock = threading.Lock()
+        self._build()
+
+    def _build(self):
+        """Rebuild the main matrix from the current rows."""
+        self._ids = np.fromiter(self._rows, dtype=np.int64)
+        self._positions = dict(zip(self._rows, range(len(self._rows))))
+        self._matrix, self._sizes = _csr(
+            list(self._rows.values()), len(self._columns),
+        )
+        self._pending = set()
+
+    def _encode(self, features):
+        """Map feature keys to column numbers, adding new columns."""
+        columns = self._columns
+        return np.array(
+            [columns.setdefault(key, len(columns)) for key in features],
+            dtype=np.int32,
+        )
+
+    def update(self, recipe_id, snapshot):
+        """Replace one recipe's row without rebuilding the main matrix."""
+        with self._lock:
+            position = self._positions.get(recipe_id)
+            if position is not None:
+                start, end = self._matrix.indptr[position:position + 2]
+                self._matrix.data[start:end] = 0
+                self._sizes[position] = 0
+
+            if snapshot is None:
+                self._rows.pop(recipe_id, None)
+                self._pending.discard(recipe_id)
+            else:
+                self._rows[recipe_id] = self._encode(
+                    recipe_features(snapshot)
+                )
+                self._pending.add(recipe_id)
+
+            if len(self._pending) > MAX_PENDING_ROWS:
+                self._build()
+
+    def _scores(self, matrix, sizes, target, size, metric):
+        """Return (row numbers, scores) of rows overlapping the target."""
+        overlap = matrix @ target[:matrix.shape[1]]
+        rows = np.flatnonzero(overlap)
+        shared = overlap[rows]
+        if metric == 'cosine':
+            scores = shared / np.sqrt(sizes[rows] * size)
+        else:
+            scores = shared / (sizes[rows] + size - shared)
+        return rows, scores
+
+    def similar(self, recipe_id, limit=10, metric='jaccard'):
+        """Return [(recipe_id, score)] of the most similar other recipes."""
+        with self._lock:
+            columns = self._rows.get(recipe_id)
+            if columns is None or not len(columns):
+                return []
+            target = np.zeros(len(self._columns), dtype=np.float32)
+            target[columns] = 1
+
+            rows, scores = self._scores(
+                self._matrix, self._sizes, target, len(columns), metric,
+            )
+            ids = self._ids[rows]
+            if self._pending:
+                pending_ids = np.fromiter(self._pending, dtype=np.int64)
+                pending, pending_sizes = _csr(
+                    [self._rows[i] for i in pending_ids.tolist()],
+                    len(self._columns),
+                )
+                pending_rows, pending_scores = self._scores(
+                    pending, pending_sizes, target, len(columns), metric,
+                )
+                ids = np.concatenate([ids, pending_ids[pending_rows]])
+                scores = np.concatenate([scores, pending_scores])
+
+        keep = ids != recipe_id
+        ids, scores = ids[keep], scores[keep]
+        if limit < len(ids):
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            ids, scores = ids[top], scores[top]
+        order = np.lexsort((ids, -scores))
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+
+similarity_indexes = UserIndexCache(SimilarityIndex)
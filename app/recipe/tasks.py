@@ -0,0 +1,12 @@
+"""
+Background tasks for the recipe app.
+"""
+from core.jobs import task
+
+from recipe import list_cache
+
+
+@task
+def warm_lists(user_id):
+    """Precompute a user's cached recipe, tag and ingredient lists."""
+    list_cache.warm(user_id)
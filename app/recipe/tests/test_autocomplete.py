@@ -0,0 +1,58 @@
+"""
+Tests for the autocomplete prefix cache.
+"""
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core.models import Tag
+from recipe.autocomplete import PrefixCache, search
+
+
+class PrefixCacheTests(SimpleTestCase):
+    """Test the in-process prefix cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest untouched entry is evicted first."""
+        cache = PrefixCache(max_entries=2)
+        cache.set(('core.Tag', 1, 'a'), ['a'])
+        cache.set(('core.Tag', 1, 'b'), ['b'])
+        cache.get(('core.Tag', 1, 'a'))
+        cache.set(('core.Tag', 1, 'c'), ['c'])
+
+        self.assertEqual(cache.get(('core.Tag', 1, 'a')), ['a'])
+        self.assertIsNone(cache.get(('core.Tag', 1, 'b')))
+
+    @patch('recipe.autocomplete.time.monotonic')
+    def test_entries_expire(self, patched_monotonic):
+        """Test entries are ignored after their TTL."""
+        cache = PrefixCache(ttl=30)
+        patched_monotonic.return_value = 100
+        cache.set(('core.Tag', 1, 'a'), ['a'])
+
+        patched_monotonic.return_value = 131
+
+        self.assertIsNone(cache.get(('core.Tag', 1, 'a')))
+
+    def test_invalidate_is_per_user(self):
+        """Test invalidation leaves other users' prefixes alone."""
+        cache = PrefixCache()
+        cache.set(('core.Tag', 1, 'a'), ['a'])
+        cache.set(('core.Tag', 2, 'a'), ['b'])
+
+        cache.invalidate('core.Tag', 1)
+
+        self.assertIsNone(cache.get(('core.Tag', 1, 'a')))
+        self.assertEqual(cache.get(('core.Tag', 2, 'a')), ['b'])
+
+
+class SearchTests(SimpleTestCase):
+    """Test the autocomplete query."""
+
+    def test_prefix_uses_ilike(self):
+        """Test the prefix match can use the trigram index on the column."""
+        sql, params = search(Tag.objects.all(), 've_g').query.sql_with_params()
+
+        self.assertIn('"core_tag"."name" ILIKE', sql)
+        self.assertNotIn('UPPER(', sql)
+        self.assertIn('ve\\_g%', params)
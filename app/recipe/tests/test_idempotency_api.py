@@ -0,0 +1,147 @@
+"""
+Tests for Idempotency-Key handling on recipe writes.
+"""
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import IdempotencyKey, Recipe, Tag
+from recipe.views import RecipeViewSet
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+PAYLOAD = {
+    'title': 'Pancakes',
+    'time_minutes': 20,
+    'price': Decimal('3.50'),
+    'tags': [{'name': 'Breakfast'}],
+}
+
+
+def create_user(email='idem@example.com'):
+    """Create and return a user."""
+    return get_user_model().objects.create_user(email, 'testpass123')
+
+
+class IdempotencyApiTests(TestCase):
+    """Test retried writes are replayed."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def post(self, key, payload=PAYLOAD):
+        return self.client.post(
+            RECIPES_URL, payload, format='json', HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_first_response(self):
+        """Test a retried create returns the stored response."""
+        first = self.post('abc')
+        second = self.post('abc')
+
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(Tag.objects.get(user=self.user).usage, 1)
+
+    def test_without_key_not_deduplicated(self):
+        """Test requests without a key behave as before."""
+        self.client.post(RECIPES_URL, PAYLOAD, format='json')
+        self.client.post(RECIPES_URL, PAYLOAD, format='json')
+
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_key_reused_for_different_body(self):
+        """Test reusing a key for another request is rejected."""
+        self.post('abc')
+        res = self.post('abc', dict(PAYLOAD, title='Waffles'))
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+
+    def test_keys_scoped_to_user(self):
+        """Test another user's key does not replay."""
+        self.post('abc')
+        self.client.force_authenticate(create_user('other@example.com'))
+        res = self.post('abc')
+
+        self.assertNotIn('Idempotent-Replayed', res)
+        self.assertEqual(Recipe.objects.count(), 2)
+
+    def test_failed_request_not_stored(self):
+        """Test a rejected request can be retried with the same key."""
+        self.post('abc', {'title': 'Missing fields'})
+        res = self.post('abc')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', res)
+
+    def test_expired_key_runs_again(self):
+        """Test keys past their TTL are pruned and not replayed."""
+        self.post('abc')
+        IdempotencyKey.objects.update(
+            created_at=timezone.now() - timedelta(days=2),
+        )
+
+        call_command('prune_idempotency_keys')
+
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.post('abc')
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+
+class ConcurrentIdempotencyTests(TransactionTestCase):
+    """Test concurrent duplicates wait for the in-flight request."""
+
+    def test_duplicate_waits_and_replays(self):
+        user = create_user()
+        release = threading.Event()
+        perform_create = RecipeViewSet.perform_create
+        responses = []
+
+        def slow_create(view, serializer):
+            release.wait(5)
+            perform_create(view, serializer)
+
+        def send():
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                responses.append(client.post(
+                    RECIPES_URL, PAYLOAD, format='json',
+                    HTTP_IDEMPOTENCY_KEY='abc',
+                ))
+            finally:
+                connection.close()
+
+        with patch.object(RecipeViewSet, 'perform_create', slow_create):
+            threads = [threading.Thread(target=send) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            time.sleep(0.3)
+            release.set()
+            for thread in threads:
+                thread.join(10)
+
+        self.assertEqual(Recipe.objects.count(), 1)
+        self.assertEqual(
+            [res.status_code for res in responses],
+            [status.HTTP_201_CREATED] * 2,
+        )
+        self.assertEqual(responses[0].data['id'], responses[1].data['id'])
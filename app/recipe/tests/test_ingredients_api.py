@@ -71,7 +71,7 @@ class PrivateIngredientsApiTest(TestCase):
 
         res = self.client.get(INGREDIENTS_URL)
 
-        ingredients = Ingredients.objects.all().order_by('-name')
+        ingredients = Ingredients.objects.all().order_by('-catalog__name')
         serializer = IngredientSerializer(ingredients, many = True )
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
@@ -113,7 +113,7 @@ class PrivateIngredientsApiTest(TestCase):
         self.assertEqual(len(recipe.ingredients.all()),len(new_ingredients['ingredients']))
         for ingredients in new_ingredients['ingredients']:
             exists = recipe.ingredients.filter(
-                name = ingredients['name'],
+                catalog__name = ingredients['name'],
                 user = self.user,
             ).exists()
             self.assertTrue(exists)
@@ -144,7 +144,7 @@ class PrivateIngredientsApiTest(TestCase):
         
         for each_ingredient in new_ingredient['ingredients']:
             exists = recipe.ingredients.filter(
-                name = each_ingredient['name'],
+                catalog__name = each_ingredient['name'],
                 user = self.user,
             ).exists()
             self.assertTrue(exists)
@@ -165,3 +165,33 @@ class PrivateIngredientsApiTest(TestCase):
 
          
 
+
+    def test_ingredient_spelling_kept_per_user(self):
+        """Test users sharing a catalog entry each keep their own spelling."""
+        user2 = create_user(email='user2@example.com')
+        client2 = APIClient()
+        client2.force_authenticate(user=user2)
+        payload = dict(DEFAULT_RECIPE, ingredients=[{'name': 'SALT'}])
+        self.client.post(RECIPE_URL, payload, format='json')
+        payload = dict(DEFAULT_RECIPE, ingredients=[{'name': 'salt'}])
+        client2.post(RECIPE_URL, payload, format='json')
+
+        res = client2.get(INGREDIENTS_URL)
+
+        self.assertEqual([i['name'] for i in res.data], ['salt'])
+        url = detail_url(res.data[0]['id'])
+        res = client2.patch(url, {'name': 'Salt'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['name'], 'Salt')
+        res = self.client.get(INGREDIENTS_URL)
+        self.assertEqual([i['name'] for i in res.data], ['SALT'])
+
+    def test_ingredient_name_longer_when_casefolded(self):
+        """Test a name whose catalog key outgrows the name is accepted."""
+        payload = dict(DEFAULT_RECIPE, ingredients=[{'name': 'ß' * 200}])
+
+        res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['ingredients'][0]['name'], 'ß' * 200)
@@ -0,0 +1,128 @@
+"""
+Tests for the cached recipe, tag and ingredient lists.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import jobs
+from core.models import Job, Tag
+
+from recipe import list_cache
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+TOKEN_URL = reverse('user:token')
+
+PAYLOAD = {
+    'title': 'Omelette',
+    'time_minutes': 10,
+    'price': Decimal('2.50'),
+    'tags': [{'name': 'Breakfast'}],
+}
+
+
+class ListCacheApiTests(TestCase):
+    """Test list responses are cached per user version."""
+
+    def setUp(self):
+        caches['lists'].clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'lists@example.com', 'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.client.post(RECIPES_URL, PAYLOAD, format='json')
+
+    def test_cached_list_skips_queries(self):
+        """Test a repeated list only reads the version."""
+        first = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(1):
+            second = self.client.get(RECIPES_URL)
+
+        self.assertEqual(second.data, first.data)
+
+    def test_recipe_write_invalidates(self):
+        """Test new recipes appear immediately."""
+        self.client.get(RECIPES_URL)
+        self.client.post(
+            RECIPES_URL, dict(PAYLOAD, title='Toast'), format='json',
+        )
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(
+            [recipe['title'] for recipe in res.data], ['Toast', 'Omelette'],
+        )
+
+    def test_tag_rename_invalidates(self):
+        """Test renamed tags show in cached tag and recipe lists."""
+        self.client.get(TAGS_URL)
+        self.client.get(RECIPES_URL)
+        tag = Tag.objects.get(user=self.user)
+
+        self.client.patch(
+            reverse('recipe:tag-detail', args=[tag.id]), {'name': 'Brunch'},
+        )
+
+        self.assertEqual(self.client.get(TAGS_URL).data[0]['name'], 'Brunch')
+        self.assertEqual(
+            self.client.get(RECIPES_URL).data[0]['tags'][0]['name'], 'Brunch',
+        )
+
+
+class WarmupTests(TestCase):
+    """Test cache warming on token issuance."""
+
+    def setUp(self):
+        caches['lists'].clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'warm@example.com', 'testpass123',
+        )
+        self.credentials = {
+            'email': 'warm@example.com', 'password': 'testpass123',
+        }
+
+    def test_warmup_disabled_by_default(self):
+        """Test no job is queued unless warming is enabled."""
+        res = self.client.post(TOKEN_URL, self.credentials)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(CACHE_WARMING=True)
+    def test_login_queues_single_warmup(self):
+        """Test logins queue one pending warm-up per user."""
+        self.client.post(TOKEN_URL, self.credentials)
+        self.client.post(TOKEN_URL, self.credentials)
+
+        job = Job.objects.get()
+        self.assertEqual(job.task, list_cache.WARM_TASK)
+        self.assertEqual(job.args, [self.user.id])
+
+    @override_settings(CACHE_WARMING=True, CACHE_WARMING_MAX_PENDING=1)
+    def test_warmups_capped(self):
+        """Test warm-ups are dropped once too many are pending."""
+        list_cache.schedule_warmup(self.user.id + 1)
+        list_cache.schedule_warmup(self.user.id)
+
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_warmup_job_fills_cache(self):
+        """Test running the job makes the next list a cache hit."""
+        self.client.force_authenticate(self.user)
+        self.client.post(RECIPES_URL, PAYLOAD, format='json')
+        jobs.discover()
+
+        jobs.run_job(Job.objects.enqueue(list_cache.WARM_TASK, self.user.id))
+
+        with self.assertNumQueries(1):
+            self.client.get(TAGS_URL)
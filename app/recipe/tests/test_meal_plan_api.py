@@ -0,0 +1,180 @@
+"""
+Tests for the meal plan API.
+"""
+from decimal import Decimal
+
+import numpy as np
+from scipy import sparse
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe.meal_plan import NoPlanError, plan_meals
+
+MEAL_PLAN_URL = reverse('recipe:recipe-meal-plan')
+
+
+def tag_matrix(rows, tags):
+    """Return a recipe x tag matrix from per-recipe tag columns."""
+    matrix = np.zeros((len(rows), tags), dtype=np.int32)
+    for row, columns in enumerate(rows):
+        matrix[row, columns] = 1
+    return sparse.csr_matrix(matrix)
+
+
+class PlanMealsTests(SimpleTestCase):
+    """Test the meal plan solver."""
+
+    def test_respects_budget_and_time(self):
+        """Test the plan stays within the budget and time limit."""
+        prices = np.array([500, 100, 200, 300, 900])
+        times = np.array([10, 10, 90, 10, 10])
+        tags = tag_matrix([[0], [0], [1], [1], [2]], 3)
+
+        rows = plan_meals(prices, times, tags, days=2, budget=600,
+                          max_time=30)
+
+        self.assertNotIn(2, rows)
+        self.assertLessEqual(prices[rows].sum(), 600)
+        self.assertEqual(len(set(rows)), 2)
+
+    def test_prefers_new_tags(self):
+        """Test recipes covering unused tags are picked first."""
+        prices = np.array([100, 110, 120])
+        times = np.array([10, 10, 10])
+        tags = tag_matrix([[0], [0], [1]], 2)
+
+        rows = plan_meals(prices, times, tags, days=2, budget=1000,
+                          max_time=30)
+
+        self.assertEqual(sorted(rows), [0, 2])
+
+    def test_max_per_tag(self):
+        """Test no tag is used more often than allowed."""
+        prices = np.array([100, 100, 100, 500])
+        times = np.array([10, 10, 10, 10])
+        tags = tag_matrix([[0], [0], [0], [1]], 2)
+
+        rows = plan_meals(prices, times, tags, days=2, budget=1000,
+                          max_time=30, max_per_tag=1)
+
+        self.assertIn(3, rows)
+
+    def test_reserve_respects_max_per_tag(self):
+        """Test budget is kept for a completion the tag limit allows."""
+        prices = np.array([200, 100, 300])
+        times = np.array([10, 10, 10])
+        tags = tag_matrix([[0, 1], [0], []], 2)
+
+        rows = plan_meals(prices, times, tags, days=2, budget=450,
+                          max_time=30, max_per_tag=1)
+
+        self.assertEqual(rows, [1, 2])
+
+    def test_infeasible_budget(self):
+        """Test an impossible budget raises NoPlanError."""
+        prices = np.array([500, 500])
+        times = np.array([10, 10])
+        tags = tag_matrix([[], []], 1)
+
+        with self.assertRaises(NoPlanError):
+            plan_meals(prices, times, tags, days=2, budget=900, max_time=30)
+
+
+class PrivateMealPlanApiTests(TestCase):
+    """Test authenticated meal plan requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='plan@example.com', password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def create_recipe(self, price, time_minutes, tag):
+        """Create and return a tagged recipe."""
+        recipe = Recipe.objects.create(
+            user=self.user, title=f'{tag} recipe', price=Decimal(price),
+            time_minutes=time_minutes,
+        )
+        recipe.tags.add(Tag.objects.get_or_create(user=self.user, name=tag)[0])
+        return recipe
+
+    def test_meal_plan(self):
+        """Test a plan is returned with its total price."""
+        cheap = self.create_recipe('2.50', 10, 'Thai')
+        other = self.create_recipe('3.00', 20, 'Italian')
+        self.create_recipe('1.00', 120, 'Slow')
+        self.create_recipe('40.00', 10, 'Fancy')
+
+        res = self.client.post(MEAL_PLAN_URL, {
+            'days': 2,
+            'budget': '10.00',
+            'max_time_minutes': 30,
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(recipe['id'] for recipe in res.data['recipes']),
+            [cheap.id, other.id],
+        )
+        self.assertEqual(res.data['total_price'], '5.50')
+
+    def test_meal_plan_varies_without_seed(self):
+        """Test ties are broken randomly unless a seed is given."""
+        self.create_recipe('2.00', 10, 'Thai')
+        self.create_recipe('2.00', 10, 'Italian')
+        payload = {'days': 1, 'budget': '10.00', 'max_time_minutes': 30}
+
+        picks = {
+            self.client.post(MEAL_PLAN_URL, payload, format='json')
+            .data['recipes'][0]['id']
+            for _ in range(20)
+        }
+        seeded = {
+            self.client.post(
+                MEAL_PLAN_URL, {**payload, 'seed': 7}, format='json',
+            ).data['recipes'][0]['id']
+            for _ in range(5)
+        }
+
+        self.assertEqual(len(picks), 2)
+        self.assertEqual(len(seeded), 1)
+
+    @override_settings(DEFERRED_DELETES=True)
+    def test_deleted_tags_not_capped(self):
+        """Test tags waiting for a deferred purge do not count."""
+        self.create_recipe('2.00', 10, 'Thai')
+        self.create_recipe('3.00', 10, 'Thai')
+        thai = Tag.objects.get(user=self.user, name='Thai')
+        payload = {
+            'days': 2,
+            'budget': '10.00',
+            'max_time_minutes': 30,
+            'max_per_tag': 1,
+        }
+        res = self.client.post(MEAL_PLAN_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.delete(reverse('recipe:tag-detail', args=[thai.id]))
+        res = self.client.post(MEAL_PLAN_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['recipes']), 2)
+
+    def test_meal_plan_infeasible(self):
+        """Test an impossible plan returns a 400."""
+        self.create_recipe('20.00', 10, 'Thai')
+
+        res = self.client.post(MEAL_PLAN_URL, {
+            'days': 1,
+            'budget': '5.00',
+            'max_time_minutes': 30,
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,139 @@
+"""
+Tests for serving recipe images.
+"""
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from recipe.serializers import RecipeDetailSerializer
+
+IMAGE = bytes(range(256)) * 4
+
+
+def image_url(recipe, filename='image.jpg'):
+    """Return the image URL for a recipe."""
+    return reverse('recipe:recipe-image', args=[recipe.id, filename])
+
+
+class RecipeImageApiTests(TestCase):
+    """Test the authenticated image view."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        os.makedirs(os.path.join(self.media_root, 'uploads', 'recipe'))
+        with open(os.path.join(
+            self.media_root, 'uploads', 'recipe', 'image.jpg',
+        ), 'wb') as file:
+            file.write(IMAGE)
+
+        self.user = get_user_model().objects.create_user(
+            email='media@example.com', password='testpass123',
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Pie',
+            time_minutes=5,
+            price=Decimal('1.00'),
+            image='uploads/recipe/image.jpg',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_serves_whole_file(self):
+        """Test the image is streamed with immutable cache headers."""
+        res = self.client.get(image_url(self.recipe), HTTP_ACCEPT='image/*')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(res.streaming_content), IMAGE)
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertIn('immutable', res['Cache-Control'])
+        self.assertIn('private', res['Cache-Control'])
+
+    def test_range_request(self):
+        """Test a byte range is served as partial content."""
+        res = self.client.get(image_url(self.recipe), HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(res.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(res.streaming_content), IMAGE[10:20])
+        self.assertEqual(res['Content-Length'], '10')
+        self.assertEqual(res['Content-Range'], f'bytes 10-19/{len(IMAGE)}')
+
+    def test_suffix_range_request(self):
+        """Test a suffix range returns the end of the file."""
+        res = self.client.get(image_url(self.recipe), HTTP_RANGE='bytes=-5')
+
+        self.assertEqual(res.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(res.streaming_content), IMAGE[-5:])
+
+    def test_unsatisfiable_range(self):
+        """Test a range past the end of the file is rejected."""
+        res = self.client.get(
+            image_url(self.recipe), HTTP_RANGE=f'bytes={len(IMAGE)}-',
+        )
+
+        self.assertEqual(
+            res.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+        )
+        self.assertEqual(res['Content-Range'], f'bytes */{len(IMAGE)}')
+
+    @override_settings(
+        MEDIA_SERVE_BACKEND='x-accel', MEDIA_ACCEL_PREFIX='/protected/',
+    )
+    def test_x_accel_redirect(self):
+        """Test nginx is handed the file instead of the app sending it."""
+        res = self.client.get(image_url(self.recipe))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res['X-Accel-Redirect'], '/protected/uploads/recipe/image.jpg',
+        )
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+
+    @override_settings(MEDIA_SERVE_BACKEND='x-sendfile')
+    def test_x_sendfile(self):
+        """Test the absolute path is passed in X-Sendfile."""
+        res = self.client.get(image_url(self.recipe))
+
+        self.assertEqual(
+            res['X-Sendfile'],
+            os.path.join(self.media_root, 'uploads', 'recipe', 'image.jpg'),
+        )
+
+    def test_other_users_image_not_found(self):
+        """Test images are only served to the recipe owner."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123',
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(image_url(self.recipe))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stale_filename_not_found(self):
+        """Test a URL for a replaced image no longer resolves."""
+        res = self.client.get(image_url(self.recipe, 'old.jpg'))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_detail_includes_image_url(self):
+        """Test the recipe detail links to the image view."""
+        data = RecipeDetailSerializer(self.recipe).data
+
+        self.assertEqual(data['image_url'], image_url(self.recipe))
@@ -0,0 +1,117 @@
+"""
+Tests for paginated recipe, tag and ingredient lists.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import RecipeStats, Tag
+from core.pagination import EstimatedCountPaginator
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class PaginationApiTests(TestCase):
+    """Test opt-in pagination with estimated counts."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'pages@example.com', 'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        for name in ('A', 'B', 'C'):
+            Tag.objects.create(user=self.user, name=name)
+
+    def test_unpaginated_by_default(self):
+        """Test the plain list is still an array."""
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(len(res.data), 3)
+
+    def test_small_list_counted_exactly(self):
+        """Test small lists report an exact count."""
+        res = self.client.get(TAGS_URL, {'page_size': 2})
+
+        self.assertEqual(res.data['count'], 3)
+        self.assertFalse(res.data['count_estimated'])
+        self.assertEqual(
+            [tag['name'] for tag in res.data['results']], ['C', 'B'],
+        )
+        self.assertIsNotNone(res.data['next'])
+
+    def test_recipe_count_from_stats(self):
+        """Test recipe lists use the maintained count without COUNT(*)."""
+        for title in ('Soup', 'Stew'):
+            self.client.post(RECIPES_URL, {
+                'title': title, 'time_minutes': 5, 'price': Decimal('1.00'),
+            }, format='json')
+
+        with patch.object(
+            EstimatedCountPaginator, 'exact_count_threshold', 0,
+        ), patch('core.pagination.estimate_count') as estimate:
+            res = self.client.get(RECIPES_URL, {'page': 1})
+
+        estimate.assert_not_called()
+        self.assertEqual(res.data['count'], 2)
+        self.assertTrue(res.data['count_estimated'])
+
+    def test_small_recipe_count_exact(self):
+        """Test a small maintained count is confirmed with an exact count."""
+        for title in ('Soup', 'Stew'):
+            self.client.post(RECIPES_URL, {
+                'title': title, 'time_minutes': 5, 'price': Decimal('1.00'),
+            }, format='json')
+        RecipeStats.objects.filter(user=self.user).update(recipe_count=5)
+
+        with patch('core.pagination.estimate_count') as estimate:
+            res = self.client.get(RECIPES_URL, {'page': 1})
+
+        estimate.assert_not_called()
+        self.assertEqual(res.data['count'], 2)
+        self.assertFalse(res.data['count_estimated'])
+
+    def test_low_stats_count_does_not_hide_pages(self):
+        """Test pages past a drifted counter are still served."""
+        for title in ('Soup', 'Stew', 'Curry'):
+            self.client.post(RECIPES_URL, {
+                'title': title, 'time_minutes': 5, 'price': Decimal('1.00'),
+            }, format='json')
+        RecipeStats.objects.filter(user=self.user).update(recipe_count=1)
+
+        res = self.client.get(RECIPES_URL, {'page_size': 1, 'page': 3})
+        past = self.client.get(RECIPES_URL, {'page_size': 1, 'page': 4})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['title'], 'Soup')
+        self.assertIsNone(res.data['next'])
+        self.assertEqual(past.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_large_list_estimated(self):
+        """Test large lists flag the estimate and page without the count."""
+        with patch.object(
+            EstimatedCountPaginator, 'exact_count_threshold', 0,
+        ), patch('core.pagination.estimate_count', return_value=1):
+            first = self.client.get(TAGS_URL, {'page_size': 2})
+            last = self.client.get(TAGS_URL, {'page_size': 2, 'page': 2})
+            past = self.client.get(TAGS_URL, {'page_size': 2, 'page': 3})
+
+        self.assertEqual(first.data['count'], 1)
+        self.assertTrue(first.data['count_estimated'])
+        self.assertIsNotNone(first.data['next'])
+        self.assertEqual([tag['name'] for tag in last.data['results']], ['A'])
+        self.assertIsNone(last.data['next'])
+        self.assertEqual(past.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_page(self):
+        """Test a non-numeric page is rejected."""
+        res = self.client.get(TAGS_URL, {'page': 'two'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,137 @@
+"""
+Tests for the pantry matching API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredients
+from recipe.pantry import PantryIndex, pantry_indexes
+
+RECIPES_URL = reverse('recipe:recipe-list')
+PANTRY_URL = reverse('recipe:recipe-pantry')
+
+
+def snapshot(*ingredients):
+    """Return an index snapshot."""
+    return {'tags': [], 'ingredients': list(ingredients)}
+
+
+class PantryIndexTests(SimpleTestCase):
+    """Test the in-memory bitset index."""
+
+    def setUp(self):
+        self.index = PantryIndex({
+            1: snapshot(5, 6, 7),
+            2: snapshot(5),
+            3: snapshot(),
+            4: snapshot(8, 9),
+        })
+
+    def test_ranked_by_missing_then_coverage(self):
+        """Test recipes missing fewer ingredients rank first."""
+        self.assertEqual(self.index.match([5, 6]), [
+            (2, [], 1),
+            (1, [7], 3),
+            (4, [8, 9], 2),
+        ])
+
+    def test_max_missing(self):
+        """Test recipes missing too many ingredients are dropped."""
+        self.assertEqual(
+            [row[0] for row in self.index.match([5], max_missing=0)], [2],
+        )
+
+    def test_updates(self):
+        """Test rows are rewritten, added and removed."""
+        self.index.update(4, snapshot(5, 6))
+        self.index.update(3, snapshot(10))
+        self.index.update(2, None)
+
+        self.assertEqual(self.index.match([5, 6], max_missing=1), [
+            (4, [], 2),
+            (1, [7], 3),
+            (3, [10], 1),
+        ])
+
+    def test_wide_bitsets(self):
+        """Test ingredients spanning many bytes are matched."""
+        index = PantryIndex({
+            1: snapshot(*range(1, 100)),
+            2: snapshot(3, 97),
+        })
+
+        self.assertEqual(index.match([3, 97]), [
+            (2, [], 2),
+            (1, [i for i in range(1, 100) if i not in (3, 97)], 99),
+        ])
+
+
+class PrivatePantryApiTests(TestCase):
+    """Test authenticated pantry requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='pantry@example.com', password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        pantry_indexes.clear()
+
+    def post_recipe(self, ingredients):
+        """Create a recipe through the API and return its id."""
+        payload = {
+            'title': 'Recipe',
+            'time_minutes': 10,
+            'price': Decimal('1.00'),
+            'ingredients': [{'name': name} for name in ingredients],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+        return res.data['id']
+
+    def test_pantry_matches(self):
+        """Test recipes are ranked with their missing ingredients."""
+        omelette = self.post_recipe(['Egg', 'Butter'])
+        cake = self.post_recipe(['Egg', 'Flour', 'Sugar'])
+        egg = Ingredients.objects.get(user=self.user, catalog__name='Egg')
+        butter = Ingredients.objects.get(user=self.user, catalog__name='Butter')
+        flour = Ingredients.objects.get(user=self.user, catalog__name='Flour')
+        sugar = Ingredients.objects.get(user=self.user, catalog__name='Sugar')
+
+        res = self.client.get(
+            PANTRY_URL, {'ingredients': f'{egg.id},{butter.id},{flour.id}'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in res.data], [omelette, cake])
+        self.assertEqual(res.data[0]['missing'], 0)
+        self.assertEqual(res.data[1]['missing_ingredients'], [sugar.id])
+        self.assertEqual(res.data[1]['coverage'], 0.6667)
+
+    @override_settings(DEFERRED_DELETES=True)
+    def test_deleted_ingredients_not_missing(self):
+        """Test ingredients waiting for a deferred purge are not needed."""
+        cake = self.post_recipe(['Egg', 'Flour'])
+        egg = Ingredients.objects.get(user=self.user, catalog__name='Egg')
+        flour = Ingredients.objects.get(user=self.user, catalog__name='Flour')
+        self.client.get(PANTRY_URL, {'ingredients': f'{egg.id}'})
+
+        self.client.delete(
+            reverse('recipe:ingredients-detail', args=[flour.id]),
+        )
+        res = self.client.get(PANTRY_URL, {'ingredients': f'{egg.id}'})
+
+        self.assertEqual([item['id'] for item in res.data], [cake])
+        self.assertEqual(res.data[0]['missing_ingredients'], [])
+        self.assertEqual(res.data[0]['coverage'], 1)
+
+    def test_invalid_ingredients(self):
+        """Test malformed ingredient ids are rejected."""
+        res = self.client.get(PANTRY_URL, {'ingredients': '1,salt'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
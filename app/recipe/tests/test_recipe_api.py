@@ -3,7 +3,9 @@
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
@@ -12,6 +14,7 @@ from rest_framework.test import APIClient
 from core.models import  ( 
     Recipe,
     Tag,
+    Ingredients,
 )
 
 from recipe.serializers import (
@@ -283,7 +286,31 @@ class PrivateRecipeApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(recipe.tags.count(), 0)
 
-        
-        
+    def test_update_single_tag_touches_only_changed_links(self):
+        """Test swapping one tag inserts and deletes a single link."""
+        recipe = create_recipe(user = self.user)
+        for name in ['Breakfast', 'Lunch', 'Vegan']:
+            recipe.tags.add(Tag.objects.create(user=self.user, name=name))
+        ingredient = Ingredients.objects.create(user=self.user, name='Salt')
+        recipe.ingredients.add(ingredient)
 
+        payload = {
+            'tags': [{'name': 'Breakfast'}, {'name': 'Lunch'}, {'name': 'Dinner'}],
+            'ingredients': [{'name': 'Salt'}],
+        }
+        url = detail_url(recipe.id)
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(url, payload, format='json')
 
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        writes = [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith(('INSERT', 'DELETE'))
+            and '_recipe_' in q['sql']
+        ]
+        self.assertEqual(len(writes), 2)
+        self.assertEqual(
+            sorted(recipe.tags.values_list('name', flat=True)),
+            ['Breakfast', 'Dinner', 'Lunch'],
+        )
+        self.assertEqual(list(recipe.ingredients.all()), [ingredient])
@@ -0,0 +1,109 @@
+"""
+Tests for the shopping list API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredients, Recipe
+
+SHOPPING_LIST_URL = reverse('recipe:recipe-shopping-list')
+
+
+def create_recipe(user, ingredients):
+    """Create and return a recipe with the named ingredients."""
+    recipe = Recipe.objects.create(
+        user=user, title='Recipe', time_minutes=5, price=Decimal('1.00'),
+    )
+    recipe.ingredients.add(
+        *Ingredients.objects.for_names(user, ingredients)[0]
+    )
+    return recipe
+
+
+class PrivateShoppingListApiTests(TestCase):
+    """Test authenticated shopping list requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='shop@example.com', password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_shopping_list_merges_ingredients(self):
+        """Test ingredients are de-duplicated with counts and sources."""
+        soup = create_recipe(self.user, ['Salt', 'Onion'])
+        stew = create_recipe(self.user, ['Salt', 'Beef'])
+        create_recipe(self.user, ['Sugar'])
+
+        res = self.client.post(
+            SHOPPING_LIST_URL, {'recipes': [soup.id, stew.id]}, format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item['name'], item['count']) for item in res.data],
+            [('Beef', 1), ('Onion', 1), ('Salt', 2)],
+        )
+        self.assertEqual(res.data[2]['recipes'], [soup.id, stew.id])
+
+    @override_settings(DEFERRED_DELETES=True)
+    def test_shopping_list_skips_deleted_ingredients(self):
+        """Test ingredients waiting for a deferred purge are left out."""
+        soup = create_recipe(self.user, ['Salt', 'Onion'])
+        onion = Ingredients.objects.get(user=self.user, catalog__name='Onion')
+        self.client.delete(
+            reverse('recipe:ingredients-detail', args=[onion.id]),
+        )
+
+        res = self.client.post(
+            SHOPPING_LIST_URL, {'recipes': [soup.id]}, format='json',
+        )
+
+        self.assertEqual([item['name'] for item in res.data], ['Salt'])
+
+    def test_shopping_list_single_query(self):
+        """Test the list is built in one query for many recipes."""
+        recipes = [
+            create_recipe(self.user, [f'Item {i}', 'Salt']) for i in range(50)
+        ]
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(
+                SHOPPING_LIST_URL,
+                {'recipes': [recipe.id for recipe in recipes]},
+                format='json',
+            )
+
+        self.assertEqual(len(res.data), 51)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_shopping_list_limited_to_user(self):
+        """Test other users' recipes are ignored."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123',
+        )
+        recipe = create_recipe(other, ['Salt'])
+
+        res = self.client.post(
+            SHOPPING_LIST_URL, {'recipes': [recipe.id]}, format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
+
+    def test_shopping_list_requires_recipes(self):
+        """Test an empty selection is rejected."""
+        res = self.client.post(
+            SHOPPING_LIST_URL, {'recipes': []}, format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
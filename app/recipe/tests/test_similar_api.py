@@ -0,0 +1,148 @@
+"""
+Tests for the similar recipes API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag
+from recipe.similarity import SimilarityIndex, similarity_indexes
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def similar_url(recipe_id):
+    """Return the similar recipes URL for a recipe."""
+    return reverse('recipe:recipe-similar', args=[recipe_id])
+
+
+def snapshot(tags=(), ingredients=()):
+    """Return an index snapshot."""
+    return {'tags': list(tags), 'ingredients': list(ingredients)}
+
+
+class SimilarityIndexTests(SimpleTestCase):
+    """Test the in-memory similarity index."""
+
+    def setUp(self):
+        self.index = SimilarityIndex({
+            1: snapshot([1, 2], [1]),
+            2: snapshot([1, 2], [2]),
+            3: snapshot([1], []),
+            4: snapshot([], [9]),
+        })
+
+    def test_jaccard_ranking(self):
+        """Test recipes are ranked by Jaccard similarity."""
+        self.assertEqual(
+            self.index.similar(1), [(2, 0.5), (3, 1 / 3)],
+        )
+
+    def test_cosine_ranking(self):
+        """Test the cosine metric."""
+        ranked = self.index.similar(3, metric='cosine')
+
+        self.assertEqual([recipe_id for recipe_id, _ in ranked], [1, 2])
+        self.assertAlmostEqual(ranked[0][1], 1 / 3 ** 0.5, places=5)
+
+    def test_update_and_delete_rows(self):
+        """Test rows can be replaced and removed incrementally."""
+        self.index.update(4, snapshot([1, 2], [1]))
+        self.index.update(2, None)
+
+        self.assertEqual(self.index.similar(1), [(4, 1.0), (3, 1 / 3)])
+
+    def test_limit(self):
+        """Test only the top results are returned."""
+        self.assertEqual(self.index.similar(1, limit=1), [(2, 0.5)])
+
+
+class PrivateSimilarApiTests(TestCase):
+    """Test authenticated similar recipe requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='similar@example.com', password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        similarity_indexes.clear()
+
+    def post_recipe(self, tags, ingredients):
+        """Create a recipe through the API and return its id."""
+        payload = {
+            'title': 'Recipe',
+            'time_minutes': 10,
+            'price': Decimal('1.00'),
+            'tags': [{'name': name} for name in tags],
+            'ingredients': [{'name': name} for name in ingredients],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+        return res.data['id']
+
+    def test_similar_recipes(self):
+        """Test similar recipes are ranked and exclude the recipe."""
+        curry = self.post_recipe(['Thai', 'Dinner'], ['Rice', 'Chili'])
+        close = self.post_recipe(['Thai', 'Dinner'], ['Rice'])
+        far = self.post_recipe(['Dinner'], ['Pasta'])
+        self.post_recipe(['Dessert'], ['Sugar'])
+
+        res = self.client.get(similar_url(curry))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in res.data], [close, far])
+        self.assertEqual(res.data[0]['similarity'], 0.75)
+
+    def test_index_refreshed_after_update(self):
+        """Test the cached index picks up recipe writes."""
+        curry = self.post_recipe(['Thai'], ['Rice'])
+        other = self.post_recipe(['Italian'], ['Pasta'])
+        self.client.get(similar_url(curry))
+
+        self.client.patch(
+            reverse('recipe:recipe-detail', args=[other]),
+            {'tags': [{'name': 'Thai'}]},
+            format='json',
+        )
+        res = self.client.get(similar_url(curry))
+
+        self.assertEqual([item['id'] for item in res.data], [other])
+
+    @override_settings(DEFERRED_DELETES=True)
+    def test_deleted_tags_not_shared(self):
+        """Test tags waiting for a deferred purge no longer link recipes."""
+        curry = self.post_recipe(['Thai', 'Dinner'], ['Rice'])
+        self.post_recipe(['Dinner'], ['Pasta'])
+        self.client.get(similar_url(curry))
+        dinner = Tag.objects.get(user=self.user, name='Dinner')
+
+        self.client.delete(reverse('recipe:tag-detail', args=[dinner.id]))
+        res = self.client.get(similar_url(curry))
+
+        self.assertEqual(res.data, [])
+
+    def test_invalid_metric(self):
+        """Test an unknown metric is rejected."""
+        curry = self.post_recipe(['Thai'], ['Rice'])
+
+        res = self.client.get(similar_url(curry), {'metric': 'euclid'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_users_recipe_not_found(self):
+        """Test another user's recipe cannot be used."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123',
+        )
+        self.client.force_authenticate(other)
+        recipe_id = self.post_recipe(['Thai'], ['Rice'])
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(similar_url(recipe_id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
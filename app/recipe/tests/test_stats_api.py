@@ -0,0 +1,166 @@
+"""
+Tests for the recipe stats API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, RecipeStats, Tag
+from recipe.serializers import RecipeSerializer
+
+STATS_URL = reverse('recipe:stats')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_user(email='stats@example.com', password='testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+class PublicStatsApiTests(TestCase):
+    """Test unauthenticated API requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        """Test auth is required to retrieve stats."""
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateStatsApiTests(TestCase):
+    """Test authenticated API requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def post_recipe(self, **params):
+        """Create a recipe through the API."""
+        payload = {
+            'title': 'Sample recipe',
+            'time_minutes': 10,
+            'price': Decimal('4.50'),
+            'tags': [{'name': 'Dinner'}],
+            'ingredients': [{'name': 'Salt'}],
+        }
+        payload.update(params)
+        res = self.client.post(RECIPES_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data['id']
+
+    def test_stats_track_create_update_delete(self):
+        """Test stats follow recipe writes without a rebuild."""
+        self.post_recipe(time_minutes=10)
+        recipe_id = self.post_recipe(
+            time_minutes=30,
+            price=Decimal('12.00'),
+            tags=[{'name': 'Dinner'}, {'name': 'Thai'}],
+        )
+        self.post_recipe(time_minutes=20)
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipe_count'], 3)
+        self.assertEqual(res.data['time_minutes']['average'], 20)
+        self.assertEqual(res.data['time_minutes']['p50'], 20)
+        self.assertEqual(res.data['time_minutes']['p99'], 30)
+        self.assertEqual(res.data['price_histogram'], [
+            {'min': '0', 'max': '5', 'count': 2},
+            {'min': '10', 'max': '15', 'count': 1},
+        ])
+        self.assertEqual(res.data['top_tags'][0]['name'], 'Dinner')
+        self.assertEqual(res.data['top_tags'][0]['count'], 3)
+
+        self.client.patch(
+            detail_url(recipe_id), {'tags': [], 'time_minutes': 40},
+            format='json',
+        )
+        self.client.delete(detail_url(recipe_id))
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['recipe_count'], 2)
+        self.assertEqual(res.data['time_minutes']['average'], 15)
+        self.assertEqual(
+            [tag['name'] for tag in res.data['top_tags']], ['Dinner'],
+        )
+
+    def test_update_diffs_against_locked_row(self):
+        """Test an update from a stale instance diffs the current row."""
+        recipe_id = self.post_recipe(time_minutes=10)
+        stale = Recipe.objects.get(id=recipe_id)
+        self.client.patch(
+            detail_url(recipe_id), {'time_minutes': 30}, format='json',
+        )
+
+        serializer = RecipeSerializer(
+            stale, data={'time_minutes': 20}, partial=True,
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        stats = RecipeStats.objects.get(user=self.user)
+        self.assertEqual(stats.time_minutes_total, 20)
+
+    def test_stats_limited_to_user(self):
+        """Test stats only count the authenticated user's recipes."""
+        other = create_user(email='other@example.com')
+        Recipe.objects.create(
+            user=other, title='Other', time_minutes=5, price=Decimal('1'),
+        )
+        self.post_recipe()
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['recipe_count'], 1)
+
+    def test_deleted_tag_dropped_from_stats(self):
+        """Test deleting a tag removes it from the top tags."""
+        self.post_recipe()
+        tag = Tag.objects.get(user=self.user, name='Dinner')
+
+        self.client.delete(reverse('recipe:tag-detail', args=[tag.id]))
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['top_tags'], [])
+
+    def test_rebuild_command_matches_incremental(self):
+        """Test the rebuild command reproduces the incremental stats."""
+        self.post_recipe(time_minutes=10)
+        self.post_recipe(time_minutes=25, tags=[{'name': 'Lunch'}])
+        incremental = self.client.get(STATS_URL).data
+
+        RecipeStats.objects.all().delete()
+        call_command('rebuild_recipe_stats')
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data, incremental)
+
+    def test_missing_stats_rebuilt_on_write(self):
+        """Test a first write for existing recipes counts all of them."""
+        for _ in range(5):
+            Recipe.objects.create(
+                user=self.user, title='Old', time_minutes=5,
+                price=Decimal('1'),
+            )
+        self.post_recipe()
+
+        stats = RecipeStats.objects.get(user=self.user)
+
+        self.assertEqual(stats.recipe_count, 6)
+        self.assertEqual(stats.time_minutes_total, 35)
@@ -0,0 +1,126 @@
+"""
+Tests for the delta sync API.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredients, Recipe, Tag, Tombstone
+
+from recipe import sync
+
+SYNC_URL = reverse('recipe:sync')
+
+
+def create_recipe(user, title):
+    """Create and return a recipe."""
+    return Recipe.objects.create(
+        user=user, title=title, time_minutes=10, price=Decimal('4.00'),
+    )
+
+
+@override_settings(SYNC_OVERLAP_SECONDS=0)
+class SyncApiTests(TestCase):
+    """Test syncing changes since a cursor."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'sync@example.com', 'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.soup = create_recipe(self.user, 'Soup')
+        self.stew = create_recipe(self.user, 'Stew')
+        self.tag = Tag.objects.create(user=self.user, name='Winter')
+        Ingredients.objects.create(user=self.user, name='Leek')
+        create_recipe(
+            get_user_model().objects.create_user('o@example.com', 'pass1234'),
+            'Other',
+        )
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        for model in (Recipe, Tag, Ingredients):
+            model.objects.update(updated_at=an_hour_ago)
+        self.cursor = sync.make_cursor(an_hour_ago + timedelta(minutes=1))
+
+    def test_full_sync_without_cursor(self):
+        """Test the first sync returns every row of the user."""
+        res = self.client.get(SYNC_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data['full'])
+        self.assertEqual(
+            [recipe['title'] for recipe in res.data['recipes']],
+            ['Soup', 'Stew'],
+        )
+        self.assertEqual(len(res.data['tags']), 1)
+        self.assertEqual(len(res.data['ingredients']), 1)
+
+    def test_sync_returns_only_changes(self):
+        """Test only rows changed or deleted after the cursor return."""
+        self.client.patch(
+            reverse('recipe:recipe-detail', args=[self.stew.id]),
+            {'title': 'Beef stew'},
+        )
+        self.client.delete(reverse('recipe:tag-detail', args=[self.tag.id]))
+        self.client.delete(
+            reverse('recipe:recipe-detail', args=[self.soup.id]),
+        )
+
+        res = self.client.get(SYNC_URL, {'since': self.cursor})
+
+        self.assertFalse(res.data['full'])
+        self.assertEqual(
+            [recipe['title'] for recipe in res.data['recipes']], ['Beef stew'],
+        )
+        self.assertEqual(res.data['tags'], [])
+        self.assertEqual(res.data['ingredients'], [])
+        self.assertEqual(res.data['deleted'], {
+            'recipes': [self.soup.id],
+            'tags': [self.tag.id],
+            'ingredients': [],
+        })
+
+    def test_returned_cursor_round_trips(self):
+        """Test syncing from the returned cursor sees no changes."""
+        cursor = self.client.get(SYNC_URL).data['cursor']
+
+        res = self.client.get(SYNC_URL, {'since': cursor})
+
+        self.assertEqual(res.data['recipes'], [])
+        self.assertEqual(res.data['deleted']['recipes'], [])
+
+    def test_expired_cursor_gets_full_sync(self):
+        """Test cursors older than tombstone retention resync fully."""
+        cursor = sync.make_cursor(timezone.now() - timedelta(days=365))
+
+        res = self.client.get(SYNC_URL, {'since': cursor})
+
+        self.assertTrue(res.data['full'])
+        self.assertEqual(len(res.data['recipes']), 2)
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected."""
+        res = self.client.get(SYNC_URL, {'since': 'yesterday'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_prune_tombstones(self):
+        """Test tombstones past retention are pruned."""
+        Tombstone.objects.record(self.user, Tombstone.RECIPE, [1, 2])
+        Tombstone.objects.filter(object_id=1).update(
+            deleted_at=timezone.now() - timedelta(days=90),
+        )
+
+        call_command('prune_tombstones')
+
+        self.assertEqual(
+            list(Tombstone.objects.values_list('object_id', flat=True)), [2],
+        )
@@ -2,11 +2,16 @@
 Tests for the tags API.
 """
 
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.urls import reverse
 from django.test import TestCase
 
-from core.models import Tag
+from core.models import Recipe, Tag
+
+from recipe import autocomplete
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -15,6 +20,8 @@ from recipe.serializers import TagSerializer
 
 
 TAGS_URL = reverse("recipe:tag-list")
+AUTOCOMPLETE_URL = reverse("recipe:tag-autocomplete")
+RECIPES_URL = reverse("recipe:recipe-list")
 
 def detail_url(tag_id):
     """Detail of tag ID"""
@@ -98,7 +105,91 @@ class PrivateTagAPITests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Tag.objects.filter(id=tag.id).exists())
-        
 
-        
-        
+    def test_tag_usage_follows_recipe_writes(self):
+        """Test usage counters move with recipe tag changes."""
+        payload = {
+            'title': 'Curry',
+            'time_minutes': 30,
+            'price': Decimal('5.00'),
+            'tags': [{'name': 'Dinner'}, {'name': 'Thai'}],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+        self.client.post(RECIPES_URL, payload, format='json')
+        recipe_url = reverse("recipe:recipe-detail", args=[res.data['id']])
+        self.client.patch(
+            recipe_url, {'tags': [{'name': 'Dinner'}]}, format='json',
+        )
+
+        dinner = Tag.objects.get(user=self.user, name='Dinner')
+        thai = Tag.objects.get(user=self.user, name='Thai')
+        self.assertEqual(dinner.usage, 2)
+        self.assertEqual(thai.usage, 1)
+
+        self.client.delete(recipe_url)
+        dinner.refresh_from_db()
+        self.assertEqual(dinner.usage, 1)
+
+    def test_tags_ordered_by_usage(self):
+        """Test tags can be ordered by popularity."""
+        Tag.objects.create(user=self.user, name="Rare", usage=1)
+        Tag.objects.create(user=self.user, name="Popular", usage=9)
+        Tag.objects.create(user=self.user, name="Common", usage=4)
+
+        res = self.client.get(TAGS_URL, {'ordering': '-usage'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [tag['name'] for tag in res.data],
+            ['Popular', 'Common', 'Rare'],
+        )
+
+    def test_reconcile_usage_counts(self):
+        """Test the reconciliation command fixes drifted counters."""
+        tag = Tag.objects.create(user=self.user, name="Drifted", usage=7)
+        unused = Tag.objects.create(user=self.user, name="Unused", usage=2)
+        recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price=Decimal('1'),
+        )
+        recipe.tags.add(tag)
+
+        call_command('reconcile_usage_counts', batch_size=1)
+
+        tag.refresh_from_db()
+        unused.refresh_from_db()
+        self.assertEqual(tag.usage, 1)
+        self.assertEqual(unused.usage, 0)
+
+    def test_autocomplete_prefix_before_fuzzy(self):
+        """Test prefix matches rank above fuzzy matches."""
+        autocomplete.prefix_cache.clear()
+        Tag.objects.create(user=self.user, name="Vegetarian")
+        Tag.objects.create(user=self.user, name="Vegan", usage=3)
+        Tag.objects.create(user=self.user, name="Dessert")
+        Tag.objects.create(user=create_user("u3@example.com"), name="Vegan")
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'veg'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [tag['name'] for tag in res.data], ['Vegan', 'Vegetarian'],
+        )
+
+    def test_autocomplete_cache_invalidated_on_update(self):
+        """Test cached prefixes are dropped when a tag is renamed."""
+        autocomplete.prefix_cache.clear()
+        tag = Tag.objects.create(user=self.user, name="Brunch")
+        self.client.get(AUTOCOMPLETE_URL, {'q': 'br'})
+
+        self.client.patch(detail_url(tag.id), {'name': 'Breakfast'})
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'br'})
+
+        self.assertEqual([tag['name'] for tag in res.data], ['Breakfast'])
+
+    def test_autocomplete_empty_query(self):
+        """Test an empty query returns no suggestions."""
+        Tag.objects.create(user=self.user, name="Vegan")
+
+        res = self.client.get(AUTOCOMPLETE_URL)
+
+        self.assertEqual(res.data, [])
@@ -1,61 +1,448 @@
 """Views for the Recipe API's"""
+import os
+from decimal import Decimal
 
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Coalesce, NullIf
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework import (
     viewsets, 
     mixins,
+    generics,
 )
 from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.filters import OrderingFilter
 from rest_framework.permissions import IsAuthenticated
 
+from core import media
+from core.compression import cache_compressed
+from core.deletion import defer_delete
+from core.idempotency import IdempotentMixin
+from core.pagination import EstimatedCountPagination
+from core.query_budget import allow_queries
 from core.models import (
         Recipe, 
+        RecipeStats,
         Tag, 
         Ingredients,
+        Tombstone,
+        recipe_snapshot,
+        record_recipe_change,
 )
 
-from recipe import serializers
+from recipe import (
+    autocomplete,
+    indexes,
+    list_cache,
+    serializers,
+    sync,
+)
+
+if settings.API_ONLY:
+    # API-only workers never build the schema, so skip importing its stack.
+    def image_schema(view):
+        return view
+else:
+    from drf_spectacular.types import OpenApiTypes
+    from drf_spectacular.utils import OpenApiParameter, extend_schema
+
+    image_schema = extend_schema(
+        parameters=[
+            OpenApiParameter('filename', OpenApiTypes.STR, OpenApiParameter.PATH),
+        ],
+        responses={(200, 'image/*'): OpenApiTypes.BINARY},
+    )
+
+
+def parse_int(params, name, default, minimum=1, maximum=None):
+    """Return an integer query parameter, validated and capped."""
+    value = params.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValidationError({name: 'Must be an integer.'})
+    if value < minimum:
+        raise ValidationError({name: f'Must be at least {minimum}.'})
+    return value if maximum is None else min(value, maximum)
+
 
-class RecipeViewSet(viewsets.ModelViewSet):
+def parse_ids(params, name):
+    """Return a list of ids from a comma separated query parameter."""
+    try:
+        return [
+            int(item) for item in params.get(name, '').split(',')
+            if item.strip()
+        ]
+    except ValueError:
+        raise ValidationError({name: 'Must be a comma separated list of ids.'})
+
+
+class RecipeViewSet(IdempotentMixin, viewsets.ModelViewSet):
     """View for manage  recipe API."""
     serializer_class = serializers.RecipeDetailSerializer
     queryset = Recipe.objects.all()
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = EstimatedCountPagination
+    query_budgets = {
+        'list': 5,
+        'retrieve': 4,
+        'similar': 9,
+        'pantry': 8,
+        'shopping_list': 2,
+        'meal_plan': 5,
+        'image': 2,
+    }
 
     def get_queryset(self):
         """Retrieve recipes for authenticated user"""
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        queryset = self.queryset.filter(user=self.request.user).order_by('-id')
+        if self.action == 'list':
+            queryset = queryset.prefetch_related('tags', 'ingredients')
+        return queryset
     
     def get_serializer_class(self):
         """Return the serializer class for request."""
-        if self.action == "list":
+        if self.action in ("list", "similar", "pantry"):
             return serializers.RecipeSerializer
+        if self.action == "shopping_list":
+            return serializers.ShoppingListSerializer
+        if self.action == "meal_plan":
+            return serializers.MealPlanSerializer
         
         return self.serializer_class
+
+    def get_list_count(self):
+        """Return the recipe count kept in RecipeStats, if there is one."""
+        return RecipeStats.objects.filter(user=self.request.user).values_list(
+            'recipe_count', flat=True,
+        ).first()
+
+    def list(self, request, *args, **kwargs):
+        """List recipes, from the shared cache for the default listing."""
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        return cache_compressed(
+            Response(list_cache.get('recipes', request.user.id))
+        )
     
+    @action(methods=['GET'], detail=True)
+    def similar(self, request, pk=None):
+        """List the user's recipes sharing the most tags and ingredients."""
+        # NumPy and SciPy load on first use, not at worker start.
+        from recipe import similarity
+
+        recipe = self.get_object()
+        metric = request.query_params.get('metric', 'jaccard')
+        if metric not in similarity.METRICS:
+            raise ValidationError(
+                {'metric': f'Must be one of {", ".join(similarity.METRICS)}.'}
+            )
+        limit = parse_int(request.query_params, 'limit', 10, maximum=50)
+
+        ranked = similarity.similarity_indexes.get(request.user.id).similar(
+            recipe.id, limit, metric,
+        )
+        recipes = self.get_queryset().prefetch_related(
+            'tags', 'ingredients',
+        ).in_bulk([recipe_id for recipe_id, score in ranked])
+        data = []
+        for recipe_id, score in ranked:
+            if recipe_id in recipes:
+                item = self.get_serializer(recipes[recipe_id]).data
+                item['similarity'] = round(score, 4)
+                data.append(item)
+        return Response(data)
+
+    @action(methods=['GET'], detail=False)
+    def pantry(self, request):
+        """Rank recipes by how many of their ingredients are on hand."""
+        from recipe.pantry import pantry_indexes
+
+        on_hand = parse_ids(request.query_params, 'ingredients')
+        max_missing = parse_int(
+            request.query_params, 'max_missing', None, minimum=0,
+        )
+        limit = parse_int(request.query_params, 'limit', 20, maximum=100)
+
+        matches = pantry_indexes.get(request.user.id).match(
+            on_hand, limit, max_missing,
+        )
+        recipes = self.get_queryset().prefetch_related(
+            'tags', 'ingredients',
+        ).in_bulk([recipe_id for recipe_id, _, _ in matches])
+        data = []
+        for recipe_id, missing, needed in matches:
+            if recipe_id in recipes:
+                item = self.get_serializer(recipes[recipe_id]).data
+                item['missing'] = len(missing)
+                item['missing_ingredients'] = missing
+                item['coverage'] = round(1 - len(missing) / needed, 4)
+                data.append(item)
+        return Response(data)
+
+    @action(methods=['POST'], detail=False, url_path='shopping-list')
+    def shopping_list(self, request):
+        """Merge the ingredients of several recipes in one grouped query."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        rows = (
+            Recipe.ingredients.through.objects
+            .filter(
+                recipe__user=request.user,
+                recipe_id__in=serializer.validated_data['recipes'],
+                ingredients__deleted_at__isnull=True,
+            )
+            .values('ingredients_id')
+            .annotate(
+                name=Coalesce(
+                    NullIf('ingredients__display_name', Value('')),
+                    'ingredients__catalog__name',
+                ),
+                count=Count('recipe_id'),
+                recipes=ArrayAgg('recipe_id', ordering='recipe_id'),
+            )
+            .order_by('name', 'ingredients_id')
+        )
+        return Response([
+            {
+                'id': row['ingredients_id'],
+                'name': row['name'],
+                'count': row['count'],
+                'recipes': row['recipes'],
+            }
+            for row in rows
+        ])
+
+    @action(methods=['POST'], detail=False, url_path='meal-plan')
+    def meal_plan(self, request):
+        """Pick a recipe per day within budget, time and tag limits."""
+        import numpy as np
+
+        from recipe.meal_plan import NoPlanError, load_recipes, plan_meals
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        ids, prices, times, tags = load_recipes(
+            request.user.id, params['max_time_minutes'],
+        )
+        try:
+            rows = plan_meals(
+                prices,
+                times,
+                tags,
+                days=params['days'],
+                budget=int(params['budget'] * 100),
+                max_time=params['max_time_minutes'],
+                max_per_tag=params.get('max_per_tag'),
+                # Without a seed the generator is seeded from the OS, so
+                # repeated requests can return different plans.
+                rng=np.random.default_rng(params.get('seed')),
+            )
+        except NoPlanError as error:
+            raise ValidationError({'detail': str(error)})
+
+        plan_ids = [int(ids[row]) for row in rows]
+        recipes = self.get_queryset().prefetch_related(
+            'tags', 'ingredients',
+        ).in_bulk(plan_ids)
+        return Response({
+            'recipes': serializers.RecipeSerializer(
+                [recipes[recipe_id] for recipe_id in plan_ids], many=True,
+            ).data,
+            'total_price': str(
+                Decimal(int(prices[rows].sum())).scaleb(-2)
+            ),
+        })
+
+    @image_schema
+    @action(
+        methods=['GET'],
+        detail=True,
+        url_path=r'image/(?P<filename>[^/]+)',
+        renderer_classes=api_settings.DEFAULT_RENDERER_CLASSES + [
+            media.PassthroughRenderer,
+        ],
+    )
+    def image(self, request, pk=None, filename=None):
+        """Serve the recipe's image to its owner."""
+        recipe = self.get_object()
+        if not recipe.image or os.path.basename(recipe.image.name) != filename:
+            raise Http404
+        return media.serve(request, recipe.image)
+
     def perform_create(self, serializer):
         """Create a new recipe"""
         serializer.save(user=self.request.user)
 
-class BaseRecipeAttrsViewSet(mixins.ListModelMixin,
+    def perform_destroy(self, instance):
+        """Delete a recipe and roll back its stats and usage counters."""
+        with transaction.atomic():
+            # Lock first, as RecipeSerializer.update does.
+            old = recipe_snapshot(get_object_or_404(
+                Recipe.objects.select_for_update(), pk=instance.pk,
+            ))
+            recipe_id = instance.id
+            instance.delete()
+            Tombstone.objects.record(
+                self.request.user, Tombstone.RECIPE, [recipe_id],
+            )
+            version = record_recipe_change(self.request.user, old=old)
+            indexes.recipe_changed(
+                self.request.user.id, version, recipe_id, None,
+            )
+
+class NameOrderingFilter(OrderingFilter):
+    """Ordering filter accepting `name` for models storing it elsewhere."""
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        return [
+            term.replace('name', view.name_field, 1)
+            if term.lstrip('-') == 'name' else term
+            for term in ordering
+        ]
+
+
+class BaseRecipeAttrsViewSet(IdempotentMixin,
+                                mixins.ListModelMixin,
                                 mixins.DestroyModelMixin,
                                 mixins.UpdateModelMixin,
                                 viewsets.GenericViewSet):
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
 
+    filter_backends = [NameOrderingFilter]
+    ordering_fields = ['name', 'usage']
+    pagination_class = EstimatedCountPagination
+    query_budgets = {'list': 3, 'autocomplete': 2, 'destroy': 14}
+    stats_field = None
+    list_label = None
+    tombstone_kind = None
+    name_field = 'name'
+
     def get_queryset(self):
         """Retrieve Tags for an authenticated user"""
-        return self.queryset.filter(user=self.request.user).order_by('-name')
+        return self.queryset.filter(user=self.request.user).order_by(
+            f'-{self.name_field}',
+        )
+
+    def list(self, request, *args, **kwargs):
+        """List objects, from the shared cache for the default listing."""
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        return cache_compressed(
+            Response(list_cache.get(self.list_label, request.user.id))
+        )
+
+    def perform_update(self, serializer):
+        """Save the object and forget cached suggestions and lists."""
+        with transaction.atomic():
+            serializer.save()
+            RecipeStats.objects.touch(self.request.user.id)
+        autocomplete.invalidate(self.queryset.model, self.request.user.id)
+
+    def perform_destroy(self, instance):
+        """Delete the object and drop it from the user's stats."""
+        with transaction.atomic():
+            obj_id = instance.id
+            if settings.DEFERRED_DELETES:
+                defer_delete(instance)
+            else:
+                instance.delete()
+            Tombstone.objects.record(
+                self.request.user, self.tombstone_kind, [obj_id],
+            )
+            RecipeStats.objects.discard(
+                self.request.user, self.stats_field, obj_id,
+            )
+        autocomplete.invalidate(self.queryset.model, self.request.user.id)
+
+    @action(methods=['GET'], detail=False)
+    def autocomplete(self, request):
+        """Suggest names by prefix, falling back to trigram similarity."""
+        def serialize(queryset):
+            return list(self.get_serializer(queryset, many=True).data)
+
+        data = autocomplete.suggest(
+            self.get_queryset(),
+            request.user.id,
+            request.query_params.get('q', ''),
+            serialize,
+            field=self.name_field,
+        )
+        return Response(data)
 
 class TagViewSet(BaseRecipeAttrsViewSet):
     """Manage Tags in the database"""
     serializer_class = serializers.TagSerializer
     queryset = Tag.objects.all()
+    stats_field = 'tag_counts'
+    list_label = 'tags'
+    tombstone_kind = Tombstone.TAG
 
     
 
 class IngredientViewSet(BaseRecipeAttrsViewSet):
     """Manage Ingredients in the database"""
     serializer_class = serializers.IngredientSerializer
-    queryset = Ingredients.objects.all()
\ No newline at end of file
+    queryset = Ingredients.objects.all()
+    stats_field = 'ingredient_counts'
+    list_label = 'ingredients'
+    name_field = 'catalog__name'
+    tombstone_kind = Tombstone.INGREDIENT
+
+
+class RecipeStatsView(generics.RetrieveAPIView):
+    """Return the authenticated user's recipe stats."""
+    serializer_class = serializers.RecipeStatsSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    query_budgets = {'get': 4}
+    # Building missing stats reads recipes and both link tables once.
+    rebuild_queries = 8
+
+    def get_object(self):
+        """Return the stored stats, building them on first access."""
+        try:
+            return RecipeStats.objects.get(user=self.request.user)
+        except RecipeStats.DoesNotExist:
+            allow_queries(self.request, self.rebuild_queries)
+            return RecipeStats.objects.rebuild(self.request.user)
+
+
+class SyncView(generics.RetrieveAPIView):
+    """Return recipes, tags and ingredients changed since a cursor.
+
+    Rows are found through (user, updated_at) and (user, deleted_at)
+    indexes, so the cost follows the number of changes. Tag and ingredient
+    renames and deletions arrive in their own collections.
+    """
+    serializer_class = serializers.SyncSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    query_budgets = {'get': 6}
+
+    def get_object(self):
+        """Collect changes after the `since` cursor, or everything."""
+        now = timezone.now()
+        since = self.request.query_params.get('since')
+        if since:
+            since = sync.parse_cursor(since)
+        return sync.changes(self.request.user, since, now)
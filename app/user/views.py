@@ -1,8 +1,13 @@
 """ Views for users api."""
 
 from rest_framework import generics, authentication, permissions
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+
+from core.throttling import TokenRateThrottle
+from recipe import list_cache
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
@@ -16,12 +21,23 @@ class CreateTokenView(ObtainAuthToken):
     """Create a new auth token for user."""
     serializer_class = AuthTokenSerializer
     renderer_classes =api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = [TokenRateThrottle]
+
+    def post(self, request, *args, **kwargs):
+        """Issue a token and schedule warming of the user's lists."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        token, created = Token.objects.get_or_create(user=user)
+        list_cache.schedule_warmup(user.id)
+        return Response({'token': token.key})
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authorized user."""
     serializer_class = UserSerializer
     authentication_classes = [authentication.TokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = {'get': 1}
 
     def get_object(self):
         """Retrieve and return the authenticated user."""